@@ -1,12 +1,16 @@
-from jk_maya_usd.exporter import CustomUSDExporter
-from jk_maya_usd.importer import CustomUSDImporter
-from jk_maya_usd.ui.importer_exporter_ui import ComponentsUI
-
-__all__ = ["CustomUSDExporter", "CustomUSDImporter", "ComponentsUI"]
-
-
-
+import importlib
 
+# Imported on first use, so the USD-only modules also load outside of Maya
+_EXPORTS = {
+    "CustomUSDExporter": "jk_maya_usd.exporter",
+    "CustomUSDImporter": "jk_maya_usd.importer",
+    "ComponentsUI": "jk_maya_usd.ui.importer_exporter_ui",
+}
 
+__all__ = ["CustomUSDExporter", "CustomUSDImporter", "ComponentsUI"]
 
 
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,156 @@
+""" Frame-major sampling of animated Maya attributes into USD time samples and value clips """
+
+import glob
+import os
+from collections import defaultdict
+from typing import Any
+
+import numpy as np
+from maya.api import OpenMaya as om
+from pxr import Sdf, Usd, Vt
+
+from jk_maya_usd.constants import USD_Format
+from jk_maya_usd.prims.primbase import PrimBase
+from jk_maya_usd.usd_utilities import create_layer, values_equal
+
+
+def get_frames(frame_range: tuple[float, float], frame_step: float = 1.0) -> list[float]:
+    """
+    Returns every frame of an inclusive frame range.
+
+    Args:
+        frame_range (tuple[float, float]): First and last frame.
+        frame_step (float, optional): Distance between samples. Defaults to 1.0.
+
+    Returns:
+        list[float]: The frames, which are also the USD time codes.
+    """
+    start, end = frame_range
+    if frame_step <= 0 or end < start:
+        raise ValueError(f"Invalid frame range {frame_range} with step {frame_step}")
+    return [float(frame) for frame in np.arange(start, end + frame_step * 0.5, frame_step)]
+
+
+def sample_frames(samplers: list[tuple[str, PrimBase]], frames: list[float]) -> dict[str, dict[str, dict[float, Any]]]:
+    """
+    Evaluates every node at every frame through an om.MDGContext, without changing the current time.
+
+    All nodes are sampled at one frame before moving on to the next, so upstream nodes shared by
+    several of them (rigs, deformers) are evaluated once per frame.
+
+    Args:
+        samplers (list[tuple[str, PrimBase]]): Each DAG node with the prim handler that samples it.
+        frames (list[float]): Frames to sample.
+
+    Returns:
+        dict[str, dict[str, dict[float, Any]]]: Per DAG node, per USD attribute, the value at every frame.
+    """
+    samples = defaultdict(lambda: defaultdict(dict))
+    time_unit = om.MTime.uiUnit()
+    for frame in frames:
+        context = om.MDGContext(om.MTime(frame, time_unit))
+        previous = context.makeCurrent()
+        try:
+            for dag_node, handler in samplers:
+                for name, value in handler.sample_node(dag_node).items():
+                    samples[dag_node][name][frame] = value
+        finally:
+            previous.makeCurrent()
+    return samples
+
+
+class ClipStreamer:
+    """
+    Streams time samples into value clip layers of clip_frames frames each, written next to
+    the main layer, so only one chunk of samples is held in memory at any time.
+
+    The main layer must already hold the first frame as default values. Attributes that
+    never leave that value are not written to any clip. For the others, the default moves
+    to the clip manifest, where it fills in for clips that hold no samples of the attribute.
+    """
+    def __init__(self, layer: Sdf.Layer, clip_frames: int):
+        if clip_frames < 1:
+            raise ValueError(f"clip_frames must be at least 1, got {clip_frames}")
+        self.layer = layer
+        self.clip_frames = clip_frames
+        self.clip_paths: list[str] = []
+        self.clip_starts: list[float] = []
+        self.varying: set[Sdf.Path] = set()
+        self._base_path = os.path.splitext(layer.realPath)[0]
+
+        # Clips of a previous, longer export would be left behind
+        for stale_clip in glob.glob(f"{glob.escape(self._base_path)}.clip[0-9][0-9][0-9][0-9].usdc"):
+            os.remove(stale_clip)
+
+    def write_clips(self, samplers: list[tuple[str, PrimBase]], prim_paths: dict[str, Sdf.Path], frames: list[float]) -> None:
+        """
+        Samples and writes one clip layer per chunk of frames.
+
+        Args:
+            samplers (list[tuple[str, PrimBase]]): Each DAG node with the prim handler that samples it.
+            prim_paths (dict[str, Sdf.Path]): The main layer prim path of every sampled DAG node.
+            frames (list[float]): All frames of the export.
+        """
+        for start in range(0, len(frames), self.clip_frames):
+            chunk = frames[start:start + self.clip_frames]
+            self._write_clip(sample_frames(samplers, chunk), prim_paths, chunk[0])
+
+    def _write_clip(self, samples: dict, prim_paths: dict[str, Sdf.Path], start_frame: float) -> None:
+        clip_path = f"{self._base_path}.clip{len(self.clip_paths):04d}.usdc"
+        clip_layer = create_layer(clip_path, USD_Format.USDC)
+        with Sdf.ChangeBlock():
+            for dag_node, attributes in samples.items():
+                prim_path = prim_paths.get(dag_node)
+                if prim_path is None:
+                    continue  # Not exported, e.g. below a variant set without a parent prim
+                for name, time_samples in attributes.items():
+                    attr_path = prim_path.AppendProperty(name)
+                    attr_spec = self.layer.GetAttributeAtPath(attr_path)
+                    if attr_spec is None or all(values_equal(attr_spec.default, value) for value in time_samples.values()):
+                        continue
+
+                    self.varying.add(attr_path)
+                    # Clips apply to the composed namespace, which has no variant selections
+                    clip_prim = Sdf.CreatePrimInLayer(clip_layer, prim_path.StripAllVariantSelections())
+                    clip_attr = Sdf.AttributeSpec(clip_prim, name, attr_spec.typeName)
+                    for time_code, value in time_samples.items():
+                        clip_layer.SetTimeSample(clip_attr.path, time_code, value)
+        clip_layer.Save()
+        self.clip_paths.append(clip_path)
+        self.clip_starts.append(start_frame)
+
+    def finish(self, stage: Usd.Stage, root_paths: list[Sdf.Path], frames: list[float]) -> str:
+        """
+        Writes the clip manifest and stitches the clips onto every root prim of the stage.
+
+        Args:
+            stage (Usd.Stage): Stage of the main layer.
+            root_paths (list[Sdf.Path]): Top level prims to author the clips on.
+            frames (list[float]): All frames of the export.
+
+        Returns:
+            str: Path of the manifest.
+        """
+        manifest_path = f"{self._base_path}.manifest.usda"
+        manifest = create_layer(manifest_path, USD_Format.USDA)
+        with Sdf.ChangeBlock():
+            for attr_path in sorted(self.varying):
+                attr_spec = self.layer.GetAttributeAtPath(attr_path)
+                manifest_prim = Sdf.CreatePrimInLayer(manifest, attr_path.GetPrimPath().StripAllVariantSelections())
+                manifest_attr = Sdf.AttributeSpec(manifest_prim, attr_path.name, attr_spec.typeName)
+                manifest_attr.default = attr_spec.default
+                # A default in the main layer would be stronger than every clip
+                attr_spec.ClearDefaultValue()
+        manifest.Save()
+
+        asset_paths = Sdf.AssetPathArray([f"./{os.path.basename(clip_path)}" for clip_path in self.clip_paths])
+        clip_active = Vt.Vec2dArray([(start, index) for index, start in enumerate(self.clip_starts)])
+        clip_times = Vt.Vec2dArray([(frames[0], frames[0]), (frames[-1], frames[-1])])
+        for root_path in root_paths:
+            clips = Usd.ClipsAPI(stage.GetPrimAtPath(root_path))
+            clips.SetClipPrimPath(str(root_path))
+            clips.SetClipAssetPaths(asset_paths)
+            clips.SetClipManifestAssetPath(Sdf.AssetPath(f"./{os.path.basename(manifest_path)}"))
+            clips.SetClipActive(clip_active)
+            clips.SetClipTimes(clip_times)
+        return manifest_path
@@ -0,0 +1,147 @@
+"""
+Conversions between Maya API arrays and USD Vt arrays through contiguous NumPy buffers.
+
+The USD side is a buffer view (Vt.*Array.FromNumpy / numpy.asarray). The Maya Python API 2.0
+arrays do not expose the buffer protocol and their constructors only take Python sequences,
+so the Maya side is still an element-wise copy that creates one Python object per element
+(an MPoint when reading, a list when writing). The conversions are bulk on the Vt side only:
+a single call per array, without a loop in Python, but not a buffer copy into Maya.
+tests/benchmarks.py times the two sides separately in benchmark_array_bridge.
+"""
+
+import numpy as np
+from pxr import Gf, Vt
+from maya.api import OpenMaya as om
+
+
+def to_numpy(maya_array, dtype=np.float32, width: int = 1) -> np.ndarray:
+    """
+    Copies a Maya API array into a contiguous NumPy array in a single call. Arrays that
+    expose the buffer protocol are read through it, the others element by element.
+
+    Args:
+        maya_array: Any Maya array (MIntArray, MFloatArray, MPointArray, MColorArray...).
+        dtype: The NumPy dtype of the result.
+        width (int, optional): Number of components to keep per element. Defaults to 1.
+
+    Returns:
+        np.ndarray: Array of shape (n,) when width is 1, otherwise (n, width).
+    """
+    try:
+        array = np.asarray(memoryview(maya_array), dtype=dtype)
+    except TypeError:
+        # No buffer protocol, NumPy copies the elements through the sequence protocol
+        array = np.array(maya_array, dtype=dtype)
+    if width == 1:
+        return array
+    if not len(maya_array):
+        return np.zeros((0, width), dtype=dtype)
+    array = array.reshape(len(maya_array), -1)
+    return np.ascontiguousarray(array[:, :width])
+
+
+def vt_to_numpy(vt_array, dtype=None) -> np.ndarray:
+    """
+    Returns a NumPy view of a Vt array, copying only when a dtype conversion is needed.
+
+    Args:
+        vt_array: Any Vt array exposing the buffer protocol.
+        dtype (optional): Requested NumPy dtype.
+
+    Returns:
+        np.ndarray: The array data.
+    """
+    return np.asarray(vt_array, dtype=dtype)
+
+
+def ints_to_vt(maya_array) -> Vt.IntArray:
+    """Converts an MIntArray (or int ndarray) to a Vt.IntArray."""
+    return Vt.IntArray.FromNumpy(np.ascontiguousarray(maya_array, dtype=np.int32))
+
+
+def doubles_to_vt(maya_array) -> Vt.DoubleArray:
+    """Converts an MDoubleArray (or float ndarray) to a Vt.DoubleArray."""
+    return Vt.DoubleArray.FromNumpy(np.ascontiguousarray(maya_array, dtype=np.float64))
+
+
+def points_to_vt(points) -> Vt.Vec3fArray:
+    """
+    Converts an MPointArray, MFloatPointArray or MFloatVectorArray to a Vt.Vec3fArray.
+
+    Args:
+        points: The Maya point or vector array.
+
+    Returns:
+        Vt.Vec3fArray: The xyz components of every point.
+    """
+    return Vt.Vec3fArray.FromNumpy(to_numpy(points, np.float32, width=3))
+
+
+def uvs_to_vt(u_array: om.MFloatArray, v_array: om.MFloatArray) -> Vt.Vec2fArray:
+    """
+    Interleaves Maya's separate U and V arrays into a Vt.Vec2fArray.
+
+    Args:
+        u_array (om.MFloatArray): U coordinates.
+        v_array (om.MFloatArray): V coordinates.
+
+    Returns:
+        Vt.Vec2fArray: The UV pairs.
+    """
+    st_array = np.column_stack((to_numpy(u_array), to_numpy(v_array)))
+    return Vt.Vec2fArray.FromNumpy(np.ascontiguousarray(st_array, dtype=np.float32))
+
+
+def colors_to_numpy(colors: om.MColorArray) -> np.ndarray:
+    """Converts an MColorArray to an (n, 4) RGBA float32 array."""
+    return to_numpy(colors, np.float32, width=4)
+
+
+def vt_to_float_points(vt_array) -> om.MFloatPointArray:
+    """Converts a Vt.Vec3fArray to an MFloatPointArray. Bulk on the Vt side only, Maya copies the nested list element by element."""
+    return om.MFloatPointArray(vt_to_numpy(vt_array, np.float32).reshape(-1, 3).tolist())
+
+
+def vt_to_points(vt_array) -> om.MPointArray:
+    """Converts a Vt.Vec3fArray to an MPointArray. Bulk on the Vt side only, Maya copies the nested list element by element."""
+    return om.MPointArray(vt_to_numpy(vt_array, np.float64).reshape(-1, 3).tolist())
+
+
+def vt_to_int_array(vt_array) -> om.MIntArray:
+    """Converts a Vt.IntArray (or int ndarray) to an MIntArray. Bulk on the Vt side only, Maya copies the list element by element."""
+    return om.MIntArray(np.asarray(vt_array, dtype=np.int32).tolist())
+
+
+def vt_to_double_array(vt_array) -> om.MDoubleArray:
+    """Converts a Vt.DoubleArray (or float ndarray) to an MDoubleArray. Bulk on the Vt side only, Maya copies the list element by element."""
+    return om.MDoubleArray(np.asarray(vt_array, dtype=np.float64).tolist())
+
+
+def vt_to_uvs(vt_array) -> tuple[om.MFloatArray, om.MFloatArray]:
+    """
+    Splits a Vt.Vec2fArray into the separate U and V arrays Maya expects.
+    Bulk on the Vt side only, Maya copies both lists element by element.
+
+    Args:
+        vt_array: The UV pairs.
+
+    Returns:
+        tuple[om.MFloatArray, om.MFloatArray]: U and V coordinates.
+    """
+    st_array = vt_to_numpy(vt_array, np.float32).reshape(-1, 2)
+    return om.MFloatArray(st_array[:, 0].tolist()), om.MFloatArray(st_array[:, 1].tolist())
+
+
+def numpy_to_colors(rgba: np.ndarray) -> om.MColorArray:
+    """Converts an (n, 3) or (n, 4) float array to an MColorArray. Maya copies the nested list element by element."""
+    return om.MColorArray(np.asarray(rgba, dtype=np.float32).tolist())
+
+
+def matrix_to_gf(matrix: om.MMatrix) -> Gf.Matrix4d:
+    """Converts an MMatrix to a Gf.Matrix4d. Both use row vectors, so no transpose is needed."""
+    return Gf.Matrix4d(*[matrix.getElement(row, column) for row in range(4) for column in range(4)])
+
+
+def gf_to_matrix(matrix: Gf.Matrix4d) -> om.MMatrix:
+    """Converts a Gf.Matrix4d to an MMatrix."""
+    return om.MMatrix([matrix[row][column] for row in range(4) for column in range(4)])
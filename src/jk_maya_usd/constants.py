@@ -26,4 +26,28 @@ class USD_Purpose(Enum):
 
 class USD_Kind(Enum):
     ASSEMBLY = 'assembly'
-    COMPONENT = 'component'
\ No newline at end of file
+    COMPONENT = 'component'
+
+class USD_Department(Enum):
+    STRUCTURE = 'STRUCT'
+    MODEL = 'MDL'
+    UV = 'UV'
+    TRANSFORM = 'XFORM'
+
+class USD_Format(Enum):
+    USDA = 'usda'
+    USDC = 'usdc'
+    USDZ = 'usdz'
+
+USD_EXTENSIONS = ('.usd', '.usda', '.usdc', '.usdz')
+HASH_SIDECAR_SUFFIX = ".hashes.json"
+
+PROTOTYPES_ROOT = "/Prototypes"
+PROTOTYPE_GEOMETRY_NAME = "geo"
+DISPLAY_COLOR_SET = "displayColor"
+
+SOURCE_FILE_ATTRIBUTE = f"{ATTRIBUTE_PREFIX}sourceFile"
+SOURCE_PRIM_ATTRIBUTE = f"{ATTRIBUTE_PREFIX}primPath"
+MAYA_UUID_KEY = "mayaUuid"
+CURVE_WIDTH_ATTRIBUTE = f"{ATTRIBUTE_PREFIX}width"
+CURVE_PERIODIC_KEY = "mayaPeriodic"
@@ -1,92 +1,442 @@
-from maya import cmds
-from pxr import Usd, UsdGeom
+from pxr import Usd, UsdGeom, Sdf
 
+import logging
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-from jk_maya_usd.constants import DEFAULT_CAMERAS
+from jk_maya_usd.animation import ClipStreamer, get_frames, sample_frames
+from jk_maya_usd.constants import USD_Department, USD_Format
+from jk_maya_usd.instrumentation import DISABLED, Instrumentation
 from jk_maya_usd.prims import usd_prims
+from jk_maya_usd.scene_index import SceneIndex
+from jk_maya_usd.instancing import MeshInstancer
+from jk_maya_usd.usd_utilities import (
+    resolve_layer_path,
+    create_layer,
+    package_usdz,
+    load_prim_hashes,
+    save_prim_hashes,
+    write_layer,
+    get_department_layer_path,
+    write_department_root,
+    DepartmentWriter,
+    StageWriter,
+    LayerWriter,
+    IncrementalWriter,
+    RecordingWriter,
+)
 
-from jk_maya_usd.maya_utilities import get_scene_scale, get_up_axis, get_node_type
+from jk_maya_usd.maya_utilities import get_frames_per_second, get_full_paths, get_scene_scale, get_up_axis
+
+logger = logging.getLogger(__name__)
 
 class CustomUSDExporter():
     """ Export Scene from Maya to USD """
     def __init__(self):
         self.materials = {}
+        self.stage = None
+        self.writer = None
+        self.scene_index = None
+        self.instancer = None
+        self.time_samples = {}
+        self.prim_paths = {}
+        self.matrix_transforms = False
+        self.store_uuids = False
+        self.curve_groups = set()
+        self.compact_primvars = False
+        self.half_precision_error = None
+        self.bytes_saved = {}
+        self.instrumentation = DISABLED
+        self._package_dir = None
 
     def get_materials(self):
         return self.materials
     
     def _process_node(self, dag_node, node_type, target):
-        if node_type in usd_prims:
+        self.prim_paths[dag_node] = target
+        if self.instancer and node_type == 'mesh':
+            with self.instrumentation.phase("instance", "Mesh"):
+                prim_data = self.instancer.export_instance(self.writer, dag_node, target)
+            self.instrumentation.count("instances")
+            logger.debug("Prim(%s) instanced: %s", prim_data.type_name, target.name)
+        elif node_type in usd_prims:
             cls = usd_prims[node_type](self)
-            prim = cls.export_node(self.stage, dag_node, target)
-            print(f"Prim({prim.GetTypeName()}) created: {prim.GetName()}")
+            prim_data = cls.export_node(self.writer, dag_node, target, self.time_samples.get(dag_node))
+            logger.debug("Prim(%s) created: %s", prim_data.type_name, target.name)
         else:
-            print(f"{node_type} not processed")
+            self.instrumentation.count("skipped")
+            logger.debug("%s not processed", node_type)
             
-    def _create_stage(self, stage_path):
-        if os.path.exists(stage_path):
-            os.remove(stage_path)
-
+    def _create_stage(self, stage_path, file_format=USD_Format.USDA, keep_existing=False, frames=None):
+        if keep_existing:
+            self._package_dir = None
+            layer = Sdf.Layer.FindOrOpen(stage_path)
+            layer.Reload()
+        # usdz is a zip package, so author a crate layer and package it on save
+        elif file_format == USD_Format.USDZ:
+            self._package_dir = tempfile.TemporaryDirectory()
+            layer_name = os.path.splitext(os.path.basename(stage_path))[0]
+            layer_path = os.path.join(self._package_dir.name, f"{layer_name}.usdc")
+            layer = create_layer(layer_path, USD_Format.USDC)
+        else:
+            self._package_dir = None
+            layer = create_layer(stage_path, file_format)
 
         # Create new stage
-        self.stage = Usd.Stage.CreateNew(stage_path)
+        self.stage = Usd.Stage.Open(layer)
+
+        layer_metadata = self._get_layer_metadata(frames)
+        UsdGeom.SetStageUpAxis(self.stage, layer_metadata.pop(UsdGeom.Tokens.upAxis))
+        UsdGeom.SetStageMetersPerUnit(self.stage, layer_metadata.pop(UsdGeom.Tokens.metersPerUnit))
+        for key, value in layer_metadata.items():
+            self.stage.SetMetadata(key, value)
 
-        up_axis = get_up_axis()
-        meters_per_unit = get_scene_scale()
-        up_axis_token = UsdGeom.Tokens.y if up_axis == 'Y' else UsdGeom.Tokens.z
+    def _get_layer_metadata(self, frames=None):
+        up_axis_token = UsdGeom.Tokens.y if get_up_axis() == 'Y' else UsdGeom.Tokens.z
+        layer_metadata = {
+            UsdGeom.Tokens.upAxis: up_axis_token,
+            UsdGeom.Tokens.metersPerUnit: get_scene_scale(),
+        }
+        if frames:
+            frames_per_second = get_frames_per_second()
+            layer_metadata.update({
+                "startTimeCode": frames[0],
+                "endTimeCode": frames[-1],
+                "timeCodesPerSecond": frames_per_second,
+                "framesPerSecond": frames_per_second,
+            })
+        return layer_metadata
 
-        UsdGeom.SetStageUpAxis(self.stage, up_axis_token)
-        UsdGeom.SetStageMetersPerUnit(self.stage, meters_per_unit)
+    def _get_samplers(self) -> list[tuple[str, object]]:
+        """Returns every exported node whose prim handler samples animation, with that handler."""
+        samplers = []
+        pending = list(self.scene_index.roots)
+        while pending:
+            scene_node = self.scene_index[pending.pop()]
+            if scene_node.path in self.curve_groups:
+                samplers.append((scene_node.path, usd_prims['nurbsCurve'](self)))
+                continue
+            node_type = scene_node.node_type
+            instanced = self.instancer and node_type == 'mesh'
+            if node_type in usd_prims and usd_prims[node_type].animatable and not instanced:
+                samplers.append((scene_node.path, usd_prims[node_type](self)))
+            if node_type in {'transform', 'Xform', 'Scope', 'VariantSet', 'Variant'}:
+                pending.extend(scene_node.children)
+        return samplers
 
-    def _traverse(self, node, parent_path):
-        node_type = get_node_type(node)
-        short_name = node.split('|')[-1]
-        target_path = f"{parent_path}/{short_name}"
+    def _traverse(self, node, parent_path: Sdf.Path):
+        scene_node = self.scene_index[node]
+        node_type = scene_node.node_type
+        short_name = scene_node.name
+        target_path = parent_path.AppendChild(short_name)
 
         if node_type == "VariantSet":
-            parent_prim = self.stage.GetPrimAtPath(parent_path)
-            if not parent_prim.IsValid():
+            if not self.writer.has_prim(parent_path):
                 return
 
-            variant_set = parent_prim.GetVariantSets().AddVariantSet(short_name)
-            children = cmds.listRelatives(node, children=True, fullPath=True) or []
+            self.writer.add_variant_set(parent_path, short_name)
+            children = [self.scene_index[child] for child in scene_node.children]
 
             for child in children:
-                variant_name = child.split('|')[-1]
-                variant_set.AddVariant(variant_name)
-
-                with variant_set.GetVariantEditContext(variant_name):
-                    grandchildren = cmds.listRelatives(child, children=True, fullPath=True) or []
-                    for grandchild in grandchildren:
-                        self._traverse(grandchild, parent_path)
+                with self.writer.variant_context(parent_path, short_name, child.name) as variant_path:
+                    for grandchild in child.children:
+                        self._traverse(grandchild, variant_path)
 
             if children:
-                variant_set.SetVariantSelection(children[0].split('|')[-1])
+                self.writer.set_variant_selection(parent_path, short_name, children[0].name)
+            return
+
+        if node in self.curve_groups:
+            # Every curve below the group is packed into its single NurbsCurves prim
+            self._process_node(node, "nurbsCurve", target_path)
             return
 
         self._process_node(node, node_type, target_path)
 
 
         if node_type in {'transform', 'Xform', 'Scope'}:
-            children = cmds.listRelatives(node, children=True, fullPath=True) or []
-            for child in children:
+            for child in scene_node.children:
                 self._traverse(child, target_path)
 
-    def export_to_usd(self, stage_file_name, top_dag_node: str = ""):
-        self._create_stage(stage_file_name)
+    @contextmanager
+    def _export_options(self, **options):
+        """Sets the options of one export and restores the previous values when it ends, even on error."""
+        previous = {name: getattr(self, name) for name in options}
+        for name, value in options.items():
+            setattr(self, name, value)
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                setattr(self, name, value)
 
-        if top_dag_node:
-            dag_nodes = cmds.listRelatives(top_dag_node, children=True, type="transform", fullPath=True) or []
-        else:
-            dag_nodes = [
-                node for node in cmds.ls(type="transform", long=True)
-                if not cmds.listRelatives(node, parent=True)
-                and node not in DEFAULT_CAMERAS
-            ]
+    def _save_stage(self, stage_path):
+        root_layer = self.stage.GetRootLayer()
+        root_layer.Save()
+        if self._package_dir:
+            package_usdz(root_layer.realPath, stage_path)
+            self._package_dir.cleanup()
+            self._package_dir = None
+
+    def export_to_usd(
+        self,
+        stage_file_name,
+        top_dag_node: str = "",
+        file_format: USD_Format | str | None = None,
+        batch_authoring: bool = False,
+        incremental: bool = False,
+        instance_meshes: bool = False,
+        frame_range: tuple[float, float] | None = None,
+        frame_step: float = 1.0,
+        clip_frames: int | None = None,
+        matrix_transforms: bool = False,
+        store_uuids: bool = False,
+        curve_groups: list[str] | None = None,
+        compact_primvars: bool = False,
+        half_precision_error: float | None = None,
+        profile: bool = False):
+        """
+        Exports the scene, or the children of top_dag_node, to a USD file.
+
+        Args:
+            stage_file_name (str): Output path. Its extension is replaced to match file_format, except for '.usd'.
+            top_dag_node (str, optional): Only export the children of this node. Defaults to the whole scene.
+            file_format (USD_Format | str | None, optional): usda, usdc or usdz. Defaults to the extension of stage_file_name.
+            batch_authoring (bool, optional): Write specs straight onto the root layer inside a single
+                Sdf.ChangeBlock instead of going through the stage API. The output is identical. Defaults to False.
+            incremental (bool, optional): Update the existing file in place, re-authoring only the prims whose
+                content hash changed since the last export and removing prims that no longer exist. The hashes
+                are kept in a sidecar file next to the layer. Implies batch_authoring; ignored for usdz. Defaults to False.
+            instance_meshes (bool, optional): Author identical meshes once as prototypes under /Prototypes and
+                export every mesh as an instanceable Xform referencing its prototype. Defaults to False.
+            frame_range (tuple[float, float] | None, optional): First and last frame to export transforms, mesh points
+                and curve CVs as time samples. Values that never change are written as default values only.
+                Instanced meshes are not sampled. Defaults to None, a static export of the current frame.
+            frame_step (float, optional): Frames between two samples. Defaults to 1.0.
+            clip_frames (int | None, optional): Stream the frame range into value clip layers of this many
+                samples each, written next to the output with a clip manifest, so memory stays bounded for
+                any shot length. The output holds the first frame and the clip metadata. Implies
+                batch_authoring; not available for usdz or with incremental. Defaults to None.
+            matrix_transforms (bool, optional): Author every transform as a single xformOp:transform read from
+                its local matrix, which keeps pivots, rotate order, shear and joint orient. Defaults to False,
+                translate, rotateXYZ and scale ops. Mesh and curve points are always in object space.
+            store_uuids (bool, optional): Store the UUID of every exported node in the customData of its
+                prim, so an update import can find nodes that were renamed or moved. Defaults to False.
+            curve_groups (list[str] | None, optional): Transforms whose NURBS curves, including every curve
+                below them, are packed into one NurbsCurves prim in the space of the transform, instead of
+                one prim per curve. Defaults to None.
+            compact_primvars (bool, optional): Dedupe the values of every primvar into indexed form wherever that
+                is smaller. The bytes saved per prim path are kept in self.bytes_saved. Defaults to False.
+            half_precision_error (float | None, optional): With compact_primvars, also store UV primvars as half
+                precision when no value moves by more than this. Points, normals and the other schema attributes
+                stay in full precision, their types are fixed by the schema. Defaults to None, full precision.
+            profile (bool, optional): Capture the export with cProfile into the report. Defaults to False.
+
+        The time per phase and prim class and the number of prims and points written are
+        kept in self.instrumentation, and the summary is logged at INFO.
+
+        Returns:
+            str: The path that was written.
+        """
+        with self._export_options(
+            matrix_transforms=matrix_transforms,
+            store_uuids=store_uuids,
+            curve_groups=get_full_paths(curve_groups),
+            compact_primvars=compact_primvars,
+            half_precision_error=half_precision_error,
+        ):
+            stage_file_name, file_format = resolve_layer_path(stage_file_name, file_format)
+            self.instrumentation = Instrumentation(f"Export {stage_file_name}", profile).start()
+            self.bytes_saved = {}
+            streaming = bool(frame_range and clip_frames)
+            if streaming and file_format == USD_Format.USDZ:
+                raise ValueError("Value clips are written next to the layer and can not be packaged as usdz")
+            batch_authoring = batch_authoring or streaming
+            incremental = incremental and file_format != USD_Format.USDZ and not streaming
+            update_existing = incremental and os.path.exists(stage_file_name)
+            frames = get_frames(frame_range, frame_step) if frame_range else None
+            self._create_stage(stage_file_name, file_format, keep_existing=update_existing, frames=frames)
+
+            with self.instrumentation.phase("index"):
+                self.scene_index = SceneIndex.build(top_dag_node)
+            self.instancer = MeshInstancer(self) if instance_meshes else None
+            dag_nodes = self.scene_index.roots
+            if frames:
+                samplers = self._get_samplers()
+                # When streaming, the main layer only holds the first frame
+                with self.instrumentation.phase("sample"):
+                    self.time_samples = sample_frames(samplers, frames[:1] if streaming else frames)
+
+            if incremental:
+                previous_hashes = load_prim_hashes(stage_file_name) if update_existing else {}
+                self.writer = IncrementalWriter(LayerWriter(self.stage.GetRootLayer()), previous_hashes)
+                with Sdf.ChangeBlock():
+                    for node in dag_nodes:
+                        self._traverse(node, Sdf.Path.absoluteRootPath)
+                    removed = self.writer.remove_stale_prims()
+                save_prim_hashes(stage_file_name, self.writer.hashes)
+                logger.info(
+                    "Incremental export: %d of %d prims re-authored, %d removed",
+                    len(self.writer.authored), len(self.writer.hashes), len(removed)
+                )
+            elif batch_authoring:
+                self.writer = LayerWriter(self.stage.GetRootLayer())
+                with Sdf.ChangeBlock():
+                    for node in dag_nodes:
+                        self._traverse(node, Sdf.Path.absoluteRootPath)
+            else:
+                self.writer = StageWriter(self.stage)
+                for node in dag_nodes:
+                    self._traverse(node, Sdf.Path.absoluteRootPath)
+
+            if streaming:
+                self.time_samples = {}
+                streamer = ClipStreamer(self.stage.GetRootLayer(), clip_frames)
+                with self.instrumentation.phase("clips"):
+                    streamer.write_clips(samplers, self.prim_paths, frames)
+                    root_paths = [Sdf.Path.absoluteRootPath.AppendChild(self.scene_index[node].name) for node in dag_nodes]
+                    streamer.finish(self.stage, [path for path in root_paths if self.stage.GetPrimAtPath(path)], frames)
+                logger.info(
+                    "Streamed %d frames into %d clips, %d attributes vary",
+                    len(frames), len(streamer.clip_paths), len(streamer.varying)
+                )
+
+            with self.instrumentation.phase("save"):
+                self._save_stage(stage_file_name)
+            self.instrumentation.stop()
+            if compact_primvars:
+                logger.info("Compacted primvars of %d prims, %d bytes saved", len(self.bytes_saved), sum(self.bytes_saved.values()))
+            logger.info("%s", self.instrumentation)
+            self.stage = None
+            self.writer = None
+            self.scene_index = None
+            self.instancer = None
+            self.time_samples = {}
+            self.prim_paths = {}
+            return stage_file_name
+
+    def export_batch(
+        self,
+        exports: dict[str, str],
+        file_format: USD_Format | str | None = None,
+        max_workers: int | None = None,
+        matrix_transforms: bool = False,
+        profile: bool = False) -> dict[str, dict[str, float]]:
+        """
+        Exports many DAG nodes to their own files. Each node becomes the root prim of its file.
+
+        Maya data is extracted on the calling (main) thread, one node after the other,
+        while the USD authoring and saving of the already extracted nodes runs in a thread pool.
+
+        Args:
+            exports (dict[str, str]): Maps each DAG node to its output path.
+            file_format (USD_Format | str | None, optional): usda, usdc or usdz. Defaults to the extension of each path.
+            max_workers (int | None, optional): Size of the thread pool. Defaults to the ThreadPoolExecutor default.
+            matrix_transforms (bool, optional): Author transforms as a single xformOp:transform. Defaults to False.
+            profile (bool, optional): Capture the main thread with cProfile into the report. Defaults to False.
+
+        Returns:
+            dict[str, dict[str, float]]: Per written file, the seconds spent extracting, authoring, saving and in total.
+        """
+        with self._export_options(matrix_transforms=matrix_transforms):
+            self.instrumentation = Instrumentation(f"Export batch of {len(exports)}", profile).start()
+            layer_metadata = self._get_layer_metadata()
+            futures = {}
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for dag_node, file_path in exports.items():
+                    start = time.perf_counter()
+                    file_path, path_format = resolve_layer_path(file_path, file_format)
+
+                    with self.instrumentation.phase("index"):
+                        self.scene_index = SceneIndex.build(dag_node)
+                    self.writer = RecordingWriter()
+                    self._traverse(self.scene_index.top, Sdf.Path.absoluteRootPath)
+                    extract_time = time.perf_counter() - start
+
+                    future = pool.submit(write_layer, self.writer, file_path, path_format, layer_metadata)
+                    futures[future] = (file_path, extract_time)
+
+                self.writer = None
+                self.scene_index = None
+
+            timings = {}
+            for future, (file_path, extract_time) in futures.items():
+                timing = {"extract_s": extract_time, **future.result()}
+                timing["total_s"] = sum(timing.values())
+                timings[file_path] = timing
+                # Authoring on the workers overlaps the extraction, so these add up to more than the total
+                self.instrumentation.add_time("write", timing["author_s"])
+                self.instrumentation.add_time("save", timing["save_s"])
+            for file_path, timing in timings.items():
+                logger.debug("Exported %s: %s", file_path, ", ".join(f"{key} {value:.3f}" for key, value in timing.items()))
+            self.instrumentation.stop()
+            logger.info("%s", self.instrumentation)
+            return timings
+
+    def export_departments(
+        self,
+        stage_file_name,
+        top_dag_node: str = "",
+        file_format: USD_Format | str | None = None,
+        departments: list[USD_Department | str] | None = None,
+        max_workers: int | None = None,
+        matrix_transforms: bool = False,
+        profile: bool = False) -> dict[str, dict[str, float]]:
+        """
+        Exports the scene, or the children of top_dag_node, split into one layer per department,
+        which a root layer at stage_file_name sublayers. The STRUCTURE layer defines the prims and
+        variant sets, MDL holds the topology and points, UV the primvars and XFORM the transforms.
+
+        Maya data is extracted once on the calling (main) thread, then every department layer
+        is authored and saved in a thread pool.
+
+        Args:
+            stage_file_name (str): Path of the root layer. The department layers are written next to it.
+            top_dag_node (str, optional): Only export the children of this node. Defaults to the whole scene.
+            file_format (USD_Format | str | None, optional): usda or usdc. Defaults to the extension of stage_file_name.
+            departments (list[USD_Department | str] | None, optional): Only rewrite these department layers, e.g.
+                ['UV'] after a UV change, and keep the others as they are. Defaults to every department.
+            max_workers (int | None, optional): Size of the thread pool. Defaults to the ThreadPoolExecutor default.
+            matrix_transforms (bool, optional): Author transforms as a single xformOp:transform. Defaults to False.
+            profile (bool, optional): Capture the main thread with cProfile into the report. Defaults to False.
+
+        Returns:
+            dict[str, dict[str, float]]: Per written department layer, the seconds spent authoring and saving.
+        """
+        with self._export_options(matrix_transforms=matrix_transforms):
+            stage_file_name, file_format = resolve_layer_path(stage_file_name, file_format)
+            if file_format == USD_Format.USDZ:
+                raise ValueError("Department layers are written next to the root layer and can not be packaged as usdz")
+            departments = list(USD_Department) if departments is None else [USD_Department(department) for department in departments]
+            layer_paths = {department: get_department_layer_path(stage_file_name, department) for department in USD_Department}
+            self.instrumentation = Instrumentation(f"Export departments {stage_file_name}", profile).start()
+            layer_metadata = self._get_layer_metadata()
+
+            with self.instrumentation.phase("index"):
+                self.scene_index = SceneIndex.build(top_dag_node)
+            self.writer = DepartmentWriter()
+            for node in self.scene_index.roots:
+                self._traverse(node, Sdf.Path.absoluteRootPath)
 
-        for node in dag_nodes:
-            self._traverse(node, "")
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(write_layer, self.writer.recordings[department], layer_paths[department], file_format, layer_metadata): department
+                    for department in departments
+                }
+                with self.instrumentation.phase("save"):
+                    write_department_root(stage_file_name, file_format, departments, layer_metadata)
 
-        self.stage.GetRootLayer().Save()
-        self.stage = None
\ No newline at end of file
+            timings = {}
+            for future, department in futures.items():
+                timing = future.result()
+                timings[layer_paths[department]] = timing
+                self.instrumentation.add_time("write", timing["author_s"])
+                self.instrumentation.add_time("save", timing["save_s"])
+            self.instrumentation.stop()
+            logger.info("%s", self.instrumentation)
+            self.writer = None
+            self.scene_index = None
+            return timings
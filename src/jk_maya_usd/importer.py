@@ -1,77 +1,580 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
 from maya import cmds
-from pxr import Usd
+from maya.api import OpenMaya as om
+from pxr import Sdf, Usd, UsdGeom
+
+from jk_maya_usd.constants import MAYA_UUID_KEY, PROTOTYPE_GEOMETRY_NAME, SOURCE_FILE_ATTRIBUTE, SOURCE_PRIM_ATTRIBUTE
+from jk_maya_usd.instrumentation import DISABLED, Instrumentation
+from jk_maya_usd.mesh_cache import MeshCache, stage_signature
+from jk_maya_usd.prims import usd_to_maya_prims
+from jk_maya_usd.prims.mesh import Mesh
+from jk_maya_usd.prims.placeholder import Placeholder
+from jk_maya_usd.prims.primbase import PrimBase
+from jk_maya_usd.maya_utilities import add_type_attribute, get_dagpath_from_uuid, get_mobject_from_name, get_shape
+from jk_maya_usd.modifier_command import SetStringAttribute, apply_modifier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlannedNode:
+    """ A Maya transform the import will create, planned before anything is touched in Maya """
+    name: str
+    parent: int | None
+    usd_path: Sdf.Path
+    handler: PrimBase | None = None
+    data: object = None
+    type_attribute: str | None = None
+    uuid: str | None = None
+    instance_of: int | None = None
+    # The mesh is built as the shape of the parent's transform instead of under its own
+    in_parent: bool = False
+    mobject: om.MObject | None = None
+    existing: bool = False
 
-from jk_maya_usd.constants import DESTINATION
-from jk_maya_usd.prims import usd_prims
-from jk_maya_usd.maya_utilities import create_variant_set, create_variant, create_group
 
 class CustomUSDImporter():
-    """ Import Scene from USD into Maya """
-    def __init__(self):
+    """
+    Import Scene from USD into Maya, in two phases. Planning walks the stage on the main
+    thread and reads every prim into Maya-ready buffers on a pool of read threads. Building
+    then creates the Maya nodes from those buffers on the main thread. With a mesh_cache, the
+    buffers of every mesh read are kept, so importing the same files again skips reading and
+    converting their meshes.
+    """
+    def __init__(self, mesh_cache: MeshCache | None = None):
         self.stage = None
+        self.stage_signature = None
+        self.mesh_cache = mesh_cache
+        self.usd_file = None
+        self.prim_paths: list[Sdf.Path] = []
+        self.placeholders = False
+        self.placeholder = Placeholder(self)
+        self.handlers: dict[str, PrimBase] = {}
+        self.nodes: list[PlannedNode] = []
+        self.prototype_nodes: dict[Sdf.Path, int] = {}
+        self.edits: list = []
+        self._read_pool: ThreadPoolExecutor | None = None
+        self._resolved = 0
+        self.instrumentation = DISABLED
+
+    def _get_handler(self, node_type: str) -> PrimBase:
+        if node_type not in self.handlers:
+            self.handlers[node_type] = usd_to_maya_prims[node_type](self)
+        return self.handlers[node_type]
+
+    def _plan_node(
+        self,
+        name: str,
+        parent: int | None,
+        usd_path: Sdf.Path,
+        handler: PrimBase | None = None,
+        data=None,
+        type_attribute: str | None = None,
+        uuid: str | None = None,
+        instance_of: int | None = None,
+        in_parent: bool = False) -> int:
+        self.nodes.append(PlannedNode(name, parent, usd_path, handler, data, type_attribute, uuid, instance_of, in_parent))
+        return len(self.nodes) - 1
+
+    def _read_prim(self, handler: PrimBase, prim: Usd.Prim, usd_path: Sdf.Path):
+        """Reads a mesh through the mesh cache when the importer has one, any other prim directly."""
+        if self.mesh_cache is None or not isinstance(handler, Mesh):
+            return handler.read_prim(prim)
+
+        key = MeshCache.make_key(self.stage_signature, usd_path)
+        data = self.mesh_cache.get(key)
+        if data is not None:
+            self.instrumentation.count("cached meshes")
+            return data
+        data = handler.read_prim(prim)
+        if data is not None:
+            self.mesh_cache.put(key, data)
+        return data
+
+    def _queue_read(self, handler: PrimBase, prim: Usd.Prim, usd_path: Sdf.Path):
+        """
+        Returns:
+            The prim's buffers, or a Future of them when reading on the read pool.
+        """
+        if self._read_pool is None:
+            return self._read_prim(handler, prim, usd_path)
+        return self._read_pool.submit(self._read_prim, handler, prim, usd_path)
+
+    def _wait_for_reads(self) -> None:
+        """Replaces the Futures of the queued reads by their buffers. Called before the stage is edited."""
+        for node in self.nodes[self._resolved:]:
+            if isinstance(node.data, Future):
+                node.data = node.data.result()
+        self._resolved = len(self.nodes)
+
+    @contextmanager
+    def _reading(self, max_workers: int | None):
+        """Reads on a pool of max_workers threads within the block, or on the calling thread for 1."""
+        self._resolved = 0
+        if max_workers == 1:
+            yield
+            return
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jk_maya_usd_read") as pool:
+            self._read_pool = pool
+            try:
+                yield
+                self._wait_for_reads()
+            finally:
+                self._read_pool = None
 
-    def _process_node(self, prim, parent):
+    def _process_node(self, prim, parent, usd_path):
         node_type = prim.GetTypeName()
-        if node_type in usd_prims:
-            cls = usd_prims[node_type](self) 
-            maya_node = cls.import_node(self.stage, prim, parent)
-            return maya_node
+        if node_type in usd_to_maya_prims:
+            handler = self._get_handler(node_type)
+            # Meshes of an instanced prototype are read once and share one Maya shape
+            prototype_path = None
+            if isinstance(handler, Mesh) and prim.IsInstanceProxy():
+                prototype_path = prim.GetPrimInPrototype().GetPath()
+            instance_of = self.prototype_nodes.get(prototype_path)
+            data = self._queue_read(handler, prim, usd_path) if instance_of is None else self.nodes[instance_of].data
+
+            index = self._plan_node(
+                prim.GetName(),
+                parent,
+                usd_path,
+                handler,
+                data,
+                handler.type_attribute,
+                prim.GetCustomDataByKey(MAYA_UUID_KEY),
+                instance_of,
+                prototype_path is not None and self._is_prototype_geometry(prim, parent, usd_path),
+            )
+            if prototype_path is not None and instance_of is None:
+                self.prototype_nodes[prototype_path] = index
+            return index
         else:
-            print(f"{node_type} not in usd_prims")
+            self.instrumentation.count("skipped")
+            logger.debug("%s not in usd_prims", node_type)
+            return parent
+
+
+    def _is_prototype_geometry(self, prim: Usd.Prim, parent: int | None, usd_path: Sdf.Path) -> bool:
+        """
+        Returns:
+            bool: The mesh is the only child of its prototype and has no transform of its own, as the
+                exporter authors instanced meshes, so its shape belongs under the instance's transform.
+        """
+        prototype_prim = prim.GetPrimInPrototype()
+        return (
+            parent is not None
+            and self.nodes[parent].usd_path == usd_path.GetParentPath()
+            and prim.GetParent().IsInstance()
+            and prototype_prim.GetName() == PROTOTYPE_GEOMETRY_NAME
+            and prototype_prim.GetParent().GetAllChildrenNames() == [PROTOTYPE_GEOMETRY_NAME]
+            and not UsdGeom.Xformable(prototype_prim).GetOrderedXformOps()
+        )
+
+    def _open_stage(self, file_path, prim_paths=None, placeholders: bool = False):
+        """
+        Opens the stage. A full import loads every payload. A partial import opens with
+        Usd.Stage.LoadNone and loads only the payloads at or below prim_paths.
 
+        Args:
+            file_path (str): The USD file.
+            prim_paths (list[str | Sdf.Path], optional): Only populate these prims, their ancestors and descendants.
+            placeholders (bool, optional): Populate the whole hierarchy without a mask, so the branches
+                that are not imported can become placeholders. Defaults to False.
+        """
+        self.usd_file = file_path
+        self.prim_paths = [Sdf.Path(str(path)) for path in prim_paths or []]
+        self.placeholders = placeholders
 
-    def _open_stage(self, file_path):
-        self.stage = Usd.Stage.Open(file_path)
+        load = Usd.Stage.LoadNone if self.prim_paths or placeholders else Usd.Stage.LoadAll
+        if self.prim_paths and not placeholders:
+            mask = Usd.StagePopulationMask()
+            for path in self.prim_paths:
+                mask.Add(path)
+            self.stage = Usd.Stage.OpenMasked(file_path, mask, load)
+        else:
+            self.stage = Usd.Stage.Open(file_path, load)
         if not self.stage:
             raise ValueError(f"Failed to open USD stage: {file_path}")
 
+        if self.prim_paths:
+            self.stage.LoadAndUnload(set(self.prim_paths), set())
+
+    def _is_requested(self, path: Sdf.Path) -> bool:
+        return not self.prim_paths or any(path.HasPrefix(p) or p.HasPrefix(path) for p in self.prim_paths)
+
+    def _needs_placeholder(self, prim: Usd.Prim) -> bool:
+        if not self.placeholders or prim.IsPseudoRoot():
+            return False
+        unloaded = prim.HasAuthoredPayloads() and not prim.IsLoaded()
+        return unloaded or not self._is_requested(prim.GetPath())
 
-    def _traverse_prim(self, prim, parent):
+
+    def _get_children(self, prim):
+        # Instanced prims only expose their children as instance proxies
+        predicate = Usd.PrimIsActive & Usd.PrimIsDefined & ~Usd.PrimIsAbstract
+        if not self.placeholders:
+            predicate = predicate & Usd.PrimIsLoaded
+        # Without the loaded term, unloaded payloads are walked and become placeholders
+        return prim.GetFilteredChildren(Usd.TraverseInstanceProxies(predicate))
+
+    def _traverse_prim(self, prim, parent, usd_path: Sdf.Path | None = None):
+        """
+        Plans the nodes for prim and its descendants.
+
+        Args:
+            prim (Usd.Prim): The prim to plan.
+            parent (int | None): Index of the planned parent node, None for the top level.
+            usd_path (Sdf.Path | None, optional): The path stored on the node, which an update import
+                matches nodes by. It is the prim path, holding the variant selections the prim is
+                planned under, e.g. /asset{modelVariant=high}geo. Defaults to the prim path.
+        """
         if not prim.IsValid():
             return
-        dag_node = self._process_node(prim, parent)
+        usd_path = usd_path or prim.GetPath()
+        if self._needs_placeholder(prim):
+            # Placeholders keep the plain prim path, expand_placeholder loads it from the stage
+            data = self._queue_read(self.placeholder, prim, usd_path)
+            return self._plan_node(prim.GetName(), parent, prim.GetPath(), self.placeholder, data)
+        dag_node = parent if prim.IsPseudoRoot() else self._process_node(prim, parent, usd_path)
 
         variant_sets = prim.GetVariantSets()
         variant_set_names = variant_sets.GetNames()
+        if not variant_set_names:
+            for child in self._get_children(prim):
+                self._traverse_prim(child, dag_node, usd_path.AppendChild(child.GetName()))
+            return dag_node
 
+        # With variant sets, the children are only placed under each variant group
         for variant_set_name in variant_set_names:
             variant_set = variant_sets.GetVariantSet(variant_set_name)
-            original_variant = variant_set.GetVariantSelection()
+            variant_set_node = self._plan_node(
+                variant_set_name, dag_node, usd_path.AppendVariantSelection(variant_set_name, ""), type_attribute="VariantSet"
+            )
+            variant_paths = {variant: usd_path.AppendVariantSelection(variant_set_name, variant) for variant in variant_set.GetVariantNames()}
+            variant_nodes = {
+                variant: self._plan_node(variant, variant_set_node, variant_path, type_attribute="Variant")
+                for variant, variant_path in variant_paths.items()
+            }
 
-            for variant in variant_set.GetVariantNames():
-                variant_set.SetVariantSelection(variant)
-                print(f"  -> Traversing VariantSet '{variant_set_name}' with Variant '{variant}'")
+            # Walk the variant that is already composed first, it needs no recomposition
+            selection = variant_set.GetVariantSelection()
+            walk_order = sorted(variant_nodes, key=lambda variant: variant != selection)
+            with self._session_variant_selections(prim.GetPath(), variant_set_name) as select_variant:
+                for variant in walk_order:
+                    if variant != selection:
+                        select_variant(variant)
+                        selection = variant
+                    logger.debug("Traversing VariantSet '%s' with Variant '%s'", variant_set_name, variant)
 
-                new_dag_node = self._add_variant(dag_node, variant_set.GetName(), variant)
-                for child in prim.GetChildren():
-                    self._traverse_prim(child, new_dag_node)
+                    for child in self._get_children(prim):
+                        self._traverse_prim(child, variant_nodes[variant], variant_paths[variant].AppendChild(child.GetName()))
 
-            variant_set.SetVariantSelection(original_variant)
+        return dag_node
 
-        else:
-            for child in prim.GetChildren():
-                self._traverse_prim(child, dag_node)
+    @contextmanager
+    def _session_variant_selections(self, prim_path: Sdf.Path, variant_set_name: str):
+        """
+        Yields a function that selects a variant of the set by authoring the selection on the
+        stage's session layer. The layers of the file are never edited, and the session
+        layer is restored once the block exits, including removing the over specs authored
+        to hold the selection. Reads queued before an edit finish first, so they see the
+        composition they were queued under.
 
-        return dag_node
+        Args:
+            prim_path (Sdf.Path): Path of the prim holding the variant set.
+            variant_set_name (str): Name of the variant set.
+        """
+        session_layer = self.stage.GetSessionLayer()
+        prim_spec = session_layer.GetPrimAtPath(prim_path)
+        original = prim_spec.variantSelections.get(variant_set_name) if prim_spec else None
+        created_paths = []
+        edited = False
 
-    def _add_variant(self, dag_node, variant_set, variant):
-        if not cmds.objExists(f"{dag_node}|{variant_set}"):
-            variant_set = create_variant_set(variant_set, parent=dag_node)
-        else:
-            variant_set = f"{dag_node}|{variant_set}"
+        def select_variant(variant: str) -> None:
+            nonlocal prim_spec, edited
+            self._wait_for_reads()
+            with Sdf.ChangeBlock():
+                if prim_spec is None:
+                    created_paths.extend(path for path in prim_path.GetPrefixes() if not session_layer.GetPrimAtPath(path))
+                    prim_spec = Sdf.CreatePrimInLayer(session_layer, prim_path)
+                prim_spec.variantSelections[variant_set_name] = variant
+            edited = True
+
+        try:
+            yield select_variant
+        finally:
+            if edited:
+                self._wait_for_reads()
+                with Sdf.ChangeBlock():
+                    if original is None:
+                        del prim_spec.variantSelections[variant_set_name]
+                    else:
+                        prim_spec.variantSelections[variant_set_name] = original
+                    # Deepest first, every created over is inert once its children are gone
+                    for path in reversed(created_paths):
+                        session_layer.ScheduleRemoveIfInert(session_layer.GetPrimAtPath(path))
+
+    def _find_existing_nodes(self, parent: om.MObject) -> dict[str, om.MObject]:
+        """
+        Finds the transforms an earlier import of the planned prims built under parent.
+
+        Args:
+            parent (om.MObject): Parent of the top level nodes, or om.MObject.kNullObj for the world.
+
+        Returns:
+            dict[str, om.MObject]: The transforms, keyed by the USD path stored on them.
+        """
+        root_paths = [node.usd_path for node in self.nodes if node.parent is None]
+        dag_iter = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kTransform)
+        if not parent.isNull():
+            dag_iter.reset(parent, om.MItDag.kDepthFirst, om.MFn.kTransform)
+
+        existing = {}
+        while not dag_iter.isDone():
+            node_fn = om.MFnDependencyNode(dag_iter.currentItem())
+            if node_fn.hasAttribute(SOURCE_PRIM_ATTRIBUTE):
+                usd_path = Sdf.Path(node_fn.findPlug(SOURCE_PRIM_ATTRIBUTE, False).asString())
+                # A partial update leaves the branches it did not read alone
+                in_scope = any(usd_path.HasPrefix(root_path) for root_path in root_paths) and (
+                    not self.prim_paths or any(usd_path.StripAllVariantSelections().HasPrefix(p) for p in self.prim_paths)
+                )
+                if in_scope:
+                    existing[str(usd_path)] = dag_iter.currentItem()
+            dag_iter.next()
+        return existing
+
+    def _match_node(self, node: PlannedNode, existing: dict[str, om.MObject]) -> om.MObject | None:
+        mobject = existing.get(str(node.usd_path))
+        if mobject is None and node.uuid:
+            # Exported with store_uuids, the node may have been renamed or moved since
+            try:
+                mobject = get_dagpath_from_uuid(node.uuid).node()
+            except RuntimeError:
+                return None
+        return mobject
+
+    def _update_node(self, dag_mod: om.MDagModifier, node: PlannedNode, mobject: om.MObject, parent: om.MObject) -> bool:
+        """
+        Queues the edits that bring an existing node up to date, reparenting and renaming it when needed.
+
+        Returns:
+            bool: False when the node has to be rebuilt instead.
+        """
+        was_placeholder = om.MFnDependencyNode(mobject).hasAttribute(SOURCE_FILE_ATTRIBUTE)
+        if was_placeholder and node.handler is not self.placeholder:
+            return False
+        if node.handler is None:
+            # Groups only hold other nodes
+            if get_shape(mobject) is not None:
+                return False
+        elif not node.handler.update_node(dag_mod, mobject, node.data, node.name):
+            return False
+
+        dag_fn = om.MFnDagNode(mobject)
+        current_parent = dag_fn.parent(0)
+        if current_parent.hasFn(om.MFn.kWorld) != parent.isNull() or (not parent.isNull() and current_parent != parent):
+            dag_mod.reparentNode(mobject, parent)
+        if dag_fn.name() != node.name:
+            dag_mod.renameNode(mobject, node.name)
+        node.mobject = mobject
+        node.existing = True
+        return True
+
+    def _delete_unmatched(self, dag_mod: om.MDagModifier, existing: dict[str, om.MObject], matched: set[int]) -> int:
+        unmatched = [mobject for mobject in existing.values() if om.MObjectHandle(mobject).hashCode() not in matched]
+        unmatched_handles = {om.MObjectHandle(mobject).hashCode() for mobject in unmatched}
+        for mobject in unmatched:
+            # Deleting a node deletes its children with it
+            if om.MObjectHandle(om.MFnDagNode(mobject).parent(0)).hashCode() not in unmatched_handles:
+                dag_mod.deleteNode(mobject)
+        self.instrumentation.count("deleted", len(unmatched))
+        return len(unmatched)
+
+    def _build_nodes(self, parent: om.MObject, existing: dict[str, om.MObject] | None = None) -> None:
+        """
+        Queues every planned node on one om.MDagModifier and runs it as a single command. The
+        edits the handlers queued, such as local matrices, are done right after, in the same command.
+
+        Args:
+            parent (om.MObject): Parent of the top level nodes, or om.MObject.kNullObj for the world.
+            existing (dict[str, om.MObject] | None, optional): Nodes of an earlier import, by USD path.
+                Matching nodes are updated in place instead of created, and the others are deleted.
+        """
+        dag_mod = om.MDagModifier()
+        self.edits = []
+        matched = set()
+        for node in self.nodes:
+            node_parent = parent if node.parent is None else self.nodes[node.parent].mobject
+            if node.in_parent:
+                # The parent's transform keeps its own prim path, the shape stores none
+                source = None if node.instance_of is None else self.nodes[node.instance_of].mobject
+                node.mobject = node.handler.build_instance_shape(dag_mod, node.data, node_parent, self.nodes[node.parent].name, source)
+                continue
+            mobject = self._match_node(node, existing) if existing else None
+            handle = om.MObjectHandle(mobject).hashCode() if mobject is not None else None
+            if handle is not None and handle not in matched and self._update_node(dag_mod, node, mobject, node_parent):
+                matched.add(handle)
+                continue
+
+            if node.handler is None:
+                node.mobject = dag_mod.createNode("transform", node_parent)
+                dag_mod.renameNode(node.mobject, node.name)
+            elif node.instance_of is not None:
+                source = self.nodes[node.instance_of].mobject
+                node.mobject = node.handler.build_instance(dag_mod, node.data, node_parent, node.name, source)
+            else:
+                node.mobject = node.handler.build_node(dag_mod, node.data, node_parent, node.name)
+            self.edits.append(SetStringAttribute(node.mobject, SOURCE_PRIM_ATTRIBUTE, str(node.usd_path)))
+
+        if existing:
+            self.instrumentation.count("updated", len(matched))
+            if self._delete_unmatched(dag_mod, existing, matched):
+                # A node may take the name of a deleted sibling, which is only free once it is gone
+                for node in self.nodes:
+                    if not node.in_parent:
+                        dag_mod.renameNode(node.mobject, node.name)
+        with self.instrumentation.phase("apply"):
+            apply_modifier(dag_mod, self.edits)
+        self.edits = []
+
+    def _finalize_nodes(self) -> list[str]:
+        """
+        Tags the new nodes with their USD type and assigns shading in one call per shading group.
+        Updated nodes keep their attributes and shading assignments.
+
+        Returns:
+            list[str]: Full paths of the top level nodes.
+        """
+        top_level = []
+        shading_groups = defaultdict(list)
+        for node in self.nodes:
+            path = om.MDagPath.getAPathTo(node.mobject).fullPathName()
+            if node.parent is None:
+                top_level.append(path)
+            if node.existing:
+                continue
+            if node.type_attribute:
+                add_type_attribute(path, node.type_attribute)
+            if node.handler is not None:
+                node.handler.finalize_node(path, node.data)
+            if node.handler is not None and node.handler.shading_group and node.data is not None:
+                shading_groups[node.handler.shading_group].append(path)
+
+        for shading_group, members in shading_groups.items():
+            cmds.sets(members, edit=True, forceElement=shading_group)
+        return top_level
+
+
+    def _build_planned(self, parent, replaced: str | None = None, update: bool = False) -> list[str]:
+        """
+        Builds the planned nodes as a single undo chunk.
+
+        Args:
+            parent (str | None): Parent of the top level nodes. Defaults to the world.
+            replaced (str | None, optional): A node to delete in the same undo chunk, before building.
+            update (bool, optional): Update the nodes an earlier import built under parent in place.
+
+        Returns:
+            list[str]: Full paths of the top level nodes.
+        """
+        parent_obj = get_mobject_from_name(parent) if parent else om.MObject.kNullObj
+        cmds.undoInfo(openChunk=True, chunkName="jk_maya_usd import")
+        try:
+            if replaced:
+                cmds.delete(replaced)
+            existing = self._find_existing_nodes(parent_obj) if update else None
+            self._build_nodes(parent_obj, existing)
+            with self.instrumentation.phase("finalize"):
+                return self._finalize_nodes()
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    def _run(
+        self,
+        name: str,
+        profile: bool,
+        usd_file: str,
+        root_path: Sdf.Path | None,
+        parent,
+        prim_paths=None,
+        placeholders: bool = False,
+        replaced: str | None = None,
+        update: bool = False,
+        max_workers: int | None = None) -> list[str]:
+        """Opens, plans and builds one import, timing each phase into a new self.instrumentation."""
+        self.instrumentation = Instrumentation(name, profile).start()
+        try:
+            with self.instrumentation.phase("open"):
+                self._open_stage(usd_file, prim_paths, placeholders)
+            self.nodes = []
+            self.prototype_nodes = {}
+            if self.mesh_cache is not None:
+                self.stage_signature = stage_signature(self.stage)
+            with self.instrumentation.phase("plan"), self._reading(max_workers):
+                root = self.stage.GetPseudoRoot() if root_path is None else self.stage.GetPrimAtPath(root_path)
+                self._traverse_prim(root, None)
+            self.instrumentation.count("nodes", len(self.nodes))
+            return self._build_planned(parent, replaced, update)
+        finally:
+            self.instrumentation.stop()
+            logger.info("%s", self.instrumentation)
+
+    def import_from_usd(
+        self,
+        usd_file,
+        top_dag_node: str = "",
+        parent =None,
+        prim_paths=None,
+        placeholders: bool = False,
+        update: bool = False,
+        max_workers: int | None = None,
+        profile: bool = False):
+        """
+        Imports a USD file, or only some of its branches.
+
+        Args:
+            usd_file (str): The USD file.
+            top_dag_node (str, optional): Parent of the imported nodes when parent is not given. Defaults to the world.
+            parent (str | None, optional): Parent of the imported nodes. Defaults to top_dag_node.
+            prim_paths (list[str], optional): Only import these prims and their descendants, plus their
+                ancestors to keep the hierarchy. Payloads elsewhere are never loaded.
+            placeholders (bool, optional): Replace the branches that are not imported, and every unloaded
+                payload, with a bounding box placeholder that expand_placeholder can load later.
+            update (bool, optional): Update the nodes an earlier import built under parent instead of
+                building new ones. Nodes are matched by the USD path stored on them, or by the UUID the
+                exporter stored with store_uuids. When the topology is unchanged only the points, UVs,
+                colors and transforms that differ are set. Nodes are only created for new prims and
+                deleted for removed ones, so shading assignments and edits elsewhere survive. Defaults to False.
+            max_workers (int | None, optional): Threads reading and converting the prims while the stage is
+                walked. 1 reads on the calling thread. Defaults to the ThreadPoolExecutor default.
+            profile (bool, optional): Capture the import with cProfile into the report. Defaults to False.
 
-        if not cmds.objExists(f"{variant_set}|{variant}"):
-            variant = create_variant(variant, variant_set)
+        The time per phase and prim class and the number of prims and points read are
+        kept in self.instrumentation, and the summary is logged at INFO.
 
-        return f"{variant_set}|{variant}"
+        Returns:
+            list[str]: Full paths of the top level nodes.
+        """
+        return self._run(
+            f"Import {usd_file}", profile, usd_file, None, parent or top_dag_node or None, prim_paths, placeholders, update=update, max_workers=max_workers
+        )
 
+    def expand_placeholder(self, node: str) -> list[str]:
+        """
+        Replaces a placeholder with the branch it stands in for, loading only that branch.
 
-    def import_from_usd(self, usd_file, top_dag_node: str = "", parent =None):
-        self._open_stage(usd_file)
-        self.temporary_dead_zone = create_group("temporary_dead_zone")
+        Args:
+            node (str): The placeholder transform.
 
-        dag_node = self._traverse_prim(self.stage.GetPseudoRoot(), parent)
+        Returns:
+            list[str]: Full paths of the top level nodes of the branch.
+        """
+        usd_file = cmds.getAttr(f"{node}.{SOURCE_FILE_ATTRIBUTE}")
+        usd_path = cmds.getAttr(f"{node}.{SOURCE_PRIM_ATTRIBUTE}")
+        parent = (cmds.listRelatives(node, parent=True, fullPath=True) or [None])[0]
 
-        cmds.delete(self.temporary_dead_zone)
-        
-        return dag_node
\ No newline at end of file
+        return self._run(f"Expand {usd_path}", False, usd_file, Sdf.Path(usd_path), parent, [usd_path], replaced=node)
@@ -0,0 +1,72 @@
+""" Dedupe identical meshes into shared prototypes referenced by instanceable prims """
+
+from maya.api import OpenMaya as om
+from pxr import Sdf
+
+from jk_maya_usd import array_bridge
+from jk_maya_usd.constants import PROTOTYPES_ROOT, PROTOTYPE_GEOMETRY_NAME
+from jk_maya_usd.prims.mesh import Mesh
+from jk_maya_usd.prims.xform import TRANSFORM_OP, add_xform_ops
+from jk_maya_usd.usd_utilities import PrimData, hash_prim_data
+
+
+class MeshInstancer:
+    """
+    Fingerprints the object space data of every exported mesh. The first
+    occurrence is authored once as a prototype under PROTOTYPES_ROOT, and every
+    occurrence becomes an instanceable Xform that references it and carries
+    the mesh transform's local matrix.
+
+    Maya instances (several DAG paths to one shape) are recognised by their
+    shape node and are not extracted again.
+    """
+    def __init__(self, processor):
+        self.processor = processor
+        self.prototypes: dict[str, Sdf.Path] = {}
+        self._shape_fingerprints: dict[int, str] = {}
+
+    def _get_prototype(self, writer, dag_node: str, name: str, shape: om.MObject) -> Sdf.Path:
+        shape_key = om.MObjectHandle(shape).hashCode()
+        fingerprint = self._shape_fingerprints.get(shape_key)
+        if fingerprint in self.prototypes:
+            return self.prototypes[fingerprint]
+
+        mesh = Mesh(self.processor, xform_ops=False)
+        mesh_data = mesh.extract_node(dag_node)
+        fingerprint = hash_prim_data(mesh_data)
+        self._shape_fingerprints[shape_key] = fingerprint
+        if fingerprint in self.prototypes:
+            return self.prototypes[fingerprint]
+
+        prototypes_root = Sdf.Path(PROTOTYPES_ROOT)
+        if not self.prototypes:
+            writer.define_prim(prototypes_root, PrimData("Scope", specifier=Sdf.SpecifierClass))
+
+        prototype_path = prototypes_root.AppendChild(f"{name}_{len(self.prototypes)}")
+        writer.define_prim(prototype_path, PrimData("Xform"))
+        geometry_path = prototype_path.AppendChild(PROTOTYPE_GEOMETRY_NAME)
+        mesh.compact(mesh_data, geometry_path)
+        writer.define_prim(geometry_path, mesh_data)
+        self.prototypes[fingerprint] = prototype_path
+        return prototype_path
+
+    def export_instance(self, writer, dag_node: str, target: Sdf.Path) -> PrimData:
+        """
+        Authors the mesh at dag_node as an instance of a shared prototype.
+
+        Args:
+            writer: The StageWriter or LayerWriter of the export.
+            dag_node (str): Full path of the mesh transform.
+            target (Sdf.Path): Path of the instance prim.
+
+        Returns:
+            PrimData: The instance prim that was authored.
+        """
+        scene_node = self.processor.scene_index[dag_node]
+        prototype_path = self._get_prototype(writer, dag_node, scene_node.name, scene_node.shape_path.node())
+
+        local_matrix = om.MFnTransform(scene_node.dag_path).transformation().asMatrix()
+        instance_data = PrimData("Xform", references=[prototype_path], instanceable=True)
+        add_xform_ops(instance_data, {TRANSFORM_OP: array_bridge.matrix_to_gf(local_matrix)})
+        writer.define_prim(target, instance_data)
+        return instance_data
@@ -0,0 +1,135 @@
+""" Phase timers, counters, optional cProfile capture and logging for exports and imports """
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+LOGGER_NAME = "jk_maya_usd"
+
+
+def set_log_level(level: int | str = logging.INFO) -> logging.Logger:
+    """
+    Sets the level of the package logger, adding a stream handler the first time.
+    Per node messages are logged at DEBUG, summaries at INFO.
+
+    Args:
+        level (int | str, optional): A logging level. Defaults to logging.INFO.
+
+    Returns:
+        logging.Logger: The package logger.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(name)s %(levelname)s: %(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
+
+
+class Instrumentation:
+    """
+    Collects the time spent in each phase of a run, in total and per prim class,
+    and counts what was processed. With profile, the whole run is also captured
+    with cProfile. A disabled instance records nothing. Phases and counters may be
+    recorded from worker threads, their times add up across threads.
+    """
+    def __init__(self, name: str = "", profile: bool = False, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.phases: dict[str, float] = defaultdict(float)
+        self.prim_phases: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.counters: dict[str, int] = defaultdict(int)
+        self.total = 0.0
+        self.profile_stats: str | None = None
+        self._profiler = cProfile.Profile() if profile and enabled else None
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self) -> "Instrumentation":
+        self._start = time.perf_counter()
+        if self._profiler:
+            self._profiler.enable()
+        return self
+
+    def stop(self) -> "Instrumentation":
+        if self._profiler:
+            self._profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(25)
+            self.profile_stats = stream.getvalue()
+            self._profiler = None
+        if self._start is not None:
+            self.total = time.perf_counter() - self._start
+            self._start = None
+        return self
+
+    @contextmanager
+    def phase(self, name: str, prim_class: str | None = None):
+        """
+        Times the block into the phase, and into the phase of prim_class when given.
+
+        Args:
+            name (str): The phase, e.g. 'extract', 'author' or 'save'.
+            prim_class (str | None, optional): The prim class doing the work. Defaults to None.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] += elapsed
+                if prim_class:
+                    self.prim_phases[prim_class][name] += elapsed
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Adds time measured elsewhere, e.g. in a worker thread, to a phase."""
+        if self.enabled:
+            with self._lock:
+                self.phases[name] += seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "total_s": self.total,
+            "phases_s": dict(self.phases),
+            "prim_phases_s": {prim_class: dict(phases) for prim_class, phases in self.prim_phases.items()},
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self) -> str:
+        return self.report()
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: A readable summary of the run, followed by the profile when one was captured.
+        """
+        lines = [f"{self.name}: {self.total:.3f}s"]
+        for name, seconds in sorted(self.phases.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<12}{seconds:9.3f}s")
+        for prim_class, phases in sorted(self.prim_phases.items()):
+            lines.append(f"  {prim_class}: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in phases.items()))
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name} {value}" for name, value in sorted(self.counters.items())))
+        if self.profile_stats:
+            lines.extend(["", self.profile_stats])
+        return "\n".join(lines)
+
+
+# Used by prim handlers whose processor is not instrumented
+DISABLED = Instrumentation(enabled=False)
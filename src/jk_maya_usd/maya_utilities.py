@@ -24,6 +24,16 @@ def get_scene_scale() -> float:
 
 
 
+def get_frames_per_second() -> float:
+    """
+    Returns the frame rate of the scene's time unit.
+
+    Returns:
+        float: Frames per second.
+    """
+    return om.MTime(1.0, om.MTime.kSeconds).asUnits(om.MTime.uiUnit())
+
+
 def get_mesh_fn_from_dag(dag_node: str) -> om.MFnMesh:
     """
     Returns an MFnMesh function set from the given DAG node name.
@@ -56,6 +66,19 @@ def get_mobject_from_name(name: str) -> om.MObject:
     return sel.getDependNode(0)
 
 
+def get_full_paths(nodes: list[str]) -> set[str]:
+    """
+    Returns the full DAG paths of the given nodes.
+
+    Args:
+        nodes (list[str]): Node names or partial paths.
+
+    Returns:
+        set[str]: Their full paths, the form the scene index uses.
+    """
+    return set(cmds.ls(nodes, long=True)) if nodes else set()
+
+
 def create_transform(name, parent):
     """Create a new transform under the given parent. Useful for running into Prims"""
     dag_mod = om.MDagModifier()
@@ -63,6 +86,24 @@ def create_transform(name, parent):
     dag_mod.renameNode(transform_obj, name)
     dag_mod.doIt()
     return transform_obj
+
+
+def get_shape(transform: om.MObject) -> om.MObject | None:
+    """
+    Returns the first shape under a transform that is not an intermediate object.
+
+    Args:
+        transform (om.MObject): The transform.
+
+    Returns:
+        om.MObject | None: The shape, or None when the transform has none.
+    """
+    transform_fn = om.MFnDagNode(transform)
+    for index in range(transform_fn.childCount()):
+        child = transform_fn.child(index)
+        if child.hasFn(om.MFn.kShape) and not om.MFnDagNode(child).isIntermediateObject:
+            return child
+    return None
     
 def get_up_axis() -> str:
     """
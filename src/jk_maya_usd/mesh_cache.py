@@ -0,0 +1,163 @@
+""" In-memory and on-disk LRU cache of mesh buffers read from USD, for repeated imports """
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+
+import numpy as np
+from pxr import Gf, Usd
+
+from jk_maya_usd.prims.mesh import MeshBuffers
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "jk_maya_usd_mesh_cache")
+
+
+def stage_signature(stage: Usd.Stage) -> str:
+    """
+    Returns a hash of the identifier and modification time of every file layer the stage uses,
+    so cached buffers are not reused once any of those layers changed on disk.
+
+    Args:
+        stage (Usd.Stage): The opened stage.
+
+    Returns:
+        str: Hex digest of the used layers.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for layer in sorted(stage.GetUsedLayers(), key=lambda layer: layer.identifier):
+        # The session layer is anonymous and only holds this import's variant selections
+        if layer.anonymous:
+            continue
+        modified = os.path.getmtime(layer.realPath) if layer.realPath and os.path.exists(layer.realPath) else 0.0
+        digest.update(f"{layer.identifier}:{modified}".encode())
+    return digest.hexdigest()
+
+
+def _buffers_nbytes(buffers: MeshBuffers) -> int:
+    return sum(getattr(value, "nbytes", 0) for value in vars(buffers).values())
+
+
+def _to_arrays(buffers: MeshBuffers) -> dict[str, np.ndarray]:
+    arrays = {}
+    for field in fields(MeshBuffers):
+        value = getattr(buffers, field.name)
+        if value is not None:
+            arrays[field.name] = np.array(value) if isinstance(value, Gf.Matrix4d) else np.asarray(value)
+    return arrays
+
+
+def _from_arrays(arrays) -> MeshBuffers:
+    values = {name: arrays[name] for name in arrays.files}
+    if "matrix" in values:
+        values["matrix"] = Gf.Matrix4d(values["matrix"].tolist())
+    if "color_interpolation" in values:
+        values["color_interpolation"] = str(values["color_interpolation"])
+    if "color_has_alpha" in values:
+        values["color_has_alpha"] = bool(values["color_has_alpha"])
+    return MeshBuffers(**values)
+
+
+class MeshCache:
+    """
+    Keeps the MeshBuffers of imported meshes, keyed by the stage signature and the prim path,
+    so importing the same published asset again skips reading and converting its meshes.
+    The most recently used buffers are kept in memory, and every entry is also written to
+    directory as an .npz file. Both are trimmed to their size limit, least recently used first.
+    It can be used from the import's read threads.
+    """
+    def __init__(self, directory: str | None = DEFAULT_CACHE_DIRECTORY, memory_limit_mb: float = 512, disk_limit_mb: float = 4096):
+        self.directory = directory
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self.disk_limit = disk_limit_mb * 1024 * 1024
+        self._memory: OrderedDict[str, MeshBuffers] = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(signature: str, usd_path) -> str:
+        return hashlib.blake2b(f"{signature}:{usd_path}".encode(), digest_size=16).hexdigest()
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key: str) -> MeshBuffers | None:
+        with self._lock:
+            buffers = self._memory.get(key)
+            if buffers is not None:
+                self._memory.move_to_end(key)
+                return buffers
+        if not self.directory:
+            return None
+
+        file_path = self._file_path(key)
+        try:
+            with np.load(file_path, allow_pickle=False) as arrays:
+                buffers = _from_arrays(arrays)
+            # The modification time orders the files for eviction
+            os.utime(file_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(key, buffers)
+        return buffers
+
+    def put(self, key: str, buffers: MeshBuffers) -> None:
+        self._remember(key, buffers)
+        if not self.directory:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_path = self._file_path(key)
+        # Written under a temporary name, so a cache read never sees half a file
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez(file, **_to_arrays(buffers))
+        try:
+            replaced = os.path.getsize(file_path)
+        except OSError:
+            replaced = 0
+        os.replace(temp_path, file_path)
+        self._trim_disk(os.path.getsize(file_path) - replaced)
+
+    def clear(self) -> None:
+        """Empties the memory cache and deletes every cached file."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            for file_path in self._cached_files():
+                os.remove(file_path)
+            self._disk_size = 0
+
+    def _remember(self, key: str, buffers: MeshBuffers) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= _buffers_nbytes(self._memory.pop(key))
+            self._memory[key] = buffers
+            self._memory_size += _buffers_nbytes(buffers)
+            while self._memory_size > self.memory_limit and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= _buffers_nbytes(evicted)
+
+    def _cached_files(self) -> list[str]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return [entry.path for entry in os.scandir(self.directory) if entry.name.endswith(".npz")]
+
+    def _trim_disk(self, added: int) -> None:
+        """Adds the change in size of the cached files, then evicts the oldest files while over the limit."""
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(os.path.getsize(file_path) for file_path in self._cached_files())
+            else:
+                self._disk_size += added
+            if self._disk_size <= self.disk_limit:
+                return
+
+            for file_path in sorted(self._cached_files(), key=os.path.getmtime):
+                if self._disk_size <= self.disk_limit:
+                    break
+                self._disk_size -= os.path.getsize(file_path)
+                os.remove(file_path)
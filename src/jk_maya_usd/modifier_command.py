@@ -0,0 +1,132 @@
+""" Command plugin that runs a prepared om.MDagModifier as one undoable Maya command """
+
+from maya import cmds
+from maya.api import OpenMaya as om
+
+from jk_maya_usd.maya_utilities import get_shape
+
+COMMAND_NAME = "jkUsdApplyModifier"
+
+
+class SetTransformation:
+    """ Sets the transformation of a transform with one MFnTransform call, keeping the previous one for undo """
+    def __init__(self, transform: om.MObject, transformation: om.MTransformationMatrix):
+        self.transform = transform
+        self.transformation = transformation
+        self.previous = None
+
+    def do(self) -> None:
+        transform_fn = om.MFnTransform(self.transform)
+        self.previous = transform_fn.transformation()
+        transform_fn.setTransformation(self.transformation)
+
+    def undo(self) -> None:
+        om.MFnTransform(self.transform).setTransformation(self.previous)
+
+
+class SetStringAttribute:
+    """
+    Stores a string on a dynamic attribute, adding the attribute when the node lacks it, and
+    keeps the previous value for undo. Undo removes the attribute again when do added it.
+    """
+    def __init__(self, node: om.MObject, attribute: str, value: str):
+        self.node = node
+        self.attribute = attribute
+        self.value = value
+        self.previous = None
+        self.added = False
+
+    def do(self) -> None:
+        node_fn = om.MFnDependencyNode(self.node)
+        self.added = not node_fn.hasAttribute(self.attribute)
+        if self.added:
+            node_fn.addAttribute(om.MFnTypedAttribute().create(self.attribute, self.attribute, om.MFnData.kString))
+        else:
+            self.previous = node_fn.findPlug(self.attribute, False).asString()
+        node_fn.findPlug(self.attribute, False).setString(self.value)
+
+    def undo(self) -> None:
+        node_fn = om.MFnDependencyNode(self.node)
+        if self.added:
+            node_fn.removeAttribute(node_fn.attribute(self.attribute))
+        else:
+            node_fn.findPlug(self.attribute, False).setString(self.previous)
+
+
+class AddInstance:
+    """ Adds the shape of source under transform as another instance, once the modifier created both """
+    def __init__(self, source: om.MObject, transform: om.MObject):
+        self.source = source
+        self.transform = transform
+        self.shape = None
+
+    def do(self) -> None:
+        self.shape = get_shape(self.source)
+        if self.shape is not None:
+            om.MFnDagNode(self.transform).addChild(self.shape, om.MFnDagNode.kNextPos, True)
+
+    def undo(self) -> None:
+        if self.shape is not None:
+            om.MFnDagNode(self.transform).removeChild(self.shape)
+
+
+PENDING_MODIFIERS: list[tuple[om.MDagModifier, list]] = []
+
+
+def maya_useNewAPI():
+    """Tells Maya this plugin uses the Python API 2.0."""
+    pass
+
+
+class ApplyModifierCommand(om.MPxCommand):
+    """ Runs the most recently queued modifier and its edits, and keeps them for undo and redo """
+    def __init__(self):
+        super().__init__()
+        self.modifier = None
+        self.edits = []
+
+    @staticmethod
+    def creator():
+        return ApplyModifierCommand()
+
+    def doIt(self, args):
+        # Maya loads the plugin file as its own module, so read the queue of the package module
+        from jk_maya_usd import modifier_command
+        self.modifier, self.edits = modifier_command.PENDING_MODIFIERS.pop()
+        self.redoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+        for edit in self.edits:
+            edit.do()
+
+    def undoIt(self):
+        for edit in reversed(self.edits):
+            edit.undo()
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin).registerCommand(COMMAND_NAME, ApplyModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
+
+
+def apply_modifier(modifier: om.MDagModifier, edits: list | None = None) -> None:
+    """
+    Runs the modifier through the plugin command so a single undo reverts all of its edits.
+
+    Args:
+        modifier (om.MDagModifier): The modifier to run. Its edits are queued but not yet done.
+        edits (list, optional): Edits the modifier can not queue, such as SetTransformation and
+            SetStringAttribute. They are done in order once the modifier ran, and undone before it.
+    """
+    if not cmds.pluginInfo(__file__, query=True, loaded=True):
+        cmds.loadPlugin(__file__, quiet=True)
+    PENDING_MODIFIERS.append((modifier, list(edits or [])))
+    getattr(cmds, COMMAND_NAME)()
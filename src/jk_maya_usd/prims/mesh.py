@@ -1,193 +1,601 @@
-from pxr import UsdGeom, Vt, Sdf, Gf, Usd
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+from pxr import UsdGeom, Vt, Sdf, Gf, Tf, Usd
 from maya.api import OpenMaya as om
-from maya import cmds
 
 from jk_maya_usd.prims.primbase import PrimBase
-from jk_maya_usd.maya_utilities import get_dagpath_from_uuid, get_mesh_fn_from_dag
+from jk_maya_usd.prims.xform import Xform, add_xform_ops, read_local_matrix, queue_local_matrix, update_local_matrix
+from jk_maya_usd import array_bridge
+from jk_maya_usd.maya_utilities import get_shape
+from jk_maya_usd.modifier_command import AddInstance
+from jk_maya_usd.primvars import index_assigned_values, index_values, reduce_interpolation, to_face_varying_indices
+from jk_maya_usd.usd_utilities import PrimData
+from jk_maya_usd.constants import DISPLAY_COLOR_SET
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MeshBuffers:
+    """ Mesh data read from a USD Mesh prim, as contiguous arrays ready to hand to Maya """
+    points: np.ndarray
+    face_counts: np.ndarray
+    face_indices: np.ndarray
+    uvs: np.ndarray | None = None
+    uv_indices: np.ndarray | None = None
+    colors: np.ndarray | None = None
+    color_interpolation: str | None = None
+    color_has_alpha: bool = False
+    matrix: Gf.Matrix4d | None = None
 
 
 class Mesh(PrimBase):
+    shading_group = "initialShadingGroup"
+    animatable = True
+
+    def __init__(self, processor, space=om.MSpace.kObject, xform_ops: bool = True):
+        super().__init__(processor)
+        self.space = space
+        # Object space points need the transform's ops, world space points already hold them
+        self.xform_ops = xform_ops and space == om.MSpace.kObject
+
     def get_material(self, prim):
         binding = UsdShade.MaterialBindingAPI(prim).GetDirectBinding()
         return binding.GetMaterial() if binding else None
 
-    def _export_bounding_box(self, mesh_fn, prim):
+    def _export_bounding_box(self, mesh_fn, prim_data):
         bbox = mesh_fn.boundingBox
-        min_pt, max_pt = bbox.min, bbox.max
-        extent = Vt.Vec3fArray([(min_pt.x, min_pt.y, min_pt.z), (max_pt.x, max_pt.y, max_pt.z)])
-        UsdGeom.Boundable(prim).CreateExtentAttr().Set(extent)
-
-    def _export_mesh_data(self, mesh_fn, mesh, prim):
-        points = mesh_fn.getPoints(om.MSpace.kWorld)
-        mesh.GetPointsAttr().Set(Vt.Vec3fArray([(p.x, p.y, p.z) for p in points]))
-        face_counts = []
-        face_connects = []
-        uv_indices = []
-
-        uv_set_name = mesh_fn.currentUVSetName()
-        u_array, v_array = mesh_fn.getUVs(uv_set_name)
-
-        if not u_array or not v_array:
-            return prim
-
-        st_array = Vt.Vec2fArray(list(zip(u_array, v_array)))
-
-        for i in range(mesh_fn.numPolygons):
-            vtx_ids = mesh_fn.getPolygonVertices(i)
-            face_counts.append(len(vtx_ids))
-            face_connects.extend(vtx_ids)
-            for j in range(len(vtx_ids)):
-                uv_id = mesh_fn.getPolygonUVid(i, j, uv_set_name)
-                uv_indices.append(uv_id)
-
-        mesh.GetFaceVertexCountsAttr().Set(Vt.IntArray(face_counts))
-        mesh.GetFaceVertexIndicesAttr().Set(Vt.IntArray(face_connects))
-        st_primvar = UsdGeom.PrimvarsAPI(prim).CreatePrimvar(
-            "st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.faceVarying
+        extent = array_bridge.points_to_vt(om.MPointArray([bbox.min, bbox.max]))
+        prim_data.add_attribute(UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array, extent)
+
+    def _export_mesh_data(self, mesh_fn, prim_data):
+        points = mesh_fn.getPoints(self.space)
+        prim_data.add_attribute(UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray, array_bridge.points_to_vt(points))
+
+        # Pull the whole topology in one call instead of once per polygon
+        face_counts, face_connects = mesh_fn.getVertices()
+        face_counts = array_bridge.to_numpy(face_counts, np.int32)
+
+        prim_data.add_attribute(
+            UsdGeom.Tokens.faceVertexCounts, Sdf.ValueTypeNames.IntArray, array_bridge.ints_to_vt(face_counts)
+        )
+        prim_data.add_attribute(
+            UsdGeom.Tokens.faceVertexIndices, Sdf.ValueTypeNames.IntArray, array_bridge.ints_to_vt(face_connects)
+        )
+
+        face_indices = array_bridge.to_numpy(face_connects, np.int32)
+        self._export_uv_sets(mesh_fn, prim_data, face_counts, face_indices)
+        self._export_color_sets(mesh_fn, prim_data, face_counts, face_indices)
+
+    @staticmethod
+    def _add_reduced_primvar(
+        prim_data: PrimData,
+        name: str,
+        type_name: Sdf.ValueTypeName,
+        values: np.ndarray,
+        face_counts: np.ndarray,
+        face_indices: np.ndarray,
+        num_vertices: int,
+        assigned: np.ndarray | None = None) -> None:
+        """
+        Adds face-varying values as an indexed primvar of the narrowest interpolation that holds them.
+        When only some face-vertices are assigned, the primvar stays face-varying and the others point
+        at the value declared as its unauthoredValuesIndex.
+
+        Args:
+            prim_data (PrimData): The prim data to add the primvar to.
+            name (str): Primvar name without the 'primvars:' namespace.
+            type_name (Sdf.ValueTypeName): The primvar value type.
+            values (np.ndarray): One value per face-vertex.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            face_indices (np.ndarray): Vertex index of every face-vertex.
+            num_vertices (int): Number of vertices of the mesh.
+            assigned (np.ndarray | None, optional): True for every face-vertex that holds a value.
+                Defaults to None, every face-vertex.
+        """
+        if assigned is not None and not assigned.all():
+            values, indices, unassigned_index = index_assigned_values(values, assigned)
+            interpolation = UsdGeom.Tokens.faceVarying
+        else:
+            values, interpolation = reduce_interpolation(values, face_counts, face_indices, num_vertices)
+            values, indices = index_values(values)
+            unassigned_index = None
+        primvar = prim_data.add_primvar(
+            name,
+            type_name,
+            type_name.type.pythonClass.FromNumpy(np.ascontiguousarray(values)),
+            interpolation,
+            None if indices is None else array_bridge.ints_to_vt(indices),
         )
-        st_primvar.Set(st_array)
-        st_primvar.SetIndices(Vt.IntArray(uv_indices))
+        if unassigned_index is not None:
+            primvar.metadata["unauthoredValuesIndex"] = unassigned_index
 
-    def _export_display_color(self, mesh_fn: om.MFnMesh, mesh: om.MObject, prim: Usd.Prim) -> None:
+    def _export_uv_sets(self, mesh_fn: om.MFnMesh, prim_data: PrimData, face_counts: np.ndarray, face_indices: np.ndarray) -> None:
         """
-        Exports display color from the given Maya mesh to the USD prim.
+        Exports every UV set of the mesh. The current set is written as 'st', the others under their own name.
 
         Args:
             mesh_fn (om.MFnMesh): Function set for the mesh.
-            mesh (om.MObject): The Maya mesh object.
-            prim (Usd.Prim): The USD prim to apply display color to.
+            prim_data (PrimData): The prim data to add the primvars to.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            face_indices (np.ndarray): Vertex index of every face-vertex.
         """
+        current_set = mesh_fn.currentUVSetName()
+        for uv_set_name in mesh_fn.getUVSetNames():
+            u_array, v_array = mesh_fn.getUVs(uv_set_name)
+            if not u_array or not v_array:
+                continue
+
+            primvar_name = "st" if uv_set_name == current_set else Tf.MakeValidIdentifier(uv_set_name)
+            if primvar_name == "st" and uv_set_name != current_set:
+                continue
+
+            uvs = np.column_stack((array_bridge.to_numpy(u_array), array_bridge.to_numpy(v_array)))
+            uv_indices = self._get_uv_indices(mesh_fn, uv_set_name, face_counts, len(face_indices))
+            self._add_reduced_primvar(
+                prim_data,
+                primvar_name,
+                Sdf.ValueTypeNames.TexCoord2fArray,
+                uvs[uv_indices],
+                face_counts,
+                face_indices,
+                mesh_fn.numVertices,
+            )
+
+    @staticmethod
+    def _get_uv_indices(mesh_fn: om.MFnMesh, uv_set_name: str, face_counts: np.ndarray, num_face_vertices: int) -> np.ndarray:
+        """
+        Returns the face-varying UV index of every face-vertex of the mesh.
 
-        color_sets = mesh_fn.numColorSets
-        if not color_sets:
-            return  # No color sets, exit early
+        Args:
+            mesh_fn (om.MFnMesh): Function set for the mesh.
+            uv_set_name (str): The UV set to read.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            num_face_vertices (int): Total number of face-vertices.
 
-        colors = mesh_fn.getVertexColors()
+        Returns:
+            np.ndarray: UV index per face-vertex. Unmapped faces point at UV 0.
+        """
+        uv_counts, uv_ids = mesh_fn.getAssignedUVs(uv_set_name)
+        uv_counts = array_bridge.to_numpy(uv_counts, np.int32)
+        uv_ids = array_bridge.to_numpy(uv_ids, np.int32)
 
+        if np.array_equal(uv_counts, face_counts):
+            return uv_ids
 
-        if not colors:
-            return
+        # Maya only returns ids for mapped faces, so spread them back out per face-vertex
+        uv_indices = np.zeros(num_face_vertices, dtype=np.int32)
+        mapped_faces = uv_counts == face_counts
+        uv_indices[np.repeat(mapped_faces, face_counts)] = uv_ids[np.repeat(mapped_faces, uv_counts)]
+        return uv_indices
 
-        usd_colors: List[Gf.Vec3f] = [Gf.Vec3f(c.r, c.g, c.b) for c in colors]
+    def _export_color_sets(self, mesh_fn: om.MFnMesh, prim_data: PrimData, face_counts: np.ndarray, face_indices: np.ndarray) -> None:
+        """
+        Exports every color set of the mesh. The current set is written as displayColor, and
+        displayOpacity when it has alpha, the others as color primvars under their own name.
 
-        def _vec3_key(c: Gf.Vec3f) -> tuple:
-            return (round(c[0], 4), round(c[1], 4), round(c[2], 4))
+        Args:
+            mesh_fn (om.MFnMesh): Function set for the mesh.
+            prim_data (PrimData): The prim data to add the primvars to.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            face_indices (np.ndarray): Vertex index of every face-vertex.
+        """
+        color_sets = mesh_fn.getColorSetNames()
+        if not color_sets:
+            return
 
-        unique_keys = {_vec3_key(c) for c in usd_colors}
+        current_set = mesh_fn.currentColorSetName() or color_sets[0]
+
+        def _add(name, type_name, values):
+            self._add_reduced_primvar(prim_data, name, type_name, values, face_counts, face_indices, mesh_fn.numVertices, assigned)
+
+        for color_set in color_sets:
+            rgba = array_bridge.colors_to_numpy(mesh_fn.getFaceVertexColors(color_set))
+            # Face-vertices without a color read as -1
+            assigned = ~np.all(rgba == -1.0, axis=1)
+            if not assigned.any():
+                continue
+
+            representation = mesh_fn.getColorRepresentation(color_set)
+            if color_set == current_set:
+                _add("displayColor", Sdf.ValueTypeNames.Color3fArray, rgba[:, :3])
+                if representation == om.MFnMesh.kRGBA:
+                    _add("displayOpacity", Sdf.ValueTypeNames.FloatArray, rgba[:, 3])
+                continue
+
+            primvar_name = Tf.MakeValidIdentifier(color_set)
+            if primvar_name in ("displayColor", "displayOpacity"):
+                continue
+            if representation == om.MFnMesh.kAlpha:
+                _add(primvar_name, Sdf.ValueTypeNames.FloatArray, rgba[:, 3])
+            elif representation == om.MFnMesh.kRGBA:
+                _add(primvar_name, Sdf.ValueTypeNames.Color4fArray, rgba)
+            else:
+                _add(primvar_name, Sdf.ValueTypeNames.Color3fArray, rgba[:, :3])
+
+    @staticmethod
+    def _expand_to_face_varying(values: np.ndarray, interpolation: str, face_counts: np.ndarray, face_indices: np.ndarray) -> np.ndarray:
+        """
+        Expands primvar values of any interpolation to one value per face-vertex.
 
-        gprim = UsdGeom.Gprim(prim)
-        if len(unique_keys) == 1:
-            primvar = gprim.CreateDisplayColorPrimvar(interpolation='constant')
-            color = list(unique_keys)[0]
-            primvar.Set([Gf.Vec3f(*color)])
-        else:
-            primvar = gprim.CreateDisplayColorPrimvar(interpolation='vertex')
-            primvar.Set(usd_colors)
+        Args:
+            values (np.ndarray): The flattened primvar values.
+            interpolation (str): The primvar interpolation.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            face_indices (np.ndarray): Vertex index of every face-vertex.
 
+        Returns:
+            np.ndarray: One value per face-vertex.
+        """
+        if interpolation == UsdGeom.Tokens.constant:
+            return np.broadcast_to(values[:1], (len(face_indices),) + values.shape[1:])
+        if interpolation == UsdGeom.Tokens.uniform:
+            return np.repeat(values, face_counts, axis=0)
+        if interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+            return values[face_indices]
+        return values
+
+    def _read_display_color(self, prim: Usd.Prim, face_counts: np.ndarray, face_indices: np.ndarray):
+        """
+        Reads displayColor/displayOpacity into one RGBA array.
+
+        Args:
+            prim (Usd.Prim): The USD mesh prim to read the primvars from.
+            face_counts (np.ndarray): Vertex count of every polygon.
+            face_indices (np.ndarray): Vertex index of every face-vertex.
 
-    def _export_impl(self, stage, dag_node, target):
-        mesh = UsdGeom.Mesh.Define(stage, target)
-        prim = mesh.GetPrim()
+        Returns:
+            tuple[np.ndarray, str, bool] | None: RGBA colors, their interpolation and whether opacity was authored.
+        """
+        gprim = UsdGeom.Gprim(prim)
+        color_primvar = gprim.GetDisplayColorPrimvar()
+        if not color_primvar or not color_primvar.HasValue():
+            return None
 
-        mesh_fn = get_mesh_fn_from_dag(dag_node)
+        colors = color_primvar.ComputeFlattened()
+        if not colors:
+            return None
 
-        self._export_mesh_data(mesh_fn, mesh, prim)                   
-        self._export_display_color(mesh_fn, mesh, prim)
-        self._export_bounding_box(mesh_fn, prim)
-        mesh.GetSubdivisionSchemeAttr().Set(UsdGeom.Tokens.catmullClark) 
-        return prim
+        color_interp = color_primvar.GetInterpolation()
+        rgb = array_bridge.vt_to_numpy(colors, np.float32).reshape(-1, 3)
+
+        opacity_primvar = gprim.GetDisplayOpacityPrimvar()
+        opacities = opacity_primvar.ComputeFlattened() if opacity_primvar and opacity_primvar.HasValue() else None
+        if not opacities:
+            return np.column_stack((rgb, np.ones(len(rgb), dtype=np.float32))), color_interp, False
+
+        opacity_interp = opacity_primvar.GetInterpolation()
+        alpha = array_bridge.vt_to_numpy(opacities, np.float32)
+        if opacity_interp != color_interp:
+            # Mixed interpolations only meet on the face-varying domain
+            rgb = self._expand_to_face_varying(rgb, color_interp, face_counts, face_indices)
+            alpha = self._expand_to_face_varying(alpha, opacity_interp, face_counts, face_indices)
+            color_interp = UsdGeom.Tokens.faceVarying
+        elif color_interp == UsdGeom.Tokens.constant:
+            alpha = alpha[:1]
+        return np.column_stack((rgb, alpha)), color_interp, True
+
+    def _apply_display_color(self, mesh_fn: om.MFnMesh, buffers: "MeshBuffers") -> None:
+        """
+        Applies the colors of the buffers to the mesh with a single bulk color call.
 
-    def _import_impl(self, stage, usd_prim, parent):
+        Args:
+            mesh_fn (om.MFnMesh): Function set for the new mesh or mesh data.
+            buffers (MeshBuffers): The mesh buffers holding the colors.
+        """
+        rgba = buffers.colors
+        representation = om.MFnMesh.kRGBA if buffers.color_has_alpha else om.MFnMesh.kRGB
+        color_set = DISPLAY_COLOR_SET
+        if color_set not in mesh_fn.getColorSetNames():
+            color_set = mesh_fn.createColorSet(DISPLAY_COLOR_SET, False, rep=representation)
+        mesh_fn.setCurrentColorSetName(color_set)
+
+        face_counts = buffers.face_counts
+        num_faces = len(face_counts)
+        color_interp = buffers.color_interpolation
+        if color_interp == UsdGeom.Tokens.constant:
+            vertex_ids = np.arange(mesh_fn.numVertices)
+            mesh_fn.setVertexColors(
+                array_bridge.numpy_to_colors(np.repeat(rgba[:1], len(vertex_ids), axis=0)),
+                array_bridge.vt_to_int_array(vertex_ids),
+                rep=representation,
+            )
+        elif color_interp == UsdGeom.Tokens.uniform:
+            mesh_fn.setFaceColors(
+                array_bridge.numpy_to_colors(rgba[:num_faces]),
+                array_bridge.vt_to_int_array(np.arange(num_faces)),
+                rep=representation,
+            )
+        elif color_interp in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+            mesh_fn.setVertexColors(
+                array_bridge.numpy_to_colors(rgba),
+                array_bridge.vt_to_int_array(np.arange(len(rgba))),
+                rep=representation,
+            )
+        else:
+            mesh_fn.setFaceVertexColors(
+                array_bridge.numpy_to_colors(rgba),
+                array_bridge.vt_to_int_array(np.repeat(np.arange(num_faces), face_counts)),
+                array_bridge.vt_to_int_array(buffers.face_indices),
+                rep=representation,
+            )
+
+    def _export_impl(self, dag_node):
+        prim_data = PrimData("Mesh")
+        mesh_fn = om.MFnMesh(self.get_shape_path(dag_node))
+
+        self._export_mesh_data(mesh_fn, prim_data)
+        self._export_bounding_box(mesh_fn, prim_data)
+        prim_data.add_attribute(
+            UsdGeom.Tokens.subdivisionScheme,
+            Sdf.ValueTypeNames.Token,
+            UsdGeom.Tokens.catmullClark,
+            Sdf.VariabilityUniform,
+        )
+        if self.xform_ops:
+            add_xform_ops(prim_data, Xform(self.processor).sample_xform_ops(dag_node))
+        return prim_data
+
+    def _get_mesh_plug(self, shape_path: om.MDagPath) -> om.MPlug:
+        shape_fn = om.MFnDagNode(shape_path)
+        if self.space == om.MSpace.kWorld:
+            return shape_fn.findPlug("worldMesh", False).elementByLogicalIndex(shape_path.instanceNumber())
+        return shape_fn.findPlug("outMesh", False)
+
+    def _sample_impl(self, dag_node):
+        # The output plug evaluates the deformation in the current MDGContext
+        mesh_data = self._get_mesh_plug(self.get_shape_path(dag_node)).asMObject()
+        points = array_bridge.to_numpy(om.MFnMesh(mesh_data).getPoints(), np.float32, width=3)
+        # A mesh deformed down to no points gets the zero box Maya reports for it, as in _export_bounding_box
+        bounds = points if len(points) else np.zeros((1, 3), dtype=np.float32)
+        values = {
+            UsdGeom.Tokens.points: Vt.Vec3fArray.FromNumpy(points),
+            UsdGeom.Tokens.extent: Vt.Vec3fArray.FromNumpy(np.array([bounds.min(axis=0), bounds.max(axis=0)])),
+        }
+        if self.xform_ops:
+            values.update(Xform(self.processor).sample_xform_ops(dag_node))
+        return values
+
+    def _read_impl(self, usd_prim):
         if not usd_prim or not usd_prim.IsValid():
             return None
 
         mesh = UsdGeom.Mesh(usd_prim)
-        mesh.GetSubdivisionSchemeAttr().Set(UsdGeom.Tokens.catmullClark)
 
-        points = mesh.GetPointsAttr().Get() or []
-        face_vertex_indices = mesh.GetFaceVertexIndicesAttr().Get() or []
-        face_vertex_counts = mesh.GetFaceVertexCountsAttr().Get() or []
+        points = mesh.GetPointsAttr().Get()
+        face_vertex_indices = mesh.GetFaceVertexIndicesAttr().Get()
+        face_vertex_counts = mesh.GetFaceVertexCountsAttr().Get()
 
         if not points or not face_vertex_counts:
             return None
 
-        mfloat_points = om.MFloatPointArray([om.MFloatPoint(x, y, z) for x, y, z in points])
-        face_vertex_indices = om.MIntArray(face_vertex_indices)
-        face_vertex_counts = om.MIntArray(face_vertex_counts)
-
-        mesh_fn = om.MFnMesh()
-        mesh_obj = mesh_fn.create(mfloat_points, face_vertex_counts, face_vertex_indices)
-
-        # Cache UUID to recover later
-        uuid = om.MFnDependencyNode(mesh_obj).uuid()
-
-        # Get initial shape DAG path
-        shape_path = om.MDagPath.getAPathTo(mesh_obj)
-        shape_path.extendToShape()
-        mesh_fn = om.MFnMesh(shape_path)
+        buffers = MeshBuffers(
+            points=array_bridge.vt_to_numpy(points, np.float32).reshape(-1, 3),
+            face_counts=array_bridge.vt_to_numpy(face_vertex_counts, np.int32),
+            face_indices=array_bridge.vt_to_numpy(face_vertex_indices, np.int32),
+            matrix=read_local_matrix(usd_prim),
+        )
 
-        # UVs
-        primvars_api = UsdGeom.PrimvarsAPI(mesh.GetPrim())
-        st_primvar = primvars_api.GetPrimvar("st")
+        st_primvar = UsdGeom.PrimvarsAPI(usd_prim).GetPrimvar("st")
         if st_primvar and st_primvar.HasValue():
             uv_values = st_primvar.Get()
-            uv_indices = st_primvar.GetIndices()
             if uv_values:
-                u_array = om.MFloatArray([u for u, _ in uv_values])
-                v_array = om.MFloatArray([v for _, v in uv_values])
-                mesh_fn.setUVs(u_array, v_array, "map1")
+                buffers.uvs = array_bridge.vt_to_numpy(uv_values, np.float32).reshape(-1, 2)
+                uv_indices = st_primvar.GetIndices()
+                buffers.uv_indices = to_face_varying_indices(
+                    array_bridge.vt_to_numpy(uv_indices, np.int32) if uv_indices else None,
+                    len(buffers.uvs),
+                    st_primvar.GetInterpolation(),
+                    buffers.face_counts,
+                    buffers.face_indices,
+                )
+
+        display_color = self._read_display_color(usd_prim, buffers.face_counts, buffers.face_indices)
+        if display_color is not None:
+            buffers.colors, buffers.color_interpolation, buffers.color_has_alpha = display_color
+
+        return buffers
+
+    def _build_impl(self, dag_mod, buffers, parent, name):
+        transform = dag_mod.createNode("transform", parent)
+        dag_mod.renameNode(transform, name)
+        if buffers is not None:
+            queue_local_matrix(self.processor, transform, buffers.matrix)
+            self.build_shape(dag_mod, buffers, transform, f"{name}Shape")
+        return transform
+
+    def build_instance(self, dag_mod: om.MDagModifier, buffers: MeshBuffers, parent: om.MObject, name: str, source: om.MObject) -> om.MObject:
+        """
+        Queues a transform that shares the shape of source as a Maya instance. Used for every
+        prim of an instanced prototype after the first, whose transform is source.
 
-                if uv_indices:
-                    uv_ids = om.MIntArray([int(i) for i in uv_indices])
-                else:
-                    uv_ids = om.MIntArray(range(len(face_vertex_indices)))
+        Args:
+            dag_mod (om.MDagModifier): The modifier shared by the whole import.
+            buffers (MeshBuffers): The mesh data read for the prototype.
+            parent (om.MObject): Parent transform, or om.MObject.kNullObj for the world.
+            name (str): Name of the transform.
+            source (om.MObject): The transform holding the shape, existing or queued.
+
+        Returns:
+            om.MObject: The queued transform.
+        """
+        with self.get_instrumentation().phase("build", type(self).__name__):
+            transform = dag_mod.createNode("transform", parent)
+            dag_mod.renameNode(transform, name)
+            if buffers is not None:
+                queue_local_matrix(self.processor, transform, buffers.matrix)
+                self.processor.edits.append(AddInstance(source, transform))
+                self.get_instrumentation().count("instanced meshes")
+        return transform
+
+    def build_instance_shape(
+        self,
+        dag_mod: om.MDagModifier,
+        buffers: MeshBuffers,
+        transform: om.MObject,
+        name: str,
+        source: om.MObject | None = None) -> om.MObject:
+        """
+        Queues the mesh of an instanced prototype directly under the transform of the instance prim,
+        so the prototype's geometry prim adds no transform of its own. The first instance gets a new
+        shape, every other one shares the shape under source as a Maya instance.
 
-                mesh_fn.assignUVs(face_vertex_counts, uv_ids, "map1")
+        Args:
+            dag_mod (om.MDagModifier): The modifier shared by the whole import.
+            buffers (MeshBuffers): The mesh data read for the prototype.
+            transform (om.MObject): The transform of the instance prim, existing or queued.
+            name (str): Name of that transform.
+            source (om.MObject | None, optional): The transform holding the shape of the first instance.
+                Defaults to None, for the first instance.
+
+        Returns:
+            om.MObject: The transform.
+        """
+        with self.get_instrumentation().phase("build", type(self).__name__):
+            if buffers is None:
+                return transform
+            if source is None:
+                self.build_shape(dag_mod, buffers, transform, f"{name}Shape")
+            else:
+                self.processor.edits.append(AddInstance(source, transform))
+                self.get_instrumentation().count("instanced meshes")
+        return transform
+
+    def build_shape(self, dag_mod: om.MDagModifier, buffers: MeshBuffers, transform: om.MObject, name: str) -> om.MObject:
+        """
+        Queues a mesh shape holding the buffers under an existing or queued transform.
 
-        # Assign shading
-        shape_obj = shape_path.node()
-        shading_group = om.MSelectionList().add("initialShadingGroup").getDependNode(0)
-        om.MFnSet(shading_group).addMember(shape_obj)
+        Args:
+            dag_mod (om.MDagModifier): The modifier shared by the whole import.
+            buffers (MeshBuffers): The mesh data.
+            transform (om.MObject): The transform to parent the shape under.
+            name (str): Name of the shape.
 
-        display_primvar = UsdGeom.Gprim(mesh.GetPrim()).GetDisplayColorPrimvar()
-        if display_primvar and display_primvar.HasValue():
-            colors = display_primvar.Get()
-            interp = display_primvar.GetInterpolation()
+        Returns:
+            om.MObject: The queued shape.
+        """
+        # Build the geometry as mesh data, then hand it to a shape created by the modifier
+        mesh_data = self._create_mesh_data(buffers)
 
-            if colors:
-                dag_path = mesh_fn.fullPathName()
-                cmds.polyColorSet(dag_path, create=True, colorSet='displayColor', representation='RGB')
-                cmds.polyColorSet(dag_path, currentColorSet=True, colorSet='displayColor')
-                cmds.setAttr(f"{dag_path}.displayColors", 1)
+        shape = dag_mod.createNode("mesh", transform)
+        dag_mod.renameNode(shape, name)
 
-                if interp == 'constant':
-                    color = colors[0]
-                    for i in range(mesh_fn.numVertices):
-                        cmds.polyColorPerVertex(f"{dag_path}.vtx[{i}]", rgb=(color[0], color[1], color[2]), colorDisplayOption=True)
-                elif interp == 'vertex':
-                    for i, color in enumerate(colors):
-                        cmds.polyColorPerVertex(f"{dag_path}.vtx[{i}]", rgb=(color[0], color[1], color[2]), colorDisplayOption=True)
+        shape_fn = om.MFnDependencyNode(shape)
+        dag_mod.newPlugValue(shape_fn.findPlug("inMesh", False), mesh_data)
+        if buffers.colors is not None:
+            dag_mod.newPlugValueBool(shape_fn.findPlug("displayColors", False), True)
 
+        return shape
 
-        # Parent and freeze
-        transform_path = om.MDagPath.getAPathTo(mesh_obj)
-        transform_full = transform_path.fullPathName()
-        cmds.parent(transform_full, parent)
+    def _create_mesh_data(self, buffers: MeshBuffers) -> om.MObject:
+        """
+        Returns:
+            om.MObject: New mesh data holding the buffers.
+        """
+        mesh_data = om.MFnMeshData().create()
+        mesh_fn = om.MFnMesh()
+        face_counts = array_bridge.vt_to_int_array(buffers.face_counts)
+        mesh_fn.create(
+            array_bridge.vt_to_float_points(buffers.points),
+            face_counts,
+            array_bridge.vt_to_int_array(buffers.face_indices),
+            parent=mesh_data,
+        )
+
+        if buffers.uvs is not None:
+            self._apply_uvs(mesh_fn, buffers)
 
-        # Re-acquire using UUID   
-        transform_path = get_dagpath_from_uuid(uuid)
+        if buffers.colors is not None:
+            self._apply_display_color(mesh_fn, buffers)
+        return mesh_data
 
-        # Now freeze using fresh path
-        cmds.makeIdentity(transform_path.fullPathName(), apply=True, t=1, r=1, s=1, n=0)
+    @staticmethod
+    def _apply_uvs(mesh_fn: om.MFnMesh, buffers: MeshBuffers) -> None:
+        u_array, v_array = array_bridge.vt_to_uvs(buffers.uvs)
+        mesh_fn.setUVs(u_array, v_array, "map1")
+        mesh_fn.assignUVs(
+            array_bridge.vt_to_int_array(buffers.face_counts), array_bridge.vt_to_int_array(buffers.uv_indices), "map1"
+        )
 
-        shape_path = om.MDagPath(transform_path)
-        shape_path.extendToShape()
+    def _update_impl(self, dag_mod, transform, buffers, name):
+        shape = get_shape(transform)
+        if buffers is None or shape is None or not shape.hasFn(om.MFn.kMesh):
+            return False
+
+        update_local_matrix(self.processor, transform, buffers.matrix)
+        shape_fn = om.MFnDependencyNode(shape)
+        in_mesh = shape_fn.findPlug("inMesh", False)
+        if in_mesh.isDestination:
+            logger.warning("%s has construction history, only its transform is updated", name)
+            return True
+
+        mesh_data = self._get_updated_mesh_data(shape, buffers)
+        if mesh_data is not None:
+            dag_mod.newPlugValue(in_mesh, mesh_data)
+            if buffers.colors is not None:
+                dag_mod.newPlugValueBool(shape_fn.findPlug("displayColors", False), True)
+            self.get_instrumentation().count("updated meshes")
+        return True
+
+    def _get_updated_mesh_data(self, shape: om.MObject, buffers: MeshBuffers) -> om.MObject | None:
+        """
+        Compares the shape with the buffers. With unchanged topology only the points, UVs and
+        colors that differ are set, on a copy of the shape's mesh data.
 
-        # Rename
-        transform_name = usd_prim.GetName()
-        shape_name = f"{transform_name}Shape"
-        om.MFnDependencyNode(transform_path.node()).setName(transform_name)
-        om.MFnDependencyNode(shape_path.node()).setName(shape_name)
+        Args:
+            shape (om.MObject): The existing mesh shape.
+            buffers (MeshBuffers): The mesh data read from USD.
 
-        return shape_path.fullPathName()
+        Returns:
+            om.MObject | None: New mesh data for the shape, or None when it is up to date.
+        """
+        mesh_fn = om.MFnMesh(shape)
+        face_counts, face_indices = mesh_fn.getVertices()
+        if not (
+            np.array_equal(array_bridge.to_numpy(face_counts, np.int32), buffers.face_counts)
+            and np.array_equal(array_bridge.to_numpy(face_indices, np.int32), buffers.face_indices)
+        ):
+            return self._create_mesh_data(buffers)
+
+        points_changed = not np.array_equal(array_bridge.to_numpy(mesh_fn.getPoints(), np.float32, width=3), buffers.points)
+        uvs_changed = buffers.uvs is not None and not self._uvs_match(mesh_fn, buffers)
+        colors_changed = self._colors_changed(mesh_fn, buffers)
+        if not (points_changed or uvs_changed or colors_changed):
+            return None
 
+        mesh_data = om.MFnMeshData().create()
+        mesh_fn = om.MFnMesh(om.MFnMesh().copy(shape, mesh_data))
+        if points_changed:
+            mesh_fn.setPoints(array_bridge.vt_to_points(buffers.points))
+        if uvs_changed:
+            mesh_fn.clearUVs("map1")
+            self._apply_uvs(mesh_fn, buffers)
+        if colors_changed:
+            if buffers.colors is None:
+                mesh_fn.deleteColorSet(DISPLAY_COLOR_SET)
+            else:
+                self._apply_display_color(mesh_fn, buffers)
+        return mesh_data
+
+    @staticmethod
+    def _uvs_match(mesh_fn: om.MFnMesh, buffers: MeshBuffers) -> bool:
+        if "map1" not in mesh_fn.getUVSetNames():
+            return False
+        u_array, v_array = mesh_fn.getUVs("map1")
+        uvs = np.column_stack((array_bridge.to_numpy(u_array), array_bridge.to_numpy(v_array)))
+        _, uv_ids = mesh_fn.getAssignedUVs("map1")
+        return np.array_equal(uvs, buffers.uvs) and np.array_equal(array_bridge.to_numpy(uv_ids, np.int32), buffers.uv_indices)
+
+    def _colors_changed(self, mesh_fn: om.MFnMesh, buffers: MeshBuffers) -> bool:
+        has_color_set = DISPLAY_COLOR_SET in mesh_fn.getColorSetNames()
+        if buffers.colors is None or not has_color_set:
+            return has_color_set != (buffers.colors is not None)
+
+        current = array_bridge.colors_to_numpy(mesh_fn.getFaceVertexColors(DISPLAY_COLOR_SET))
+        expected = self._expand_to_face_varying(
+            buffers.colors, buffers.color_interpolation, buffers.face_counts, buffers.face_indices
+        )
+        channels = 4 if buffers.color_has_alpha else 3
+        return len(current) != len(expected) or not np.allclose(current[:, :channels], expected[:, :channels], atol=1e-6)
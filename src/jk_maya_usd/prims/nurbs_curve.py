@@ -1,56 +1,253 @@
+from dataclasses import dataclass
+
+import numpy as np
+
 from jk_maya_usd.prims.primbase import PrimBase
-from jk_maya_usd.maya_utilities import create_transform, get_mobject_from_name
-from pxr import UsdGeom, Vt
+from jk_maya_usd.prims.xform import Xform, add_xform_ops, read_local_matrix, queue_local_matrix
+from jk_maya_usd import array_bridge
+from jk_maya_usd.constants import CURVE_PERIODIC_KEY, CURVE_WIDTH_ATTRIBUTE
+from jk_maya_usd.usd_utilities import PrimData
+from pxr import Gf, UsdGeom, Vt, Sdf
 from maya.api import OpenMaya as om
 
+
+def to_usd_knots(knots: np.ndarray, periodic: bool = False) -> np.ndarray:
+    """
+    Maya keeps numCVs + degree - 1 knots per curve, USD numCVs + degree + 1.
+
+    Args:
+        knots (np.ndarray): The Maya knots of one curve.
+        periodic (bool, optional): The curve is periodic. Defaults to False.
+
+    Returns:
+        np.ndarray: The knots with an end knot added on both sides, repeated for open
+            curves and extrapolated from the knot spacing for periodic ones.
+    """
+    if periodic:
+        first, last = 2 * knots[0] - knots[1], 2 * knots[-1] - knots[-2]
+    else:
+        first, last = knots[0], knots[-1]
+    return np.concatenate(([first], knots, [last]))
+
+
+def to_maya_knots(knots: np.ndarray, counts: np.ndarray, orders: np.ndarray) -> np.ndarray:
+    """
+    Drops the two end knots of every curve of a NurbsCurves prim in one pass.
+
+    Args:
+        knots (np.ndarray): The knots of all curves, USD style.
+        counts (np.ndarray): CV count of every curve.
+        orders (np.ndarray): Order of every curve.
+
+    Returns:
+        np.ndarray: The knots of all curves, Maya style. Knots already written Maya style,
+            as earlier exports did, are returned as they are.
+    """
+    knot_counts = counts + orders
+    if len(knots) != knot_counts.sum():
+        return knots
+    ends = np.cumsum(knot_counts)
+    keep = np.ones(len(knots), dtype=bool)
+    keep[ends - knot_counts] = False
+    keep[ends - 1] = False
+    return knots[keep]
+
+
+@dataclass
+class CurveBuffers:
+    """ Curve data read from a USD NurbsCurves prim, one or many curves """
+    points: np.ndarray
+    counts: np.ndarray
+    degrees: np.ndarray
+    knots: np.ndarray
+    matrix: Gf.Matrix4d | None = None
+    periodic: np.ndarray | None = None
+
+    def split(self):
+        """Yields the points, Maya knots, degree and periodic flag of every curve."""
+        knot_counts = self.counts + self.degrees - 1
+        points = np.split(self.points, np.cumsum(self.counts)[:-1])
+        knots = np.split(self.knots, np.cumsum(knot_counts)[:-1])
+        periodic = self.periodic if self.periodic is not None else np.zeros(len(self.counts), dtype=bool)
+        yield from zip(points, knots, self.degrees.tolist(), periodic.tolist())
+
+
 class NurbsCurve(PrimBase):
-    def _export_impl(self, stage, dag_node, target):
-        curve = UsdGeom.NurbsCurves.Define(stage, target)
-        prim = curve.GetPrim()
+    animatable = True
 
-        selection_list = om.MSelectionList()
-        selection_list.add(dag_node)
-        dag_path = selection_list.getDagPath(0)
-        curve_fn = om.MFnNurbsCurve(dag_path)
+    @staticmethod
+    def _get_shape_curves(dag_path: om.MDagPath) -> list[om.MDagPath]:
+        """Returns the visible curve shapes directly below a transform."""
+        curve_paths = []
+        for index in range(dag_path.numberOfShapesDirectlyBelow()):
+            shape_path = om.MDagPath(dag_path).extendToShape(index)
+            if shape_path.hasFn(om.MFn.kNurbsCurve) and not om.MFnDagNode(shape_path).isIntermediateObject:
+                curve_paths.append(shape_path)
+        return curve_paths
 
-        points = curve_fn.cvPositions(om.MSpace.kWorld)
-        curve.GetPointsAttr().Set(Vt.Vec3fArray([(p.x, p.y, p.z) for p in points]))
-        curve.GetOrderAttr().Set(Vt.IntArray([curve_fn.degree + 1]))
-        curve.GetCurveVertexCountsAttr().Set(Vt.IntArray([curve_fn.numCVs]))
-        curve.GetKnotsAttr().Set(Vt.DoubleArray(curve_fn.knots()))
+    def _get_curve_paths(self, dag_node: str) -> list[om.MDagPath]:
+        """
+        Returns:
+            list[om.MDagPath]: The curves of dag_node, and of every transform below it when the
+                processor packs the curves of dag_node into one prim, in DAG order.
+        """
+        if dag_node not in getattr(self.processor, "curve_groups", ()):
+            return self._get_shape_curves(self.get_node_path(dag_node))
 
-        return prim
+        scene_index = self.processor.scene_index
+        curve_paths = []
+        pending = [dag_node]
+        while pending:
+            scene_node = scene_index[pending.pop()]
+            curve_paths.extend(self._get_shape_curves(scene_node.dag_path))
+            pending.extend(reversed(scene_node.children))
+        return curve_paths
 
-    def _import_impl(self, stage, usd_prim, parent):
+    @staticmethod
+    def _world_matrix(dag_path: om.MDagPath) -> om.MMatrix:
+        # The plug evaluates in the current MDGContext, MDagPath.inclusiveMatrix only at the current time
+        plug = om.MFnDagNode(dag_path).findPlug("worldMatrix", False).elementByLogicalIndex(dag_path.instanceNumber())
+        return om.MFnMatrixData(plug.asMObject()).matrix()
+
+    def _get_points(self, dag_node: str, curve_paths: list[om.MDagPath]) -> np.ndarray:
+        """
+        Evaluates the CVs of every curve in the current MDGContext, in the space of dag_node.
+
+        Args:
+            dag_node (str): Full path of the exported transform.
+            curve_paths (list[om.MDagPath]): Its curves, from _get_curve_paths.
+
+        Returns:
+            np.ndarray: The CVs of all curves, concatenated in the order of curve_paths.
+        """
+        # Curves below a packed transform are moved into its space
+        to_transform = self._world_matrix(self.get_node_path(dag_node)).inverse()
+        points = []
+        for curve_path in curve_paths:
+            curve_data = om.MFnDagNode(curve_path).findPlug("local", False).asMObject()
+            cvs = array_bridge.to_numpy(om.MFnNurbsCurve(curve_data).cvPositions(), np.float64, width=3)
+            relative = self._world_matrix(curve_path) * to_transform
+            if not relative.isEquivalent(om.MMatrix.kIdentity):
+                matrix = np.array(relative, dtype=np.float64).reshape(4, 4)
+                cvs = cvs @ matrix[:3, :3] + matrix[3, :3]
+            points.append(cvs)
+        return np.concatenate(points).astype(np.float32)
+
+    @staticmethod
+    def _points_values(points: np.ndarray) -> dict:
+        values = {UsdGeom.Tokens.points: Vt.Vec3fArray.FromNumpy(points)}
+        # A group without CVs has no bounds, its extent is left unauthored
+        if points.size:
+            values[UsdGeom.Tokens.extent] = Vt.Vec3fArray.FromNumpy(np.array([points.min(axis=0), points.max(axis=0)]))
+        return values
+
+    def _export_impl(self, dag_node):
+        prim_data = PrimData("NurbsCurves")
+        curve_paths = self._get_curve_paths(dag_node)
+        if not curve_paths:
+            return Xform(self.processor)._export_impl(dag_node)
+
+        counts, orders, knots, widths, forms = [], [], [], [], []
+        for curve_path in curve_paths:
+            curve_fn = om.MFnNurbsCurve(curve_path)
+            counts.append(curve_fn.numCVs)
+            orders.append(curve_fn.degree + 1)
+            periodic = curve_fn.form == om.MFnNurbsCurve.kPeriodic
+            forms.append(periodic)
+            knots.append(to_usd_knots(array_bridge.to_numpy(curve_fn.knots(), np.float64), periodic))
+
+            shape_fn = om.MFnDependencyNode(curve_path.node())
+            if shape_fn.hasAttribute(CURVE_WIDTH_ATTRIBUTE):
+                widths.append(shape_fn.findPlug(CURVE_WIDTH_ATTRIBUTE, False).asDouble())
+            else:
+                widths.append(None)
+
+        values = self._points_values(self._get_points(dag_node, curve_paths))
+        prim_data.add_attribute(UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray, values[UsdGeom.Tokens.points])
+        if UsdGeom.Tokens.extent in values:
+            prim_data.add_attribute(UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array, values[UsdGeom.Tokens.extent])
+        prim_data.add_attribute(UsdGeom.Tokens.order, Sdf.ValueTypeNames.IntArray, Vt.IntArray(orders))
+        prim_data.add_attribute(UsdGeom.Tokens.curveVertexCounts, Sdf.ValueTypeNames.IntArray, Vt.IntArray(counts))
+        prim_data.add_attribute(UsdGeom.Tokens.knots, Sdf.ValueTypeNames.DoubleArray, Vt.DoubleArray.FromNumpy(np.concatenate(knots)))
+        if any(width is not None for width in widths):
+            widths = np.array([1.0 if width is None else width for width in widths], dtype=np.float32)
+            interpolation = UsdGeom.Tokens.constant if np.all(widths == widths[0]) else UsdGeom.Tokens.uniform
+            prim_data.add_attribute(
+                UsdGeom.Tokens.widths,
+                Sdf.ValueTypeNames.FloatArray,
+                Vt.FloatArray.FromNumpy(widths[:1] if interpolation == UsdGeom.Tokens.constant else widths),
+                interpolation=interpolation,
+            )
+        if any(forms):
+            # NurbsCurves has no form attribute, the wrapped CVs alone do not tell periodic from closed
+            prim_data.custom_data[CURVE_PERIODIC_KEY] = Vt.BoolArray(forms)
+        add_xform_ops(prim_data, Xform(self.processor).sample_xform_ops(dag_node))
+
+        return prim_data
+
+    def _sample_impl(self, dag_node):
+        values = Xform(self.processor).sample_xform_ops(dag_node)
+        curve_paths = self._get_curve_paths(dag_node)
+        if curve_paths:
+            # Same curves, order and space as _export_impl, so the points match curveVertexCounts
+            values.update(self._points_values(self._get_points(dag_node, curve_paths)))
+        return values
+
+    def _read_impl(self, usd_prim):
         if not usd_prim or not usd_prim.IsValid():
             return None
 
         curve = UsdGeom.NurbsCurves(usd_prim)
-        points = curve.GetPointsAttr().Get() or []
-        counts = curve.GetCurveVertexCountsAttr().Get() or []
-        order = curve.GetOrderAttr().Get() or []
-        knots = curve.GetKnotsAttr().Get() or []
+        points = curve.GetPointsAttr().Get()
+        counts = curve.GetCurveVertexCountsAttr().Get()
+        order = curve.GetOrderAttr().Get()
+        knots = curve.GetKnotsAttr().Get()
 
         if not points or not counts or not order or not knots:
             return None
 
-        mfloat_points = om.MPointArray([om.MPoint(*p) for p in points])
-        knot_array = om.MDoubleArray(knots)
-        degree = order[0] - 1
-        parent_obj = get_mobject_from_name(parent)
-        transform_name = usd_prim.GetName()
-        transform_obj = create_transform(transform_name, parent_obj)
-
-        curve_fn = om.MFnNurbsCurve()
-        curve_obj = curve_fn.create(
-            mfloat_points,
-            knot_array,
-            degree,
-            om.MFnNurbsCurve.kOpen,
-            False,
-            False,
-            transform_obj
+        counts = array_bridge.vt_to_numpy(counts, np.int32)
+        orders = array_bridge.vt_to_numpy(order, np.int32)
+        if len(orders) != len(counts):
+            # A single order for every curve
+            orders = np.full(len(counts), orders[0], dtype=np.int32)
+        periodic = usd_prim.GetCustomDataByKey(CURVE_PERIODIC_KEY)
+        if periodic is not None and len(periodic) == len(counts):
+            periodic = np.array(periodic, dtype=bool)
+        else:
+            periodic = None
+
+        return CurveBuffers(
+            points=array_bridge.vt_to_numpy(points, np.float64).reshape(-1, 3),
+            counts=counts,
+            degrees=orders - 1,
+            knots=to_maya_knots(array_bridge.vt_to_numpy(knots, np.float64), counts, orders),
+            matrix=read_local_matrix(usd_prim),
+            periodic=periodic,
         )
 
-        dag_path = om.MDagPath.getAPathTo(curve_obj)
-        return dag_path.fullPathName()
\ No newline at end of file
+    def _build_impl(self, dag_mod, buffers, parent, name):
+        transform = dag_mod.createNode("transform", parent)
+        dag_mod.renameNode(transform, name)
+        if buffers is None:
+            return transform
+
+        queue_local_matrix(self.processor, transform, buffers.matrix)
+        # Every curve of the prim becomes a shape under the one transform
+        for index, (points, knots, degree, periodic) in enumerate(buffers.split()):
+            curve_data = om.MFnNurbsCurveData().create()
+            om.MFnNurbsCurve().create(
+                array_bridge.vt_to_points(points),
+                array_bridge.vt_to_double_array(knots),
+                degree,
+                om.MFnNurbsCurve.kPeriodic if periodic else om.MFnNurbsCurve.kOpen,
+                False,
+                False,
+                curve_data
+            )
+
+            shape = dag_mod.createNode("nurbsCurve", transform)
+            dag_mod.renameNode(shape, f"{name}Shape{index or ''}")
+            dag_mod.newPlugValue(om.MFnDependencyNode(shape).findPlug("create", False), curve_data)
+        self.get_instrumentation().count("curves", len(buffers.counts))
+        return transform
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+
+import numpy as np
+from pxr import Gf, Usd, UsdGeom
+from maya import cmds
+from maya.api import OpenMaya as om
+
+from jk_maya_usd.constants import SOURCE_FILE_ATTRIBUTE, SOURCE_PRIM_ATTRIBUTE
+from jk_maya_usd.prims.mesh import Mesh, MeshBuffers
+from jk_maya_usd.prims.xform import Xform
+
+# Corner bits are (x, y, z) picking min (0) or max (1) of the range
+BOX_FACE_COUNTS = np.full(6, 4, dtype=np.int32)
+BOX_FACE_INDICES = np.array(
+    [1, 3, 2, 0, 6, 7, 5, 4, 4, 5, 1, 0, 3, 7, 6, 2, 2, 6, 4, 0, 5, 7, 3, 1], dtype=np.int32
+)
+
+
+@dataclass
+class PlaceholderData:
+    """ What a placeholder needs to stand in for a branch that was not imported """
+    usd_path: str
+    matrix: Gf.Matrix4d | None = None
+    box: MeshBuffers | None = None
+
+
+class Placeholder(Xform):
+    """
+    Stands in for a branch that was not imported, or whose payload was not loaded.
+    It is a transform carrying the prim's local transformation and a mesh of the
+    branch's bounding box, displayed as a bounding box. The source file and prim
+    path are stored on the transform so the branch can be expanded later.
+    """
+    shading_group = "initialShadingGroup"
+
+    @staticmethod
+    def _box_buffers(bound_range: Gf.Range3d) -> MeshBuffers:
+        corners = np.array([bound_range.GetMin(), bound_range.GetMax()], dtype=np.float32)
+        bits = (np.arange(8)[:, None] >> np.array([2, 1, 0])) & 1
+        points = corners[bits, np.arange(3)]
+        return MeshBuffers(points, BOX_FACE_COUNTS, BOX_FACE_INDICES)
+
+    @staticmethod
+    def _read_bound(usd_prim: Usd.Prim) -> Gf.Range3d:
+        # Unloaded payloads usually only carry an extentsHint, one min/max pair per purpose
+        extents_hint = UsdGeom.ModelAPI(usd_prim).GetExtentsHint()
+        if extents_hint:
+            bound_range = Gf.Range3d()
+            for index in range(0, len(extents_hint) - 1, 2):
+                bound_range.UnionWith(Gf.Range3d(Gf.Vec3d(extents_hint[index]), Gf.Vec3d(extents_hint[index + 1])))
+            return bound_range
+
+        bbox_cache = UsdGeom.BBoxCache(
+            Usd.TimeCode.Default(),
+            [UsdGeom.Tokens.default_, UsdGeom.Tokens.render, UsdGeom.Tokens.proxy],
+        )
+        return bbox_cache.ComputeUntransformedBound(usd_prim).ComputeAlignedRange()
+
+    def _read_impl(self, usd_prim):
+        bound_range = self._read_bound(usd_prim)
+        return PlaceholderData(
+            usd_path=str(usd_prim.GetPath()),
+            matrix=super()._read_impl(usd_prim),
+            box=None if bound_range.IsEmpty() else self._box_buffers(bound_range),
+        )
+
+    def _build_impl(self, dag_mod, data, parent, name):
+        transform = super()._build_impl(dag_mod, data.matrix, parent, name)
+        if data.box is not None:
+            Mesh(self.processor).build_shape(dag_mod, data.box, transform, f"{name}PlaceholderShape")
+
+        transform_fn = om.MFnDependencyNode(transform)
+        dag_mod.newPlugValueBool(transform_fn.findPlug("overrideEnabled", False), True)
+        dag_mod.newPlugValueInt(transform_fn.findPlug("overrideLevelOfDetail", False), 1)
+        return transform
+
+    def _update_impl(self, dag_mod, transform, data, name):
+        return False
+
+    def finalize_node(self, path, data):
+        # The importer stores the prim path on every node it builds, the placeholder adds the file
+        cmds.addAttr(path, longName=SOURCE_FILE_ATTRIBUTE, dataType="string")
+        cmds.setAttr(f"{path}.{SOURCE_FILE_ATTRIBUTE}", self.processor.usd_file, type="string", lock=True)
+        cmds.setAttr(f"{path}.{SOURCE_PRIM_ATTRIBUTE}", lock=True)
@@ -1,26 +1,193 @@
 from abc import ABC, abstractmethod
-from pxr import Usd
+from pxr import Usd, UsdGeom, Sdf
 import maya.api.OpenMaya as om
 
+from jk_maya_usd.constants import MAYA_UUID_KEY
+from jk_maya_usd.instrumentation import DISABLED, Instrumentation
+from jk_maya_usd.primvars import compact_primvars
+from jk_maya_usd.usd_utilities import PrimData
+
 
 class PrimBase(ABC):
+    shading_group = None
+    type_attribute = None
+    animatable = False
+
     def __init__(self, processor):
         self.processor = processor
 
-    def export_node(self, stage: Usd.Stage, dag_node: om.MObject, target: str) -> Usd.Prim:
-        prim = self._export_impl(stage, dag_node, target)
-        return prim
+    def get_instrumentation(self) -> Instrumentation:
+        return getattr(self.processor, "instrumentation", None) or DISABLED
+
+    def export_node(self, writer, dag_node: str, target: Sdf.Path, time_samples: dict[str, dict] | None = None) -> PrimData:
+        instrumentation = self.get_instrumentation()
+        prim_class = type(self).__name__
+        # Maya data is converted to Vt arrays as it is read, so extraction includes the conversion
+        with instrumentation.phase("extract", prim_class):
+            prim_data = self.extract_node(dag_node)
+            if getattr(self.processor, "store_uuids", False):
+                node_fn = om.MFnDependencyNode(self.get_node_path(dag_node).node())
+                prim_data.custom_data[MAYA_UUID_KEY] = node_fn.uuid().asString()
+            for name, samples in (time_samples or {}).items():
+                prim_data.set_time_samples(name, samples)
+        self.compact(prim_data, target)
+        with instrumentation.phase("author", prim_class):
+            writer.define_prim(target, prim_data)
+
+        instrumentation.count("prims")
+        points = prim_data.attributes.get(UsdGeom.Tokens.points)
+        if points is not None and points.value is not None:
+            instrumentation.count("points", len(points.value))
+        return prim_data
+
+    def compact(self, prim_data: PrimData, target: Sdf.Path) -> None:
+        """
+        Compacts the primvars of the prim when the processor asks for it, and records the bytes saved.
+
+        Args:
+            prim_data (PrimData): The extracted prim.
+            target (Sdf.Path): Path of the prim the data is authored to.
+        """
+        if not getattr(self.processor, "compact_primvars", False):
+            return
+        with self.get_instrumentation().phase("compact", type(self).__name__):
+            saved = compact_primvars(prim_data, self.processor.half_precision_error)
+        if saved:
+            self.processor.bytes_saved[str(target)] = saved
+            self.get_instrumentation().count("primvar bytes saved", saved)
+
+    def extract_node(self, dag_node: str) -> PrimData:
+        return self._export_impl(dag_node)
 
     @abstractmethod
-    def _export_impl(self, stage: Usd.Stage, dag_node: om.MObject, target: str) -> Usd.Prim:
+    def _export_impl(self, dag_node: str) -> PrimData:
         pass
 
-    def import_node(self, stage: Usd.Stage, dag_node: om.MObject, target: str) -> om.MObject:
-        node = self._import_impl(stage, dag_node, target)
-        return node
+    def sample_node(self, dag_node: str) -> dict:
+        """
+        Evaluates the animatable attributes of the node in the current om.MDGContext.
+
+        Args:
+            dag_node (str): Full path of the node.
+
+        Returns:
+            dict[str, Any]: Attribute value per USD attribute name.
+        """
+        return self._sample_impl(dag_node)
+
+    def _sample_impl(self, dag_node: str) -> dict:
+        return {}
+
+    def get_node_path(self, dag_node: str) -> om.MDagPath:
+        """
+        Returns the DAG path of the node, from the processor's scene index when it has one.
+
+        Args:
+            dag_node (str): Full path of the node.
+
+        Returns:
+            om.MDagPath: The node's DAG path.
+        """
+        scene_index = getattr(self.processor, "scene_index", None)
+        scene_node = scene_index.get(dag_node) if scene_index else None
+        if scene_node is not None:
+            return scene_node.dag_path
+
+        selection_list = om.MSelectionList()
+        selection_list.add(dag_node)
+        return selection_list.getDagPath(0)
+
+    def get_shape_path(self, dag_node: str) -> om.MDagPath:
+        """
+        Returns the DAG path of the shape to export, from the processor's scene index when it has one.
+
+        Args:
+            dag_node (str): Full path of the transform (or shape) node.
+
+        Returns:
+            om.MDagPath: The shape's DAG path.
+        """
+        scene_index = getattr(self.processor, "scene_index", None)
+        scene_node = scene_index.get(dag_node) if scene_index else None
+        if scene_node is not None:
+            return scene_node.shape_path or scene_node.dag_path
+
+        selection_list = om.MSelectionList()
+        selection_list.add(dag_node)
+        return selection_list.getDagPath(0)
+
+    def read_prim(self, usd_prim: Usd.Prim):
+        """
+        Reads everything needed to build the prim into plain arrays. Touches no Maya state.
+
+        Args:
+            usd_prim (Usd.Prim): The prim to read.
+
+        Returns:
+            The handler's buffers, or None when the prim holds nothing to build.
+        """
+        instrumentation = self.get_instrumentation()
+        with instrumentation.phase("read", type(self).__name__):
+            data = self._read_impl(usd_prim)
+
+        instrumentation.count("prims")
+        points = getattr(data, "points", None)
+        if points is not None:
+            instrumentation.count("points", len(points))
+        return data
 
     @abstractmethod
-    def _import_impl(self, stage: Usd.Stage, dag_node: om.MObject, target: str) -> om.MObject:
+    def _read_impl(self, usd_prim: Usd.Prim):
+        pass
+
+    def build_node(self, dag_mod: om.MDagModifier, data, parent: om.MObject, name: str) -> om.MObject:
+        """
+        Queues the Maya nodes for data on dag_mod. Nothing is created until the modifier runs.
+
+        Args:
+            dag_mod (om.MDagModifier): The modifier shared by the whole import.
+            data: What read_prim returned.
+            parent (om.MObject): Parent transform, or om.MObject.kNullObj for the world.
+            name (str): Name of the transform.
+
+        Returns:
+            om.MObject: The transform that was queued.
+        """
+        with self.get_instrumentation().phase("build", type(self).__name__):
+            return self._build_impl(dag_mod, data, parent, name)
+
+    @abstractmethod
+    def _build_impl(self, dag_mod: om.MDagModifier, data, parent: om.MObject, name: str) -> om.MObject:
+        pass
+
+    def update_node(self, dag_mod: om.MDagModifier, transform: om.MObject, data, name: str) -> bool:
+        """
+        Queues the edits that bring a node built by an earlier import up to date with data,
+        touching only what changed. Nothing is queued when the node can not be updated.
+
+        Args:
+            dag_mod (om.MDagModifier): The modifier shared by the whole import.
+            transform (om.MObject): The existing transform.
+            data: What read_prim returned.
+            name (str): Name of the transform.
+
+        Returns:
+            bool: False when the node has to be rebuilt instead.
+        """
+        with self.get_instrumentation().phase("update", type(self).__name__):
+            return self._update_impl(dag_mod, transform, data, name)
+
+    def _update_impl(self, dag_mod: om.MDagModifier, transform: om.MObject, data, name: str) -> bool:
+        return False
+
+    def finalize_node(self, path: str, data) -> None:
+        """
+        Called once the modifier has run, for edits that need the node to exist.
+
+        Args:
+            path (str): Full path of the built transform.
+            data: What read_prim returned.
+        """
         pass
 
     def get_processor(self):
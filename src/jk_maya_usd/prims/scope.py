@@ -1,14 +1,17 @@
-from pxr import UsdGeom
-
 from jk_maya_usd.prims.primbase import PrimBase
+from jk_maya_usd.usd_utilities import PrimData
 
-from jk_maya_usd.maya_utilities import create_scope
 
 class Scope(PrimBase):
-    def _export_impl(self, stage, dag_node, target):
-        scope = UsdGeom.Scope.Define(stage, target)
-        return scope.GetPrim()
-        
-    def _import_impl(self, stage, usd_prim, parent):
-        short_name = usd_prim.GetName()
-        return create_scope(short_name, parent)
\ No newline at end of file
+    type_attribute = "Scope"
+
+    def _export_impl(self, dag_node):
+        return PrimData("Scope")
+
+    def _read_impl(self, usd_prim):
+        return None
+
+    def _build_impl(self, dag_mod, data, parent, name):
+        scope = dag_mod.createNode("transform", parent)
+        dag_mod.renameNode(scope, name)
+        return scope
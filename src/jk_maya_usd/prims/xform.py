@@ -1,54 +1,132 @@
 from jk_maya_usd.prims.primbase import PrimBase
 
-from pxr import UsdGeom
-from maya import cmds
+from pxr import UsdGeom, Sdf, Gf, Vt
+from maya.api import OpenMaya as om
+
+from jk_maya_usd import array_bridge
+from jk_maya_usd.maya_utilities import get_shape
+from jk_maya_usd.modifier_command import SetTransformation
+from jk_maya_usd.usd_utilities import PrimData
+
+TRANSFORM_OP = "xformOp:transform"
+
+
+def add_xform_ops(prim_data: PrimData, values: dict) -> None:
+    """
+    Adds the xform ops sampled by Xform.sample_xform_ops, and their order, to prim_data.
+
+    Args:
+        prim_data (PrimData): The prim to add the ops to.
+        values (dict): Either a single xformOp:transform matrix, or translate, rotateXYZ and scale.
+    """
+    if TRANSFORM_OP in values:
+        prim_data.add_attribute(TRANSFORM_OP, Sdf.ValueTypeNames.Matrix4d, values[TRANSFORM_OP])
+        op_order = [TRANSFORM_OP]
+    else:
+        # Same ops, precisions and order as UsdGeom.Xformable.Add*Op authors
+        prim_data.add_attribute("xformOp:translate", Sdf.ValueTypeNames.Double3, values["xformOp:translate"])
+        prim_data.add_attribute("xformOp:rotateXYZ", Sdf.ValueTypeNames.Float3, values["xformOp:rotateXYZ"])
+        prim_data.add_attribute("xformOp:scale", Sdf.ValueTypeNames.Float3, values["xformOp:scale"])
+        op_order = ["xformOp:translate", "xformOp:rotateXYZ", "xformOp:scale"]
+
+    prim_data.add_attribute(
+        UsdGeom.Tokens.xformOpOrder, Sdf.ValueTypeNames.TokenArray, Vt.TokenArray(op_order), Sdf.VariabilityUniform
+    )
+
+
+def read_local_matrix(usd_prim) -> Gf.Matrix4d | None:
+    """
+    Returns:
+        Gf.Matrix4d | None: The local transformation of the prim, or None when it is the identity.
+    """
+    matrix = UsdGeom.Xformable(usd_prim).GetLocalTransformation()
+    if Gf.IsClose(matrix, Gf.Matrix4d(1.0), 1e-9):
+        return None
+    return matrix
+
+
+def queue_local_matrix(processor, transform: om.MObject, matrix: Gf.Matrix4d | None) -> None:
+    """
+    Queues the matrix to be set on a transform the import modifier creates, with one
+    MFnTransform.setTransformation once the modifier has run.
+
+    Args:
+        processor (CustomUSDImporter): The importer, which collects the edits.
+        transform (om.MObject): The queued transform.
+        matrix (Gf.Matrix4d | None): Its local matrix. Nothing is queued for None.
+    """
+    if matrix is not None:
+        transformation = om.MTransformationMatrix(array_bridge.gf_to_matrix(matrix))
+        processor.edits.append(SetTransformation(transform, transformation))
+
+
+def update_local_matrix(processor, transform: om.MObject, matrix: Gf.Matrix4d | None) -> None:
+    """
+    Queues the matrix to be set on an existing transform, unless it already has it.
+
+    Args:
+        processor (CustomUSDImporter): The importer, which collects the edits.
+        transform (om.MObject): The existing transform.
+        matrix (Gf.Matrix4d | None): Its new local matrix. None is the identity.
+    """
+    target = om.MMatrix() if matrix is None else array_bridge.gf_to_matrix(matrix)
+    if not om.MFnTransform(transform).transformation().asMatrix().isEquivalent(target, 1e-9):
+        processor.edits.append(SetTransformation(transform, om.MTransformationMatrix(target)))
 
-from jk_maya_usd.maya_utilities import create_group
 
 class Xform(PrimBase):
-    def _export_impl(self, stage, dag_node, target):
-        xform = UsdGeom.Xform.Define(stage, target)
-        xform_ops = UsdGeom.Xformable(xform)
-
-        translate = cmds.getAttr(f"{dag_node}.translate")[0]
-        rotate = cmds.getAttr(f"{dag_node}.rotate")[0]
-        scale = cmds.getAttr(f"{dag_node}.scale")[0]
-
-        xform_ops.AddTranslateOp().Set(translate)
-        xform_ops.AddRotateXYZOp().Set(rotate)
-        xform_ops.AddScaleOp().Set(scale)
-
-        return xform.GetPrim()
-        
-    def _import_impl(self, stage, usd_prim, parent):
-        short_name = usd_prim.GetName()
-
-        xform = UsdGeom.Xform(usd_prim)
-        xform_ops = xform.GetOrderedXformOps()
-
-        translate = [0, 0, 0]
-        rotate = [0, 0, 0]
-        scale = [1, 1, 1]
-
-        for op in xform_ops:
-            op_type = op.GetOpType()
-            value = op.Get()
-            if op_type == UsdGeom.XformOp.TypeTranslate:
-                translate = value
-            elif op_type == UsdGeom.XformOp.TypeRotateXYZ:
-                rotate = value
-            elif op_type == UsdGeom.XformOp.TypeScale:
-                scale = value
-
-        group = create_group(short_name, parent)
-        cmds.setAttr(group + ".translate", *translate)
-        cmds.setAttr(group + ".rotate", *rotate)
-        cmds.setAttr(group + ".scale", *scale)
+    animatable = True
+
+    def sample_xform_ops(self, dag_node: str) -> dict:
+        """
+        Evaluates the local transformation of the node in the current om.MDGContext. With the
+        processor's matrix_transforms it is one matrix, otherwise translate, rotate and scale.
+
+        Args:
+            dag_node (str): Full path of the transform.
+
+        Returns:
+            dict[str, Any]: Value per xform op name.
+        """
+        # Plugs evaluate in the current MDGContext, cmds.getAttr only at the current time
+        node_fn = om.MFnDependencyNode(self.get_node_path(dag_node).node())
+        if getattr(self.processor, "matrix_transforms", False):
+            # The local matrix plug already holds the pivots, rotate order, shear and joint orient
+            matrix = om.MFnMatrixData(node_fn.findPlug("matrix", False).asMObject()).matrix()
+            return {TRANSFORM_OP: array_bridge.matrix_to_gf(matrix)}
+
+        translate = node_fn.findPlug("translate", False)
+        rotate = node_fn.findPlug("rotate", False)
+        scale = node_fn.findPlug("scale", False)
+
+        distance_unit = om.MDistance.uiUnit()
+        angle_unit = om.MAngle.uiUnit()
+        return {
+            "xformOp:translate": Gf.Vec3d(*[translate.child(i).asMDistance().asUnits(distance_unit) for i in range(3)]),
+            "xformOp:rotateXYZ": Gf.Vec3f(*[rotate.child(i).asMAngle().asUnits(angle_unit) for i in range(3)]),
+            "xformOp:scale": Gf.Vec3f(*[scale.child(i).asDouble() for i in range(3)]),
+        }
+
+    def _export_impl(self, dag_node):
+        prim_data = PrimData("Xform")
+        add_xform_ops(prim_data, self.sample_xform_ops(dag_node))
+        return prim_data
+
+    def _sample_impl(self, dag_node):
+        return self.sample_xform_ops(dag_node)
+
+    def _read_impl(self, usd_prim):
+        return read_local_matrix(usd_prim)
+
+    def _build_impl(self, dag_mod, matrix, parent, name):
+        group = dag_mod.createNode("transform", parent)
+        dag_mod.renameNode(group, name)
+        queue_local_matrix(self.processor, group, matrix)
         return group
 
-
-
-
-
-
-
+    def _update_impl(self, dag_mod, transform, matrix, name):
+        # A shape under the transform means the prim used to be of another type
+        if get_shape(transform) is not None:
+            return False
+        update_local_matrix(self.processor, transform, matrix)
+        return True
@@ -0,0 +1,172 @@
+""" Vectorized reduction of primvar values to indexed primvars of the narrowest interpolation and precision """
+
+import numpy as np
+from pxr import Sdf, UsdGeom, Vt
+
+from jk_maya_usd.usd_utilities import AttributeData, PrimData
+
+# Primvar types that have a half precision counterpart. Schema attributes such as points keep
+# their declared float type, so compacting never touches them.
+HALF_PRECISION_TYPES = {
+    Sdf.ValueTypeNames.TexCoord2fArray: Sdf.ValueTypeNames.TexCoord2hArray,
+    Sdf.ValueTypeNames.Float2Array: Sdf.ValueTypeNames.Half2Array,
+}
+
+
+def reduce_interpolation(values: np.ndarray, face_counts: np.ndarray, face_indices: np.ndarray, num_vertices: int) -> tuple[np.ndarray, str]:
+    """
+    Finds the narrowest interpolation that still holds the face-varying values exactly.
+
+    Args:
+        values (np.ndarray): One value (or row of components) per face-vertex.
+        face_counts (np.ndarray): Vertex count of every polygon.
+        face_indices (np.ndarray): Vertex index of every face-vertex.
+        num_vertices (int): Number of vertices of the mesh.
+
+    Returns:
+        tuple[np.ndarray, str]: The values at that interpolation, one for constant, one per face
+            for uniform, one per vertex for vertex, or the values as they are for faceVarying.
+    """
+    if not len(values) or np.array_equal(np.broadcast_to(values[:1], values.shape), values):
+        return values[:1], UsdGeom.Tokens.constant
+
+    face_values = values[np.cumsum(face_counts) - face_counts]
+    if np.array_equal(np.repeat(face_values, face_counts, axis=0), values):
+        return face_values, UsdGeom.Tokens.uniform
+
+    # Vertices no face uses keep zeros
+    vertex_values = np.zeros((num_vertices,) + values.shape[1:], dtype=values.dtype)
+    vertex_values[face_indices] = values
+    if np.array_equal(vertex_values[face_indices], values):
+        return vertex_values, UsdGeom.Tokens.vertex
+
+    return values, UsdGeom.Tokens.faceVarying
+
+
+def index_values(values: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Dedupes the values into unique values and an index per value.
+
+    Args:
+        values (np.ndarray): The primvar values.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray | None]: The unique values and the indices into them, or the
+            values as they are and None when every value is unique.
+    """
+    unique, indices = np.unique(values, axis=0, return_inverse=True)
+    if len(unique) == len(values):
+        return values, None
+    return unique, indices.reshape(-1).astype(np.int32)
+
+
+def index_assigned_values(values: np.ndarray, assigned: np.ndarray) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Dedupes the assigned values and points every unassigned one at a single zero value appended
+    after them, to be declared as the unauthoredValuesIndex of the primvar.
+
+    Args:
+        values (np.ndarray): One value (or row of components) per face-vertex.
+        assigned (np.ndarray): True for every face-vertex that holds a value.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: The unique values followed by the unassigned value,
+            the index into them per face-vertex and the index of the unassigned value.
+    """
+    unique, indices = index_values(values[assigned])
+    if indices is None:
+        indices = np.arange(len(unique), dtype=np.int32)
+    unassigned_index = len(unique)
+    all_indices = np.full(len(values), unassigned_index, dtype=np.int32)
+    all_indices[assigned] = indices
+    return np.concatenate((unique, np.zeros_like(values[:1]))), all_indices, unassigned_index
+
+
+def to_face_varying_indices(
+    indices: np.ndarray | None, value_count: int, interpolation: str, face_counts: np.ndarray, face_indices: np.ndarray) -> np.ndarray:
+    """
+    Expands the indices of a primvar of any interpolation to one index per face-vertex.
+
+    Args:
+        indices (np.ndarray | None): The primvar indices, None when it is not indexed.
+        value_count (int): Number of primvar values.
+        interpolation (str): The primvar interpolation.
+        face_counts (np.ndarray): Vertex count of every polygon.
+        face_indices (np.ndarray): Vertex index of every face-vertex.
+
+    Returns:
+        np.ndarray: Index into the primvar values per face-vertex.
+    """
+    if indices is None:
+        indices = np.arange(value_count, dtype=np.int32)
+    if interpolation == UsdGeom.Tokens.constant:
+        return np.zeros(len(face_indices), dtype=np.int32)
+    if interpolation == UsdGeom.Tokens.uniform:
+        return np.repeat(indices, face_counts)
+    if interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+        return indices[face_indices]
+    return indices
+
+
+def _dedupe_primvar(prim_data: PrimData, name: str, attribute: AttributeData) -> int:
+    values = np.asarray(attribute.value)
+    indices_attribute = prim_data.attributes.get(f"{name}:indices")
+    if len(values) < 2 or values.dtype.kind not in "biuf" or (indices_attribute and indices_attribute.time_samples):
+        return 0
+    if "unauthoredValuesIndex" in attribute.metadata:
+        # Merging the unassigned value with an equal assigned one would unassign that one
+        return 0
+
+    unique, inverse = index_values(values)
+    if inverse is None:
+        return 0
+    old_indices = np.asarray(indices_attribute.value, dtype=np.int32) if indices_attribute else None
+    indices = inverse if old_indices is None else inverse[old_indices]
+    before = values.nbytes + (0 if old_indices is None else old_indices.nbytes)
+    after = unique.nbytes + indices.nbytes
+    if after >= before:
+        return 0
+
+    attribute.value = attribute.type_name.type.pythonClass.FromNumpy(np.ascontiguousarray(unique))
+    prim_data.add_attribute(f"{name}:indices", Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(indices))
+    return before - after
+
+
+def _to_half_precision(attribute: AttributeData, max_error: float) -> int:
+    values = np.asarray(attribute.value)
+    with np.errstate(over="ignore"):
+        half = values.astype(np.float16)
+    # Values beyond the half range become inf and fail the check
+    if len(values) and not np.max(np.abs(half.astype(values.dtype) - values)) <= max_error:
+        return 0
+
+    attribute.type_name = HALF_PRECISION_TYPES[attribute.type_name]
+    attribute.value = attribute.type_name.type.pythonClass.FromNumpy(half)
+    return values.nbytes - half.nbytes
+
+
+def compact_primvars(prim_data: PrimData, half_precision_error: float | None = None) -> int:
+    """
+    Dedupes the values of every primvar of the prim into indexed form when that is smaller, and
+    optionally stores UV primvars in half precision. Time sampled primvars are left as they are, and
+    points stay in full precision: a half points attribute is not valid for the schema, so only the
+    primvar types of HALF_PRECISION_TYPES are converted.
+
+    Args:
+        prim_data (PrimData): The extracted prim, compacted in place.
+        half_precision_error (float | None, optional): Store a UV primvar as half precision when no
+            value moves by more than this. Defaults to None, full precision.
+
+    Returns:
+        int: Bytes saved on the primvar values and indices.
+    """
+    saved = 0
+    for name, attribute in list(prim_data.attributes.items()):
+        if not name.startswith("primvars:") or name.endswith(":indices"):
+            continue
+        if attribute.value is None or attribute.time_samples:
+            continue
+        saved += _dedupe_primvar(prim_data, name, attribute)
+        if half_precision_error is not None and attribute.type_name in HALF_PRECISION_TYPES:
+            saved += _to_half_precision(attribute, half_precision_error)
+    return saved
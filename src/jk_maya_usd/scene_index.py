@@ -0,0 +1,119 @@
+""" Single pass index of the Maya DAG used by the exporter traversal """
+
+from dataclasses import dataclass, field
+
+from maya.api import OpenMaya as om
+
+from jk_maya_usd.constants import DEFAULT_CAMERAS, USD_Type
+
+
+@dataclass
+class SceneNode:
+    """ Everything the exporter needs to know about a DAG node """
+    path: str
+    name: str
+    node_type: str
+    dag_path: om.MDagPath
+    uuid: str
+    usd_type: USD_Type | None = None
+    shape_path: om.MDagPath | None = None
+    children: list[str] = field(default_factory=list)
+
+
+class SceneIndex:
+    """
+    Walks the DAG once with om.MItDag and records the node type, USD type,
+    shape, UUID and children of every node, keyed by full DAG path.
+    """
+    def __init__(self):
+        self.nodes: dict[str, SceneNode] = {}
+        self.roots: list[str] = []
+        self.top: str | None = None
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.nodes
+
+    def __getitem__(self, path: str) -> SceneNode:
+        return self.nodes[path]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, path: str) -> SceneNode | None:
+        return self.nodes.get(path)
+
+    @classmethod
+    def build(cls, top_dag_node: str = "") -> "SceneIndex":
+        """
+        Builds the index for the whole scene, or for everything below top_dag_node.
+
+        Args:
+            top_dag_node (str, optional): Only index this node and its descendants. Defaults to the whole scene.
+
+        Returns:
+            SceneIndex: The index. Its roots are the transforms the exporter starts from.
+        """
+        index = cls()
+        dag_iter = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kInvalid)
+        if top_dag_node:
+            selection_list = om.MSelectionList()
+            selection_list.add(top_dag_node)
+            top_path = selection_list.getDagPath(0)
+            dag_iter.reset(top_path, om.MItDag.kDepthFirst, om.MFn.kInvalid)
+            top_dag_node = top_path.fullPathName()
+            index.top = top_dag_node
+
+        while not dag_iter.isDone():
+            dag_path = dag_iter.getPath()
+            dag_iter.next()
+            if not dag_path.length():
+                continue  # The world node
+
+            scene_node = index._add_node(dag_path)
+            parent = index.nodes.get(scene_node.path.rpartition('|')[0])
+
+            if dag_path.hasFn(om.MFn.kShape):
+                # Prefer a visible shape over an intermediate (deformer orig) shape
+                if parent is not None and (
+                    parent.shape_path is None or om.MFnDagNode(parent.shape_path).isIntermediateObject
+                ):
+                    parent.shape_path = scene_node.dag_path
+                continue
+
+            if parent is not None:
+                parent.children.append(scene_node.path)
+
+            if top_dag_node:
+                is_root = parent is not None and parent.path == top_dag_node
+            else:
+                is_root = parent is None and scene_node.path not in DEFAULT_CAMERAS
+            if is_root and dag_path.hasFn(om.MFn.kTransform):
+                index.roots.append(scene_node.path)
+
+        # A transform holding a shape is exported as that shape
+        for scene_node in index.nodes.values():
+            if scene_node.shape_path is not None:
+                scene_node.node_type = om.MFnDagNode(scene_node.shape_path).typeName
+
+        return index
+
+    def _add_node(self, dag_path: om.MDagPath) -> SceneNode:
+        dag_fn = om.MFnDagNode(dag_path)
+        path = dag_path.fullPathName()
+
+        usd_type = None
+        node_type = dag_fn.typeName
+        if node_type == 'transform' and dag_fn.hasAttribute("type"):
+            usd_type = list(USD_Type)[dag_fn.findPlug("type", False).asShort()]
+            node_type = usd_type.value
+
+        scene_node = SceneNode(
+            path=path,
+            name=dag_fn.name(),
+            node_type=node_type,
+            dag_path=om.MDagPath(dag_path),
+            uuid=dag_fn.uuid().asString(),
+            usd_type=usd_type,
+        )
+        self.nodes[path] = scene_node
+        return scene_node
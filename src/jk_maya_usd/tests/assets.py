@@ -0,0 +1,245 @@
+""" Procedural USD assets of any size for the benchmarks. Only needs usd-core. """
+
+import math
+
+import numpy as np
+from pxr import Gf, Sdf, UsdGeom, Vt
+
+from jk_maya_usd.usd_utilities import LayerWriter, PrimData
+
+
+def _grid_mesh_data(face_count: int) -> PrimData:
+    """Returns a square grid of at least face_count quads, with face-varying UVs."""
+    side = max(1, math.ceil(math.sqrt(face_count)))
+    grid = np.linspace(0.0, 1.0, side + 1, dtype=np.float32)
+    u, v = np.meshgrid(grid, grid)
+    uvs = np.column_stack((u.ravel(), v.ravel()))
+    points = np.column_stack((uvs[:, 0] * side, np.zeros(len(uvs), dtype=np.float32), uvs[:, 1] * side))
+
+    corners = (np.arange(side)[:, None] * (side + 1) + np.arange(side)[None, :]).ravel()
+    face_indices = np.column_stack((corners, corners + side + 1, corners + side + 2, corners + 1)).ravel()
+
+    mesh_data = PrimData("Mesh")
+    mesh_data.add_attribute(UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(points))
+    mesh_data.add_attribute(
+        UsdGeom.Tokens.extent, Sdf.ValueTypeNames.Float3Array, Vt.Vec3fArray([(0, 0, 0), (side, 0, side)])
+    )
+    mesh_data.add_attribute(
+        UsdGeom.Tokens.faceVertexCounts, Sdf.ValueTypeNames.IntArray, Vt.IntArray.FromNumpy(np.full(side * side, 4, dtype=np.int32))
+    )
+    face_indices = Vt.IntArray.FromNumpy(face_indices.astype(np.int32))
+    mesh_data.add_attribute(UsdGeom.Tokens.faceVertexIndices, Sdf.ValueTypeNames.IntArray, face_indices)
+    mesh_data.add_primvar(
+        "st", Sdf.ValueTypeNames.TexCoord2fArray, Vt.Vec2fArray.FromNumpy(uvs), UsdGeom.Tokens.faceVarying, face_indices
+    )
+    return mesh_data
+
+
+def _xform_data(translate) -> PrimData:
+    xform_data = PrimData("Xform")
+    xform_data.add_attribute("xformOp:translate", Sdf.ValueTypeNames.Double3, Gf.Vec3d(*translate))
+    xform_data.add_attribute(
+        UsdGeom.Tokens.xformOpOrder, Sdf.ValueTypeNames.TokenArray, Vt.TokenArray(["xformOp:translate"]), Sdf.VariabilityUniform
+    )
+    return xform_data
+
+
+def _save(layer: Sdf.Layer, writer: LayerWriter, root_path: Sdf.Path, author) -> int:
+    with Sdf.ChangeBlock():
+        writer.define_prim(root_path, PrimData("Xform"))
+        prim_count = 1 + author()
+    layer.defaultPrim = root_path.name
+    layer.Save()
+    return prim_count
+
+
+def build_mesh_asset(file_path: str, face_count: int) -> int:
+    """
+    Writes a single grid mesh of at least face_count quads under /Asset.
+
+    Args:
+        file_path (str): Where to save the asset.
+        face_count (int): Minimum number of faces.
+
+    Returns:
+        int: Number of prims authored.
+    """
+    layer = Sdf.Layer.CreateNew(file_path)
+    writer = LayerWriter(layer)
+    root_path = Sdf.Path("/Asset")
+
+    def _author():
+        writer.define_prim(root_path.AppendChild("grid"), _grid_mesh_data(face_count))
+        return 1
+
+    return _save(layer, writer, root_path, _author)
+
+
+def build_hierarchy_asset(file_path: str, prim_count: int, branching: int = 10) -> int:
+    """
+    Writes prim_count translated Xforms under /Asset, every prim holding up to branching children.
+
+    Args:
+        file_path (str): Where to save the asset.
+        prim_count (int): Number of Xforms below the root.
+        branching (int, optional): Children per prim. Defaults to 10.
+
+    Returns:
+        int: Number of prims authored.
+    """
+    layer = Sdf.Layer.CreateNew(file_path)
+    writer = LayerWriter(layer)
+    root_path = Sdf.Path("/Asset")
+
+    def _author():
+        paths = [root_path]
+        for index in range(prim_count):
+            path = paths[index // branching].AppendChild(f"node{index}")
+            writer.define_prim(path, _xform_data((index % branching, 1, 0)))
+            paths.append(path)
+        return prim_count
+
+    return _save(layer, writer, root_path, _author)
+
+
+def build_mesh_set_asset(file_path: str, mesh_count: int, face_count: int = 100) -> int:
+    """
+    Writes mesh_count translated grid meshes of at least face_count quads under /Asset.
+
+    Args:
+        file_path (str): Where to save the asset.
+        mesh_count (int): Number of meshes.
+        face_count (int, optional): Minimum number of faces of every mesh. Defaults to 100.
+
+    Returns:
+        int: Number of prims authored.
+    """
+    layer = Sdf.Layer.CreateNew(file_path)
+    writer = LayerWriter(layer)
+    root_path = Sdf.Path("/Asset")
+    mesh_data = _grid_mesh_data(face_count)
+
+    def _author():
+        for index in range(mesh_count):
+            prim_data = PrimData("Mesh", dict(mesh_data.attributes))
+            prim_data.attributes.update(_xform_data((index % 100 * 12, 0, index // 100 * 12)).attributes)
+            writer.define_prim(root_path.AppendChild(f"mesh{index}"), prim_data)
+        return mesh_count
+
+    return _save(layer, writer, root_path, _author)
+
+
+def build_nested_variant_asset(file_path: str, depth: int = 3, variant_count: int = 10) -> int:
+    """
+    Writes an asset whose root holds a variant set, every variant of which holds a child
+    with the next variant set, depth levels deep. The innermost variants hold a mesh.
+
+    Args:
+        file_path (str): Where to save the asset.
+        depth (int, optional): Number of nested variant sets. Defaults to 3.
+        variant_count (int, optional): Number of variants in every set. Defaults to 10.
+
+    Returns:
+        int: Number of prim specs authored, across all variants.
+    """
+    layer = Sdf.Layer.CreateNew(file_path)
+    writer = LayerWriter(layer)
+    root_path = Sdf.Path("/Asset")
+    mesh_data = _grid_mesh_data(1)
+
+    def _add_level(path: Sdf.Path, level: int) -> int:
+        if level == depth:
+            writer.define_prim(path.AppendChild("geo"), mesh_data)
+            return 1
+
+        prim_count = 0
+        variant_set_name = f"set{level}"
+        writer.add_variant_set(path, variant_set_name)
+        for index in range(variant_count):
+            with writer.variant_context(path, variant_set_name, f"variant{index}") as variant_path:
+                child_path = variant_path.AppendChild(f"level{level + 1}")
+                writer.define_prim(child_path, PrimData("Xform"))
+                prim_count += 1 + _add_level(child_path, level + 1)
+        writer.set_variant_selection(path, variant_set_name, "variant0")
+        return prim_count
+
+    return _save(layer, writer, root_path, lambda: _add_level(root_path, 0))
+
+
+def build_groom_asset(file_path: str, curve_count: int, cvs_per_curve: int = 8, curves_per_prim: int = 1) -> int:
+    """
+    Writes curve_count cubic NurbsCurves strands standing on a grid under /Asset.
+
+    Args:
+        file_path (str): Where to save the asset.
+        curve_count (int): Number of strands.
+        cvs_per_curve (int, optional): CVs of every strand. Defaults to 8.
+        curves_per_prim (int, optional): Strands packed into each NurbsCurves prim. Defaults to 1.
+
+    Returns:
+        int: Number of prims authored.
+    """
+    layer = Sdf.Layer.CreateNew(file_path)
+    writer = LayerWriter(layer)
+    root_path = Sdf.Path("/Asset")
+
+    degree = 3
+    spans = cvs_per_curve - degree
+    knots = np.concatenate(([0.0] * degree, np.arange(spans + 1, dtype=np.float64), [float(spans)] * degree))
+    side = max(1, math.ceil(math.sqrt(curve_count)))
+    heights = np.linspace(0.0, 1.0, cvs_per_curve, dtype=np.float32)
+
+    def _author():
+        prim_count = 0
+        for first in range(0, curve_count, curves_per_prim):
+            strands = np.arange(first, min(first + curves_per_prim, curve_count))
+            roots = np.column_stack((strands % side, np.zeros(len(strands)), strands // side)).astype(np.float32)
+            points = np.repeat(roots, cvs_per_curve, axis=0)
+            points[:, 1] = np.tile(heights, len(strands))
+            points[:, 0] += np.tile(heights * heights * 0.25, len(strands))
+
+            curve_data = PrimData("NurbsCurves")
+            curve_data.add_attribute(UsdGeom.Tokens.points, Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray.FromNumpy(points))
+            curve_data.add_attribute(
+                UsdGeom.Tokens.curveVertexCounts, Sdf.ValueTypeNames.IntArray, Vt.IntArray([cvs_per_curve] * len(strands))
+            )
+            curve_data.add_attribute(UsdGeom.Tokens.order, Sdf.ValueTypeNames.IntArray, Vt.IntArray([degree + 1] * len(strands)))
+            curve_data.add_attribute(
+                UsdGeom.Tokens.knots, Sdf.ValueTypeNames.DoubleArray, Vt.DoubleArray.FromNumpy(np.tile(knots, len(strands)))
+            )
+            writer.define_prim(root_path.AppendChild(f"strand{first}"), curve_data)
+            prim_count += 1
+        return prim_count
+
+    return _save(layer, writer, root_path, _author)
+
+
+# Builder, prim class it exercises, and the sizes each family is benchmarked at
+ASSET_FAMILIES = {
+    "mesh": (build_mesh_asset, "Mesh", (1_000, 10_000, 100_000, 1_000_000, 5_000_000)),
+    "hierarchy": (build_hierarchy_asset, "Xform", (10, 100, 1_000, 10_000, 100_000)),
+    "variants": (build_nested_variant_asset, "Xform", (2, 3, 4)),
+    "groom": (build_groom_asset, "NurbsCurve", (1_000, 10_000, 100_000)),
+}
+
+QUICK_SIZES = {
+    "mesh": (1_000, 10_000),
+    "hierarchy": (10, 100),
+    "variants": (2,),
+    "groom": (100,),
+}
+
+
+def build_asset(family: str, size: int, file_path: str) -> int:
+    """
+    Writes one procedural asset of a family in ASSET_FAMILIES.
+
+    Args:
+        family (str): mesh (faces), hierarchy (prims), variants (nesting depth) or groom (strands).
+        size (int): The size of the asset, in the unit of its family.
+        file_path (str): Where to save the asset.
+
+    Returns:
+        int: Number of prims authored.
+    """
+    return ASSET_FAMILIES[family][0](file_path, size)
@@ -0,0 +1,859 @@
+""" Benchmarks for the Maya side of the exporter and importer. Run these under mayapy. """
+
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+from maya import cmds
+from maya.api import OpenMaya as om
+from pxr import Gf, Sdf, Tf, Usd, UsdGeom, Vt
+
+from jk_maya_usd import array_bridge
+from jk_maya_usd.exporter import CustomUSDExporter
+from jk_maya_usd.importer import CustomUSDImporter
+from jk_maya_usd.instrumentation import set_log_level
+from jk_maya_usd.mesh_cache import MeshCache
+from jk_maya_usd.prims import usd_to_maya_prims
+from jk_maya_usd.prims.mesh import Mesh, MeshBuffers
+from jk_maya_usd.maya_utilities import get_mesh_fn_from_dag, get_node_type
+from jk_maya_usd.scene_index import SceneIndex
+from jk_maya_usd.tests.assets import (
+    ASSET_FAMILIES,
+    QUICK_SIZES,
+    build_asset,
+    build_groom_asset,
+    build_mesh_set_asset,
+    build_nested_variant_asset,
+)
+from jk_maya_usd.tests.usd_benchmarks import peak_rss_mb, record_result, write_results
+from jk_maya_usd.tests.utilities import compare_usd_stages
+from jk_maya_usd.usd_utilities import PrimData
+
+logger = logging.getLogger(__name__)
+
+# Smaller arguments per benchmark for run(quick=True), keyed by benchmark name
+QUICK_ARGUMENTS = {
+    "mesh_topology_export": {"subdivisions": (10, 100)},
+    "vertex_color_import": {"subdivisions": (10, 50)},
+    "primvar_sets_export": {"subdivisions": (100,)},
+    "scene_index": {"node_counts": (1_000,)},
+    "nested_variant_import": {"depth": 2},
+    "animation_export": {"frame_counts": (100,)},
+    "clip_streaming": {"frame_counts": (200, 500)},
+    "transform_layout": {"node_counts": (1_000,)},
+    "update_import": {"mesh_counts": (1_000,)},
+    "cached_import": {"mesh_counts": (100,)},
+    "parallel_read": {"mesh_counts": (1_000,), "face_count": 500},
+    "groom_curves": {"curve_counts": (1_000,)},
+    "compact_primvars": {"mesh_counts": (100,)},
+    "department_export": {"mesh_counts": (100,)},
+    "round_trip": {"sizes": QUICK_SIZES},
+    "array_bridge": {"element_counts": (10_000,)},
+}
+
+
+def _time_call(func, *args, repeat: int = 3, **kwargs) -> float:
+    """Returns the best wall clock time in seconds of calling func with args and kwargs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _legacy_mesh_topology(mesh_fn: om.MFnMesh, uv_set_name: str):
+    """The per face-vertex loop the exporter used before the bulk path."""
+    face_counts = []
+    face_connects = []
+    uv_indices = []
+    for i in range(mesh_fn.numPolygons):
+        vtx_ids = mesh_fn.getPolygonVertices(i)
+        face_counts.append(len(vtx_ids))
+        face_connects.extend(vtx_ids)
+        for j in range(len(vtx_ids)):
+            uv_indices.append(mesh_fn.getPolygonUVid(i, j, uv_set_name))
+    return face_counts, face_connects, uv_indices
+
+
+def _bulk_mesh_topology(mesh_fn: om.MFnMesh, uv_set_name: str):
+    face_counts, face_connects = mesh_fn.getVertices()
+    face_counts = np.array(face_counts, dtype=np.int32)
+    return face_counts, Mesh._get_uv_indices(mesh_fn, uv_set_name, face_counts, len(face_connects))
+
+
+def benchmark_mesh_topology_export(subdivisions=(10, 100, 500, 1000)) -> list[dict]:
+    """
+    Times the legacy and bulk topology/UV export on planes of increasing density.
+
+    Args:
+        subdivisions (tuple[int]): Width and height subdivisions of each test plane.
+
+    Returns:
+        list[dict]: One result per plane with the cost per face-vertex in nanoseconds.
+    """
+    results = []
+    for subdivision in subdivisions:
+        plane = cmds.polyPlane(sx=subdivision, sy=subdivision, ch=False)[0]
+        mesh_fn = get_mesh_fn_from_dag(plane)
+        uv_set_name = mesh_fn.currentUVSetName()
+        num_faces = mesh_fn.numPolygons
+        num_face_vertices = len(mesh_fn.getVertices()[1])
+
+        legacy = _time_call(_legacy_mesh_topology, mesh_fn, uv_set_name, repeat=1)
+        bulk = _time_call(_bulk_mesh_topology, mesh_fn, uv_set_name)
+        cmds.delete(plane)
+
+        result = {
+            "faces": num_faces,
+            "face_vertices": num_face_vertices,
+            "legacy_ns_per_face_vertex": legacy / num_face_vertices * 1e9,
+            "bulk_ns_per_face_vertex": bulk / num_face_vertices * 1e9,
+            "speedup": legacy / bulk if bulk else float("inf"),
+        }
+        record_result(results, result)
+    return results
+
+
+def _legacy_vertex_colors(dag_path: str, colors: np.ndarray):
+    """The per vertex polyColorPerVertex loop the importer used before the bulk path."""
+    cmds.polyColorSet(dag_path, create=True, colorSet='displayColor', representation='RGB')
+    cmds.polyColorSet(dag_path, currentColorSet=True, colorSet='displayColor')
+    for i, color in enumerate(colors):
+        cmds.polyColorPerVertex(f"{dag_path}.vtx[{i}]", rgb=tuple(color), colorDisplayOption=True)
+
+
+def _bulk_vertex_colors(mesh_fn: om.MFnMesh, prim: Usd.Prim, face_counts: np.ndarray, face_indices: np.ndarray):
+    """The displayColor read and bulk color call of the mesh import."""
+    mesh = Mesh(None)
+    buffers = MeshBuffers(np.zeros((0, 3), dtype=np.float32), face_counts, face_indices)
+    buffers.colors, buffers.color_interpolation, buffers.color_has_alpha = mesh._read_display_color(prim, face_counts, face_indices)
+    mesh._apply_display_color(mesh_fn, buffers)
+
+
+def benchmark_vertex_color_import(subdivisions=(10, 50, 100)) -> list[dict]:
+    """
+    Times the legacy per vertex and the bulk vertex color import on planes of increasing density.
+
+    Args:
+        subdivisions (tuple[int]): Width and height subdivisions of each test plane.
+
+    Returns:
+        list[dict]: One result per plane with the cost per vertex in microseconds.
+    """
+    stage = Usd.Stage.CreateInMemory()
+    usd_mesh = UsdGeom.Mesh.Define(stage, "/colors")
+    primvar = usd_mesh.CreateDisplayColorPrimvar(interpolation=UsdGeom.Tokens.vertex)
+
+    results = []
+    for subdivision in subdivisions:
+        legacy_plane = cmds.polyPlane(sx=subdivision, sy=subdivision, ch=False)[0]
+        bulk_plane = cmds.polyPlane(sx=subdivision, sy=subdivision, ch=False)[0]
+        mesh_fn = get_mesh_fn_from_dag(bulk_plane)
+        face_counts, face_indices = mesh_fn.getVertices()
+        num_vertices = mesh_fn.numVertices
+
+        colors = np.random.default_rng(subdivision).random((num_vertices, 3), dtype=np.float32)
+        primvar.Set(Vt.Vec3fArray.FromNumpy(colors))
+
+        legacy = _time_call(_legacy_vertex_colors, legacy_plane, colors, repeat=1)
+        bulk = _time_call(
+            _bulk_vertex_colors,
+            mesh_fn,
+            usd_mesh.GetPrim(),
+            np.array(face_counts, dtype=np.int32),
+            np.array(face_indices, dtype=np.int32),
+            repeat=1,
+        )
+        cmds.delete(legacy_plane, bulk_plane)
+
+        result = {
+            "vertices": num_vertices,
+            "legacy_us_per_vertex": legacy / num_vertices * 1e6,
+            "bulk_us_per_vertex": bulk / num_vertices * 1e6,
+            "speedup": legacy / bulk if bulk else float("inf"),
+        }
+        record_result(results, result)
+    return results
+
+
+def _legacy_display_color(mesh_fn: om.MFnMesh):
+    """The per vertex Gf.Vec3f loop the exporter used for the current color set only."""
+    colors = mesh_fn.getVertexColors()
+    rgb = [Gf.Vec3f(color.r, color.g, color.b) for color in colors]
+    unique_colors = {tuple(round(channel, 4) for channel in color) for color in rgb}
+    return rgb[:1] if len(unique_colors) == 1 else rgb
+
+
+def benchmark_primvar_sets_export(subdivisions=(100, 500), uv_sets: int = 4, color_sets: int = 3) -> list[dict]:
+    """
+    Times the export of every UV and color set of planes carrying several of each, against
+    the legacy export of the current color set alone.
+
+    Args:
+        subdivisions (tuple[int]): Width and height subdivisions of each test plane.
+        uv_sets (int, optional): UV sets added next to map1. Defaults to 4.
+        color_sets (int, optional): Color sets with random per vertex colors. Defaults to 3.
+
+    Returns:
+        list[dict]: One result per plane with both times and the primvars written.
+    """
+    results = []
+    for subdivision in subdivisions:
+        plane = cmds.polyPlane(sx=subdivision, sy=subdivision, ch=False)[0]
+        for index in range(uv_sets):
+            cmds.polyUVSet(plane, copy=True, uvSet="map1", newUVSet=f"uvSet{index}")
+        mesh_fn = get_mesh_fn_from_dag(plane)
+        rng = np.random.default_rng(subdivision)
+        vertex_ids = om.MIntArray(range(mesh_fn.numVertices))
+        for index in range(color_sets):
+            color_set = mesh_fn.createColorSet(f"colorSet{index}", False)
+            mesh_fn.setCurrentColorSetName(color_set)
+            mesh_fn.setVertexColors(array_bridge.numpy_to_colors(rng.random((mesh_fn.numVertices, 4), dtype=np.float32)), vertex_ids)
+
+        legacy = _time_call(_legacy_display_color, mesh_fn, repeat=1)
+        prim_data = PrimData("Mesh")
+        bulk = _time_call(Mesh(None)._export_mesh_data, mesh_fn, prim_data, repeat=1)
+        num_vertices = mesh_fn.numVertices
+        cmds.delete(plane)
+
+        result = {
+            "vertices": num_vertices,
+            "uv_sets": uv_sets + 1,
+            "color_sets": color_sets,
+            "legacy_current_color_set_s": legacy,
+            "bulk_all_sets_s": bulk,
+            "primvars": sorted(name for name in prim_data.attributes if name.startswith("primvars:")),
+        }
+        record_result(results, result)
+    return results
+
+
+def _legacy_scene_walk(node: str) -> int:
+    """The cmds based walk the exporter traversal used before the scene index."""
+    get_node_type(node)
+    children = cmds.listRelatives(node, children=True, fullPath=True) or []
+    return 1 + sum(_legacy_scene_walk(child) for child in children)
+
+
+def benchmark_scene_index(node_counts=(1000, 10000)) -> list[dict]:
+    """
+    Times the cmds based DAG walk against building a SceneIndex on hierarchies of increasing size.
+
+    Args:
+        node_counts (tuple[int]): Number of transforms in each test hierarchy.
+
+    Returns:
+        list[dict]: One result per hierarchy with the cost per node in microseconds.
+    """
+    results = []
+    for node_count in node_counts:
+        root = cmds.createNode("transform", name="benchmark_root")
+        parents = [root]
+        for i in range(node_count):
+            parents.append(cmds.createNode("transform", parent=parents[i // 10]))
+        root = cmds.ls(root, long=True)[0]
+
+        legacy = _time_call(_legacy_scene_walk, root, repeat=1)
+        indexed = _time_call(SceneIndex.build, root, repeat=1)
+        cmds.delete(root)
+
+        result = {
+            "nodes": node_count,
+            "legacy_us_per_node": legacy / node_count * 1e6,
+            "index_us_per_node": indexed / node_count * 1e6,
+            "speedup": legacy / indexed if indexed else float("inf"),
+        }
+        record_result(results, result)
+    return results
+
+
+def _legacy_variant_walk(stage: Usd.Stage, prim: Usd.Prim) -> int:
+    """The old importer walk, which selected every variant on the stage and also re-walked the children."""
+    node_type = prim.GetTypeName()
+    if node_type in usd_to_maya_prims:
+        usd_to_maya_prims[node_type](None).read_prim(prim)
+
+    visited = 1
+    variant_sets = prim.GetVariantSets()
+    for variant_set_name in variant_sets.GetNames():
+        variant_set = variant_sets.GetVariantSet(variant_set_name)
+        original_variant = variant_set.GetVariantSelection()
+        for variant in variant_set.GetVariantNames():
+            variant_set.SetVariantSelection(variant)
+            for child in prim.GetChildren():
+                visited += _legacy_variant_walk(stage, child)
+        variant_set.SetVariantSelection(original_variant)
+    else:
+        for child in prim.GetChildren():
+            visited += _legacy_variant_walk(stage, child)
+    return visited
+
+
+class _ResyncCounter:
+    """Counts the prims a stage had to recompose while it was listening."""
+    def __init__(self, stage: Usd.Stage):
+        self.resyncs = 0
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_changed, stage)
+
+    def _on_changed(self, notice, stage):
+        self.resyncs += len(notice.GetResyncedPaths())
+
+    def revoke(self):
+        self._listener.Revoke()
+
+
+def benchmark_nested_variant_import(depth: int = 3, variant_count: int = 10) -> dict:
+    """
+    Times planning the import of an asset with nested variant sets, the legacy
+    stage-editing walk against the session layer walk of CustomUSDImporter.
+
+    Args:
+        depth (int, optional): Number of nested variant sets. Defaults to 3.
+        variant_count (int, optional): Number of variants in every set. Defaults to 10.
+
+    Returns:
+        dict: Timings, prims visited and recompositions of both walks.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "nested_variants.usda")
+        build_nested_variant_asset(file_path, depth, variant_count)
+
+        # The session walk goes first, the legacy walk edits the shared root layer
+        importer = CustomUSDImporter()
+        importer._open_stage(file_path)
+        counter = _ResyncCounter(importer.stage)
+        planned = _time_call(importer._traverse_prim, importer.stage.GetPseudoRoot(), None, repeat=1)
+        counter.revoke()
+        session_dirty = importer.stage.GetRootLayer().dirty
+
+        legacy_stage = Usd.Stage.Open(file_path)
+        legacy_counter = _ResyncCounter(legacy_stage)
+        legacy_visited = []
+        legacy = _time_call(lambda: legacy_visited.append(_legacy_variant_walk(legacy_stage, legacy_stage.GetPseudoRoot())), repeat=1)
+        legacy_counter.revoke()
+
+        result = {
+            "variant_subtrees": sum(variant_count ** level for level in range(1, depth + 1)),
+            "session_s": planned,
+            "session_nodes_planned": len(importer.nodes),
+            "session_resyncs": counter.resyncs,
+            "legacy_s": legacy,
+            "legacy_prims_visited": legacy_visited[0],
+            "legacy_resyncs": legacy_counter.resyncs,
+            "session_source_layer_dirty": session_dirty,
+            "legacy_source_layer_dirty": legacy_stage.GetRootLayer().dirty,
+            "speedup": legacy / planned if planned else float("inf"),
+        }
+    logger.info("%s", result)
+    return result
+
+
+def _build_deforming_character(subdivisions: int, frame_count: int) -> str:
+    """Creates a dense sphere deformed by a keyed wave deformer, parented under a keyed root."""
+    root = cmds.createNode("transform", name="benchmark_character")
+    sphere = cmds.polySphere(sx=subdivisions, sy=subdivisions, ch=False)[0]
+    sphere = cmds.parent(sphere, root)[0]
+    wave = cmds.nonLinear(sphere, type="wave")[0]
+    cmds.setKeyframe(wave, attribute="offset", time=1, value=0)
+    cmds.setKeyframe(wave, attribute="offset", time=frame_count, value=10)
+    cmds.setKeyframe(root, attribute="translateY", time=1, value=0)
+    cmds.setKeyframe(root, attribute="translateY", time=frame_count, value=frame_count * 0.01)
+    return cmds.ls(root, long=True)[0]
+
+
+def benchmark_animation_export(frame_counts=(100, 1000), subdivisions: int = 100) -> list[dict]:
+    """
+    Times exporting a deforming mesh under an animated transform over frame ranges of increasing length.
+
+    Args:
+        frame_counts (tuple[int]): Length of each exported frame range.
+        subdivisions (int): Axis and height subdivisions of the deformed sphere.
+
+    Returns:
+        list[dict]: One result per frame range with the cost per frame in milliseconds.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for frame_count in frame_counts:
+            root = _build_deforming_character(subdivisions, frame_count)
+            file_path = os.path.join(temp_dir, f"animation_{frame_count}.usdc")
+
+            elapsed = _time_call(CustomUSDExporter().export_to_usd, file_path, root, batch_authoring=True, frame_range=(1, frame_count), repeat=1)
+            cmds.delete(root)
+
+            stage = Usd.Stage.Open(file_path)
+            points = UsdGeom.Mesh(next(prim for prim in stage.Traverse() if prim.IsA(UsdGeom.Mesh))).GetPointsAttr()
+            result = {
+                "frames": frame_count,
+                "vertices": len(points.Get(1)),
+                "point_samples": points.GetNumTimeSamples(),
+                "ms_per_frame": elapsed / frame_count * 1e3,
+                "bytes": os.path.getsize(file_path),
+            }
+            record_result(results, result)
+    return results
+
+
+def benchmark_clip_streaming(frame_counts=(500, 5000), clip_frames: int = 100, subdivisions: int = 100) -> list[dict]:
+    """
+    Streams a deforming mesh into value clips over frame ranges of increasing length. The peak
+    memory of the process should not grow with the length of the range.
+
+    Args:
+        frame_counts (tuple[int]): Length of each exported frame range, shortest first.
+        clip_frames (int): Frames per clip layer.
+        subdivisions (int): Axis and height subdivisions of the deformed sphere.
+
+    Returns:
+        list[dict]: One result per frame range with the cost per frame and the peak memory after it.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for frame_count in frame_counts:
+            root = _build_deforming_character(subdivisions, frame_count)
+            file_path = os.path.join(temp_dir, f"stream_{frame_count}.usda")
+
+            elapsed = _time_call(CustomUSDExporter().export_to_usd, file_path, root, frame_range=(1, frame_count), clip_frames=clip_frames, repeat=1)
+            cmds.delete(root)
+
+            result = {
+                "frames": frame_count,
+                "clips": len([name for name in os.listdir(temp_dir) if name.startswith(f"stream_{frame_count}.clip")]),
+                "ms_per_frame": elapsed / frame_count * 1e3,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+            record_result(results, result)
+    return results
+
+
+def _build_transform_layout(node_count: int) -> str:
+    """Creates node_count transforms with random TRS, rotate orders, pivots and shear, ten children per parent."""
+    rng = np.random.default_rng(node_count)
+    root = cmds.createNode("transform", name="benchmark_layout")
+    nodes = [root]
+    for index in range(node_count):
+        node = cmds.createNode("transform", parent=nodes[index // 10])
+        cmds.setAttr(f"{node}.translate", *rng.uniform(-10, 10, 3))
+        cmds.setAttr(f"{node}.rotate", *rng.uniform(-180, 180, 3))
+        cmds.setAttr(f"{node}.scale", *rng.uniform(0.5, 2, 3))
+        cmds.setAttr(f"{node}.shear", *rng.uniform(-0.2, 0.2, 3))
+        cmds.setAttr(f"{node}.rotatePivot", *rng.uniform(-1, 1, 3))
+        cmds.setAttr(f"{node}.rotateOrder", int(rng.integers(6)))
+        nodes.append(node)
+    return cmds.ls(root, long=True)[0]
+
+
+def _max_world_matrix_error(original_root: str, imported_root: str, samples: int = 100) -> float:
+    original = cmds.listRelatives(original_root, allDescendents=True, fullPath=True, type="transform")
+    imported = cmds.listRelatives(imported_root, allDescendents=True, fullPath=True, type="transform")
+    # Both hierarchies list their nodes in the same order
+    indices = np.linspace(0, len(original) - 1, min(samples, len(original)), dtype=int)
+    return max(
+        float(np.max(np.abs(
+            np.array(cmds.xform(original[index], query=True, worldSpace=True, matrix=True))
+            - np.array(cmds.xform(imported[index], query=True, worldSpace=True, matrix=True))
+        )))
+        for index in indices
+    )
+
+
+def benchmark_transform_layout(node_counts=(10_000, 100_000)) -> list[dict]:
+    """
+    Times exporting transform layouts with translate/rotate/scale ops and with matrix_transforms,
+    then imports the matrix export and checks its world matrices against the original.
+
+    Args:
+        node_counts (tuple[int]): Number of transforms in each layout.
+
+    Returns:
+        list[dict]: One result per layout with the cost per transform in microseconds.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for node_count in node_counts:
+            root = _build_transform_layout(node_count)
+            trs_path = os.path.join(temp_dir, f"layout_{node_count}_trs.usdc")
+            matrix_path = os.path.join(temp_dir, f"layout_{node_count}_matrix.usdc")
+
+            trs_export = _time_call(CustomUSDExporter().export_to_usd, trs_path, root, batch_authoring=True, repeat=1)
+            matrix_export = _time_call(CustomUSDExporter().export_to_usd, matrix_path, root, batch_authoring=True, matrix_transforms=True, repeat=1)
+
+            group = cmds.ls(cmds.createNode("transform", name="benchmark_import"), long=True)[0]
+            matrix_import = _time_call(CustomUSDImporter().import_from_usd, matrix_path, parent=group, repeat=1)
+
+            error = _max_world_matrix_error(root, group)
+            cmds.delete(root, group)
+
+            result = {
+                "transforms": node_count,
+                "trs_export_us_per_node": trs_export / node_count * 1e6,
+                "matrix_export_us_per_node": matrix_export / node_count * 1e6,
+                "matrix_import_us_per_node": matrix_import / node_count * 1e6,
+                "max_world_matrix_error": error,
+            }
+            record_result(results, result)
+    return results
+
+
+def _move_meshes(file_path: str, every: int) -> int:
+    """Offsets the points of every nth mesh of a mesh set asset, in place. Returns how many moved."""
+    layer = Sdf.Layer.FindOrOpen(file_path)
+    moved = 0
+    with Sdf.ChangeBlock():
+        for prim_spec in list(layer.GetPrimAtPath("/Asset").nameChildren)[::every]:
+            points_spec = prim_spec.attributes[UsdGeom.Tokens.points]
+            points_spec.default = Vt.Vec3fArray.FromNumpy(np.asarray(points_spec.default) + np.float32(0.5))
+            moved += 1
+    layer.Save()
+    return moved
+
+
+def benchmark_update_import(mesh_counts=(1_000, 5_000), every: int = 100) -> list[dict]:
+    """
+    Imports a set of meshes, moves the points of every nth mesh in the file, then times a full
+    re-import against an update import of the same file, which only pushes the moved points.
+
+    Args:
+        mesh_counts (tuple[int]): Number of meshes of each set.
+        every (int, optional): Move every nth mesh. Defaults to 100.
+
+    Returns:
+        list[dict]: One result per set with both import times and the nodes updated, created and deleted.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mesh_count in mesh_counts:
+            file_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}.usdc")
+            build_mesh_set_asset(file_path, mesh_count)
+            cmds.file(new=True, force=True)
+            group = cmds.ls(cmds.createNode("transform", name="update_import"), long=True)[0]
+            CustomUSDImporter().import_from_usd(file_path, parent=group)
+            moved = _move_meshes(file_path, every)
+
+            full_group = cmds.ls(cmds.createNode("transform", name="full_import"), long=True)[0]
+            full_import = _time_call(CustomUSDImporter().import_from_usd, file_path, parent=full_group, repeat=1)
+            importer = CustomUSDImporter()
+            update_import = _time_call(importer.import_from_usd, file_path, parent=group, update=True, repeat=1)
+            cmds.file(new=True, force=True)
+
+            counters = importer.instrumentation.counters
+            result = {
+                "meshes": mesh_count,
+                "moved": moved,
+                "full_import_s": full_import,
+                "update_import_s": update_import,
+                "speedup": full_import / update_import,
+                "updated": counters.get("updated", 0),
+                "updated_meshes": counters.get("updated meshes", 0),
+                "deleted": counters.get("deleted", 0),
+            }
+            record_result(results, result)
+    return results
+
+
+def benchmark_cached_import(mesh_counts=(1_000, 5_000), face_count: int = 2_500) -> list[dict]:
+    """
+    Imports a set of meshes without a mesh cache, then with a cold cache, a warm memory cache
+    and a warm disk cache, as an artist importing the same asset again would.
+
+    Args:
+        mesh_counts (tuple[int]): Number of meshes of each set.
+        face_count (int, optional): Faces of every mesh. Defaults to 2,500.
+
+    Returns:
+        list[dict]: One result per set with the import time and read phase of every run.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mesh_count in mesh_counts:
+            file_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}.usdc")
+            build_mesh_set_asset(file_path, mesh_count, face_count)
+            cache_directory = os.path.join(temp_dir, f"cache_{mesh_count}")
+            cache = MeshCache(cache_directory, memory_limit_mb=8192, disk_limit_mb=8192)
+
+            result = {"meshes": mesh_count, "faces_per_mesh": face_count}
+            runs = (("uncached", None), ("cold", cache), ("memory", cache), ("disk", MeshCache(cache_directory)))
+            for run_name, mesh_cache in runs:
+                cmds.file(new=True, force=True)
+                importer = CustomUSDImporter(mesh_cache=mesh_cache)
+                result[f"{run_name}_import_s"] = _time_call(importer.import_from_usd, file_path, repeat=1)
+                result[f"{run_name}_plan_s"] = importer.instrumentation.phases["plan"]
+            cmds.file(new=True, force=True)
+            record_result(results, result)
+    return results
+
+
+def benchmark_parallel_read(mesh_counts=(1_000, 5_000), face_count: int = 2_500, worker_counts=(1, 2, 4, 8)) -> list[dict]:
+    """
+    Times the planning phase of an import, which walks the stage and reads every prim into
+    buffers, with the reads running on pools of worker_counts threads.
+
+    Args:
+        mesh_counts (tuple[int]): Number of meshes of each set.
+        face_count (int, optional): Faces of every mesh. Defaults to 2,500.
+        worker_counts (tuple[int]): Read threads to time. 1 reads on the main thread.
+
+    Returns:
+        list[dict]: One result per set with the planning time and speedup of every thread count.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mesh_count in mesh_counts:
+            file_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}.usdc")
+            build_mesh_set_asset(file_path, mesh_count, face_count)
+
+            result = {"meshes": mesh_count, "faces_per_mesh": face_count, "cpu_count": os.cpu_count()}
+            for workers in worker_counts:
+                cmds.file(new=True, force=True)
+                importer = CustomUSDImporter()
+                importer.import_from_usd(file_path, max_workers=workers)
+                result[f"plan_s_{workers}_workers"] = importer.instrumentation.phases["plan"]
+                result[f"speedup_{workers}_workers"] = result[f"plan_s_{worker_counts[0]}_workers"] / result[f"plan_s_{workers}_workers"]
+            cmds.file(new=True, force=True)
+            record_result(results, result)
+    return results
+
+
+def benchmark_groom_curves(curve_counts=(1_000, 10_000), cvs_per_curve: int = 8) -> list[dict]:
+    """
+    Times a groom exported as one NurbsCurves prim per strand against the strands packed into
+    a single prim with curve_groups, and the import of both files.
+
+    Args:
+        curve_counts (tuple[int]): Number of strands of each groom.
+        cvs_per_curve (int, optional): CVs of every strand. Defaults to 8.
+
+    Returns:
+        list[dict]: One result per groom with the export and import times of both layouts.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for curve_count in curve_counts:
+            source_path = os.path.join(temp_dir, f"groom_{curve_count}.usdc")
+            build_groom_asset(source_path, curve_count, cvs_per_curve)
+            cmds.file(new=True, force=True)
+            group = cmds.ls(cmds.createNode("transform", name="benchmark_groom"), long=True)[0]
+            CustomUSDImporter().import_from_usd(source_path, parent=group)
+            asset = cmds.listRelatives(group, children=True, fullPath=True)[0]
+
+            result = {"curves": curve_count, "cvs_per_curve": cvs_per_curve}
+            for layout, curve_groups in (("per_curve", None), ("packed", [asset])):
+                export_path = os.path.join(temp_dir, f"groom_{curve_count}_{layout}.usdc")
+                result[f"export_s_{layout}"] = _time_call(
+                    CustomUSDExporter().export_to_usd, export_path, group, batch_authoring=True, curve_groups=curve_groups, repeat=1
+                )
+                result[f"prims_{layout}"] = sum(1 for _ in Usd.Stage.Open(export_path).Traverse())
+
+            for layout in ("per_curve", "packed"):
+                cmds.file(new=True, force=True)
+                result[f"import_s_{layout}"] = _time_call(
+                    CustomUSDImporter().import_from_usd, os.path.join(temp_dir, f"groom_{curve_count}_{layout}.usdc"), repeat=1
+                )
+            result["imported_curves_packed"] = len(cmds.ls(type="nurbsCurve"))
+
+            cmds.file(new=True, force=True)
+            result["export_speedup"] = result["export_s_per_curve"] / result["export_s_packed"]
+            result["import_speedup"] = result["import_s_per_curve"] / result["import_s_packed"]
+            record_result(results, result)
+    return results
+
+
+def benchmark_compact_primvars(mesh_counts=(100, 1_000), face_count: int = 2_500, half_precision_error: float = 1e-3) -> list[dict]:
+    """
+    Exports imported mesh sets with full precision primvars, with compacted primvars and
+    with compacted half precision UVs, and compares the size of the layers.
+
+    Args:
+        mesh_counts (tuple[int]): Number of meshes of each set.
+        face_count (int, optional): Faces of every mesh. Defaults to 2,500.
+        half_precision_error (float, optional): Error bound of the half precision export. Defaults to 1e-3.
+
+    Returns:
+        list[dict]: One result per set with the export time, layer size and reported savings of each mode.
+    """
+    modes = {
+        "full": {},
+        "compact": {"compact_primvars": True},
+        "half": {"compact_primvars": True, "half_precision_error": half_precision_error},
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mesh_count in mesh_counts:
+            source_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}.usdc")
+            build_mesh_set_asset(source_path, mesh_count, face_count)
+            cmds.file(new=True, force=True)
+            group = cmds.ls(cmds.createNode("transform", name="benchmark_compact"), long=True)[0]
+            CustomUSDImporter().import_from_usd(source_path, parent=group)
+
+            result = {"meshes": mesh_count, "faces_per_mesh": face_count}
+            for mode, options in modes.items():
+                export_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}_{mode}.usdc")
+                exporter = CustomUSDExporter()
+                result[f"export_s_{mode}"] = _time_call(exporter.export_to_usd, export_path, group, batch_authoring=True, repeat=1, **options)
+                result[f"layer_mb_{mode}"] = os.path.getsize(export_path) / 1024 / 1024
+                result[f"bytes_saved_{mode}"] = sum(exporter.bytes_saved.values())
+            cmds.file(new=True, force=True)
+            record_result(results, result)
+    return results
+
+
+def benchmark_department_export(mesh_counts=(100, 1_000), face_count: int = 2_500) -> list[dict]:
+    """
+    Times a single layer export of imported mesh sets against the department split export,
+    and against re-exporting only the UV layer.
+
+    Args:
+        mesh_counts (tuple[int]): Number of meshes of each set.
+        face_count (int, optional): Faces of every mesh. Defaults to 2,500.
+
+    Returns:
+        list[dict]: One result per set with the time of every export.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mesh_count in mesh_counts:
+            source_path = os.path.join(temp_dir, f"mesh_set_{mesh_count}.usdc")
+            build_mesh_set_asset(source_path, mesh_count, face_count)
+            cmds.file(new=True, force=True)
+            group = cmds.ls(cmds.createNode("transform", name="benchmark_departments"), long=True)[0]
+            CustomUSDImporter().import_from_usd(source_path, parent=group)
+
+            single_path = os.path.join(temp_dir, f"single_{mesh_count}.usdc")
+            split_path = os.path.join(temp_dir, f"split_{mesh_count}.usdc")
+            exporter = CustomUSDExporter()
+            result = {
+                "meshes": mesh_count,
+                "faces_per_mesh": face_count,
+                "single_layer_s": _time_call(exporter.export_to_usd, single_path, group, repeat=1),
+                "departments_s": _time_call(exporter.export_departments, split_path, group, repeat=1),
+                "uv_only_s": _time_call(exporter.export_departments, split_path, group, departments=["UV"], repeat=1),
+            }
+            diff = compare_usd_stages(split_path, single_path, max_differences=100, metadata=False)
+            result["differences"] = diff["difference_count"]
+            cmds.file(new=True, force=True)
+            record_result(results, result)
+    return results
+
+
+def benchmark_round_trip(sizes: dict[str, tuple] | None = None, tolerance: float = 1e-4) -> list[dict]:
+    """
+    Imports every procedural asset, exports it back and diffs the export against the source.
+    Each asset family exercises one prim class of jk_maya_usd.prims.
+
+    Args:
+        sizes (dict[str, tuple] | None, optional): Sizes per asset family. Defaults to the full sizes of ASSET_FAMILIES.
+        tolerance (float, optional): Numeric tolerance of the round trip diff. Defaults to 1e-4.
+
+    Returns:
+        list[dict]: One result per asset with the import, export and round trip times per prim in microseconds,
+            and the time per phase of each prim class.
+    """
+    if sizes is None:
+        sizes = {family: family_sizes for family, (_, _, family_sizes) in ASSET_FAMILIES.items()}
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for family, family_sizes in sizes.items():
+            for size in family_sizes:
+                source_path = os.path.join(temp_dir, f"{family}_{size}.usdc")
+                export_path = os.path.join(temp_dir, f"{family}_{size}_export.usdc")
+                prim_count = build_asset(family, size, source_path)
+                cmds.file(new=True, force=True)
+                group = cmds.ls(cmds.createNode("transform", name="round_trip"), long=True)[0]
+
+                importer = CustomUSDImporter()
+                imported = _time_call(importer.import_from_usd, source_path, parent=group, repeat=1)
+                exporter = CustomUSDExporter()
+                exported = _time_call(exporter.export_to_usd, export_path, group, batch_authoring=True, repeat=1)
+
+                diff = compare_usd_stages(export_path, source_path, tolerance=tolerance, max_differences=1000)
+                cmds.file(new=True, force=True)
+
+                result = {
+                    "family": family,
+                    "prim_class": ASSET_FAMILIES[family][1],
+                    "size": size,
+                    "prims": prim_count,
+                    "import_us_per_prim": imported / prim_count * 1e6,
+                    "export_us_per_prim": exported / prim_count * 1e6,
+                    "round_trip_s": imported + exported,
+                    "import_phases_s": importer.instrumentation.as_dict()["prim_phases_s"],
+                    "export_phases_s": exporter.instrumentation.as_dict()["prim_phases_s"],
+                    "differences": diff["difference_count"],
+                    "differences_truncated": diff["truncated"],
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+                record_result(results, result)
+    return results
+
+
+def benchmark_array_bridge(element_counts=(10_000, 1_000_000)) -> list[dict]:
+    """
+    Times the two sides of the array_bridge conversions into Maya separately: the Vt to NumPy
+    view and list, and the element by element copy of the list into a Maya array.
+
+    Args:
+        element_counts (tuple[int]): Number of points and ints of each run.
+
+    Returns:
+        list[dict]: One result per count with the cost per element in nanoseconds of both sides.
+    """
+    results = []
+    for element_count in element_counts:
+        rng = np.random.default_rng(element_count)
+        points = Vt.Vec3fArray.FromNumpy(rng.random((element_count, 3), dtype=np.float32))
+        ints = Vt.IntArray.FromNumpy(rng.integers(0, element_count, element_count, dtype=np.int32))
+        point_list = array_bridge.vt_to_numpy(points, np.float64).reshape(-1, 3).tolist()
+        int_list = array_bridge.vt_to_numpy(ints, np.int32).tolist()
+
+        result = {"elements": element_count}
+        for name, vt_side, maya_side in (
+            ("points", lambda: array_bridge.vt_to_numpy(points, np.float64).reshape(-1, 3).tolist(), lambda: om.MPointArray(point_list)),
+            ("ints", lambda: array_bridge.vt_to_numpy(ints, np.int32).tolist(), lambda: om.MIntArray(int_list)),
+        ):
+            result[f"{name}_vt_ns_per_element"] = _time_call(vt_side) / element_count * 1e9
+            result[f"{name}_maya_ns_per_element"] = _time_call(maya_side) / element_count * 1e9
+        record_result(results, result)
+    return results
+
+
+def run(output: str | None = None, quick: bool = False) -> dict[str, list[dict]]:
+    """
+    Runs every benchmark in this module, logging each result at INFO.
+
+    Args:
+        output (str | None, optional): Write the results to this JSON file. Defaults to None.
+        quick (bool, optional): Run every benchmark with the smaller QUICK_ARGUMENTS. Defaults to False.
+
+    Returns:
+        dict[str, list[dict]]: Results of every benchmark, keyed by benchmark name.
+    """
+    set_log_level()
+    benchmarks = {
+        "mesh_topology_export": benchmark_mesh_topology_export,
+        "vertex_color_import": benchmark_vertex_color_import,
+        "primvar_sets_export": benchmark_primvar_sets_export,
+        "scene_index": benchmark_scene_index,
+        "nested_variant_import": lambda **kwargs: [benchmark_nested_variant_import(**kwargs)],
+        "animation_export": benchmark_animation_export,
+        "clip_streaming": benchmark_clip_streaming,
+        "transform_layout": benchmark_transform_layout,
+        "update_import": benchmark_update_import,
+        "cached_import": benchmark_cached_import,
+        "parallel_read": benchmark_parallel_read,
+        "groom_curves": benchmark_groom_curves,
+        "compact_primvars": benchmark_compact_primvars,
+        "department_export": benchmark_department_export,
+        "round_trip": benchmark_round_trip,
+        "array_bridge": benchmark_array_bridge,
+    }
+    results = {
+        name: benchmark(**(QUICK_ARGUMENTS[name] if quick else {}))
+        for name, benchmark in benchmarks.items()
+    }
+    if output:
+        write_results(results, output)
+    return results
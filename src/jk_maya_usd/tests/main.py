@@ -1,7 +1,29 @@
 
+import os
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
-from jk_maya_usd.tests.utilities import compare_usd_stages, report
+import numpy as np
+from pxr import Gf, Sdf, Usd, UsdGeom, Vt
+
+from jk_maya_usd.constants import USD_Department, USD_Format
+from jk_maya_usd.instrumentation import Instrumentation
+from jk_maya_usd.primvars import compact_primvars, index_assigned_values, index_values, reduce_interpolation, to_face_varying_indices
+from jk_maya_usd.tests.utilities import compare_usd_stages
+from jk_maya_usd.usd_utilities import (
+    resolve_layer_path,
+    get_department_layer_path,
+    is_sidecar_layer,
+    write_department_root,
+    write_layer,
+    PrimData,
+    StageWriter,
+    LayerWriter,
+    IncrementalWriter,
+    RecordingWriter,
+    DepartmentWriter,
+)
 
 def test():
     """Runs all unit tests in the jk_maya_usd package."""
@@ -9,10 +31,324 @@ def test():
 
 class Test(unittest.TestCase):
     def test_addition(self):
-        src, taget = "", ""
-        self.assertEqual(compare_usd_stages(src, taget), report)
-        
+        stage = Usd.Stage.CreateInMemory()
+        stage.DefinePrim("/root", "Xform")
+        diff = compare_usd_stages(stage, stage)
+        self.assertEqual(diff["difference_count"], 0)
+        self.assertIsNot(diff, compare_usd_stages(stage, stage))
+
 class TestNotMathOperation(unittest.TestCase):
     def test_addition(self):
         self.assertEqual(1 -1, 0)
 
+class TestResolveLayerPath(unittest.TestCase):
+    def test_format_from_extension(self):
+        self.assertEqual(resolve_layer_path("/tmp/a.usdc"), ("/tmp/a.usdc", USD_Format.USDC))
+
+    def test_format_replaces_extension(self):
+        self.assertEqual(resolve_layer_path("/tmp/a.usda", "usdz"), ("/tmp/a.usdz", USD_Format.USDZ))
+
+    def test_usd_extension_is_kept(self):
+        self.assertEqual(resolve_layer_path("/tmp/a.usd", USD_Format.USDC), ("/tmp/a.usd", USD_Format.USDC))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_phases_and_counters(self):
+        instrumentation = Instrumentation("test").start()
+        with instrumentation.phase("read", "Mesh"):
+            instrumentation.count("points", 8)
+        instrumentation.stop()
+        self.assertIn("read", instrumentation.prim_phases["Mesh"])
+        self.assertEqual(instrumentation.counters["points"], 8)
+        self.assertIn("points 8", instrumentation.report())
+
+    def test_worker_threads(self):
+        instrumentation = Instrumentation("test")
+
+        def _read():
+            for _ in range(1000):
+                with instrumentation.phase("read", "Mesh"):
+                    instrumentation.count("prims")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(8):
+                pool.submit(_read)
+        self.assertEqual(instrumentation.counters["prims"], 8000)
+
+    def test_disabled_records_nothing(self):
+        instrumentation = Instrumentation(enabled=False)
+        with instrumentation.phase("read", "Mesh"):
+            instrumentation.count("points")
+        self.assertEqual(instrumentation.as_dict()["phases_s"], {})
+        self.assertEqual(instrumentation.as_dict()["counters"], {})
+
+
+class TestTimeSamples(unittest.TestCase):
+    def test_constant_samples_become_default(self):
+        prim_data = PrimData("Mesh")
+        prim_data.add_attribute("points", Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray([(0, 0, 0)]))
+        points = Vt.Vec3fArray([(1, 2, 3)])
+        attribute = prim_data.set_time_samples("points", {1.0: points, 2.0: Vt.Vec3fArray([(1, 2, 3)])})
+        self.assertEqual(attribute.time_samples, {})
+        self.assertEqual(attribute.value, points)
+
+    def test_changing_samples_are_kept(self):
+        prim_data = PrimData("Xform")
+        prim_data.add_attribute("xformOp:translate", Sdf.ValueTypeNames.Double3, Gf.Vec3d(0, 0, 0))
+        samples = {1.0: Gf.Vec3d(0, 0, 0), 2.0: Gf.Vec3d(0, 1, 0)}
+        self.assertEqual(prim_data.set_time_samples("xformOp:translate", samples).time_samples, samples)
+
+
+class TestPrimvars(unittest.TestCase):
+    # Two quads sharing the edge between vertices 1 and 4
+    face_counts = np.array([4, 4])
+    face_indices = np.array([0, 1, 4, 3, 1, 2, 5, 4])
+
+    def _reduce(self, values):
+        return reduce_interpolation(np.asarray(values, dtype=np.float32), self.face_counts, self.face_indices, 6)
+
+    def test_interpolations(self):
+        self.assertEqual(self._reduce([[1, 0, 0]] * 8)[1], UsdGeom.Tokens.constant)
+        values, interpolation = self._reduce([[1, 0, 0]] * 4 + [[0, 1, 0]] * 4)
+        self.assertEqual(interpolation, UsdGeom.Tokens.uniform)
+        self.assertEqual(len(values), 2)
+        values, interpolation = self._reduce(self.face_indices[:, None] * [1.0, 0.5])
+        self.assertEqual(interpolation, UsdGeom.Tokens.vertex)
+        np.testing.assert_array_equal(values[:, 0], np.arange(6))
+        self.assertEqual(self._reduce(np.arange(16).reshape(8, 2))[1], UsdGeom.Tokens.faceVarying)
+
+    def test_indexed_round_trip(self):
+        values = np.array([[0, 0], [1, 0], [1, 1], [0, 0], [1, 0], [1, 1], [0, 0], [1, 0]], dtype=np.float32)
+        unique, indices = index_values(values)
+        self.assertEqual(len(unique), 3)
+        np.testing.assert_array_equal(unique[indices], values)
+        self.assertIsNone(index_values(unique)[1])
+
+        vertex_values, _ = self._reduce(self.face_indices[:, None] * [1.0, 0.5])
+        face_varying = to_face_varying_indices(None, len(vertex_values), UsdGeom.Tokens.vertex, self.face_counts, self.face_indices)
+        np.testing.assert_array_equal(vertex_values[face_varying][:, 0], self.face_indices)
+
+    def test_partially_colored_set(self):
+        # Only the first quad is colored, Maya reads the other face-vertices as -1
+        colors = np.array([[0, 0, 0], [1, 0, 0], [1, 0, 0], [0, 0, 0]] + [[-1, -1, -1]] * 4, dtype=np.float32)
+        assigned = ~np.all(colors == -1.0, axis=1)
+        values, indices, unassigned_index = index_assigned_values(colors, assigned)
+        self.assertEqual(len(values), 3)
+        self.assertNotIn(-1.0, values)
+        np.testing.assert_array_equal(values[indices[:4]], colors[:4])
+        np.testing.assert_array_equal(indices[4:], unassigned_index)
+
+        prim_data = PrimData("Mesh")
+        primvar = prim_data.add_primvar(
+            "displayColor", Sdf.ValueTypeNames.Color3fArray, Vt.Vec3fArray.FromNumpy(values), "faceVarying", Vt.IntArray.FromNumpy(indices)
+        )
+        primvar.metadata["unauthoredValuesIndex"] = unassigned_index
+        # The unassigned zero color must not merge with the assigned black one
+        self.assertEqual(compact_primvars(prim_data), 0)
+
+        layer = Sdf.Layer.CreateAnonymous(".usda")
+        LayerWriter(layer).define_prim(Sdf.Path("/mesh"), prim_data)
+        stage = Usd.Stage.Open(layer)
+        display_color = UsdGeom.Mesh(stage.GetPrimAtPath("/mesh")).GetDisplayColorPrimvar()
+        self.assertEqual(display_color.GetUnauthoredValuesIndex(), unassigned_index)
+        self.assertEqual(list(display_color.GetIndices())[4:], [unassigned_index] * 4)
+
+
+    def test_compact_primvars(self):
+        uvs = np.tile(np.array([[0.25, 0.5], [0.1, 0.3]], dtype=np.float32), (50, 1))
+        prim_data = PrimData("Mesh")
+        prim_data.add_primvar("st", Sdf.ValueTypeNames.TexCoord2fArray, Vt.Vec2fArray.FromNumpy(uvs), "faceVarying")
+        prim_data.add_primvar("far", Sdf.ValueTypeNames.TexCoord2fArray, Vt.Vec2fArray.FromNumpy(uvs * 1e5), "faceVarying")
+        self.assertGreater(compact_primvars(prim_data, half_precision_error=1e-3), 0)
+
+        st = prim_data.attributes["primvars:st"]
+        self.assertEqual(st.type_name, Sdf.ValueTypeNames.TexCoord2hArray)
+        indices = np.asarray(prim_data.attributes["primvars:st:indices"].value)
+        np.testing.assert_allclose(np.asarray(st.value, dtype=np.float32)[indices], uvs, atol=1e-3)
+        # Beyond the half range
+        self.assertEqual(prim_data.attributes["primvars:far"].type_name, Sdf.ValueTypeNames.TexCoord2fArray)
+
+        layer = Sdf.Layer.CreateAnonymous(".usda")
+        LayerWriter(layer).define_prim(Sdf.Path("/mesh"), prim_data)
+        self.assertEqual(layer.GetAttributeAtPath("/mesh.primvars:st").typeName, Sdf.ValueTypeNames.TexCoord2hArray)
+
+def _author_example(writer):
+    root = Sdf.Path.absoluteRootPath.AppendChild("asset")
+    xform = PrimData("Xform")
+    xform.add_attribute("xformOp:translate", Sdf.ValueTypeNames.Double3, Gf.Vec3d(1, 2, 3))
+    xform.add_attribute("xformOpOrder", Sdf.ValueTypeNames.TokenArray, Vt.TokenArray(["xformOp:translate"]), Sdf.VariabilityUniform)
+    xform.add_attribute("xformOp:scale", Sdf.ValueTypeNames.Float3, Gf.Vec3f(1, 1, 1))
+    xform.set_time_samples("xformOp:scale", {1.0: Gf.Vec3f(1, 1, 1), 2.0: Gf.Vec3f(2, 2, 2)})
+    writer.define_prim(root, xform)
+
+    mesh = PrimData("Mesh")
+    mesh.add_attribute("points", Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray([(0, 0, 0), (1, 0, 0), (0, 1, 0)]))
+    mesh.add_primvar("st", Sdf.ValueTypeNames.TexCoord2fArray, Vt.Vec2fArray([(0, 0), (1, 1)]), "faceVarying", Vt.IntArray([0, 1, 0]))
+
+    writer.add_variant_set(root, "modelVariant")
+    for variant in ("low", "high"):
+        with writer.variant_context(root, "modelVariant", variant) as variant_path:
+            writer.define_prim(variant_path.AppendChild(f"geo_{variant}"), mesh)
+    writer.set_variant_selection(root, "modelVariant", "low")
+
+
+def _sublayers(layer_path):
+    layer = Sdf.Layer.OpenAsAnonymous(layer_path)
+    return list(layer.subLayerPaths)
+
+
+class TestWriters(unittest.TestCase):
+    def test_layer_writer_matches_stage_writer(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stage_path = os.path.join(temp_dir, "stage.usda")
+            layer_path = os.path.join(temp_dir, "layer.usda")
+
+            stage = Usd.Stage.CreateNew(stage_path)
+            _author_example(StageWriter(stage))
+            stage.Save()
+
+            layer = Sdf.Layer.CreateNew(layer_path)
+            with Sdf.ChangeBlock():
+                _author_example(LayerWriter(layer))
+            layer.Save()
+
+            diff = compare_usd_stages(stage_path, layer_path)
+            self.assertFalse(diff["prims_only_in_generated"] or diff["prims_only_in_target"])
+            self.assertFalse(diff["type_mismatches"] or diff["attribute_differences"])
+            self.assertEqual(stage.GetRootLayer().ExportToString(), layer.ExportToString())
+
+    def test_incremental_writer_only_authors_changes(self):
+        layer = Sdf.Layer.CreateAnonymous()
+        first = IncrementalWriter(LayerWriter(layer), {})
+        _author_example(first)
+        stale = Sdf.Path("/asset/stale")
+        first.define_prim(stale, PrimData("Scope"))
+
+        second = IncrementalWriter(LayerWriter(layer), first.hashes)
+        _author_example(second)
+        self.assertEqual(second.authored, [])
+        self.assertEqual(second.remove_stale_prims(), [str(stale)])
+        self.assertIsNone(layer.GetPrimAtPath(stale))
+
+        changed = PrimData("Xform")
+        changed.add_attribute("xformOp:translate", Sdf.ValueTypeNames.Double3, Gf.Vec3d(4, 5, 6))
+        third = IncrementalWriter(LayerWriter(layer), second.hashes)
+        third.define_prim(Sdf.Path("/asset"), changed)
+        self.assertEqual(third.authored, ["/asset"])
+        self.assertIsNone(layer.GetPrimAtPath("/asset").attributes.get("xformOpOrder"))
+
+    def test_incremental_writer_removes_emptied_variants(self):
+        layer = Sdf.Layer.CreateAnonymous()
+        first = IncrementalWriter(LayerWriter(layer), {})
+        _author_example(first)
+
+        # The high variant is gone from the scene
+        root = Sdf.Path("/asset")
+        second = IncrementalWriter(LayerWriter(layer), first.hashes)
+        second.define_prim(root, PrimData("Xform"))
+        with second.variant_context(root, "modelVariant", "low") as variant_path:
+            second.define_prim(variant_path.AppendChild("geo_low"), PrimData("Mesh"))
+        second.set_variant_selection(root, "modelVariant", "low")
+        self.assertEqual(second.remove_stale_prims(), ["/asset{modelVariant=high}geo_high"])
+        variant_set = layer.GetPrimAtPath(root).variantSets["modelVariant"]
+        self.assertEqual(list(variant_set.variants.keys()), ["low"])
+        self.assertEqual(layer.GetPrimAtPath(root).variantSelections["modelVariant"], "low")
+
+        # No variants are left at all
+        third = IncrementalWriter(LayerWriter(layer), second.hashes)
+        third.define_prim(root, PrimData("Xform"))
+        third.remove_stale_prims()
+        prim_spec = layer.GetPrimAtPath(root)
+        self.assertNotIn("modelVariant", prim_spec.variantSets)
+        self.assertNotIn("modelVariant", prim_spec.variantSelections)
+        self.assertEqual(list(prim_spec.variantSetNameList.prependedItems), [])
+
+    def test_recording_writer_replays_identically(self):
+        stage = Usd.Stage.CreateInMemory()
+        _author_example(StageWriter(stage))
+
+        recording = RecordingWriter()
+        _author_example(recording)
+        layer = Sdf.Layer.CreateAnonymous()
+        recording.replay(LayerWriter(layer))
+        self.assertEqual(stage.GetRootLayer().ExportToString(), layer.ExportToString())
+
+
+    def test_department_layers_compose_to_single_layer(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            single = Sdf.Layer.CreateAnonymous(".usda")
+            _author_example(LayerWriter(single))
+
+            root_path = os.path.join(temp_dir, "asset.usda")
+            writer = DepartmentWriter()
+            _author_example(writer)
+            for department, recording in writer.recordings.items():
+                write_layer(recording, get_department_layer_path(root_path, department), USD_Format.USDA, {})
+            root_layer = Sdf.Layer.CreateNew(root_path)
+            root_layer.subLayerPaths = [os.path.basename(get_department_layer_path(root_path, department)) for department in USD_Department]
+            root_layer.Save()
+
+            model = Sdf.Layer.FindOrOpen(get_department_layer_path(root_path, USD_Department.MODEL))
+            self.assertIsNone(model.GetAttributeAtPath("/asset.xformOp:translate"))
+            self.assertEqual(compare_usd_stages(Usd.Stage.Open(root_path), Usd.Stage.Open(single))["difference_count"], 0)
+
+    def test_partial_department_export_root(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root_path = os.path.join(temp_dir, "asset.usda")
+            uv_path = get_department_layer_path(root_path, USD_Department.UV)
+            write_layer(DepartmentWriter().recordings[USD_Department.UV], uv_path, USD_Format.USDA, {})
+            self.assertEqual(write_department_root(root_path, USD_Format.USDA, [USD_Department.UV], {}), ["asset_UV.usda"])
+            self.assertEqual(_sublayers(root_path), ["asset_UV.usda"])
+
+            model_path = get_department_layer_path(root_path, USD_Department.MODEL)
+            write_layer(DepartmentWriter().recordings[USD_Department.MODEL], model_path, USD_Format.USDA, {})
+            write_department_root(root_path, USD_Format.USDA, [USD_Department.MODEL], {})
+            self.assertEqual(_sublayers(root_path), ["asset_MDL.usda", "asset_UV.usda"])
+
+    def test_sidecar_layers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root_path = os.path.join(temp_dir, "asset.usda")
+            self.assertFalse(is_sidecar_layer(get_department_layer_path(root_path, USD_Department.UV)))
+            Sdf.Layer.CreateNew(root_path).Save()
+            self.assertTrue(is_sidecar_layer(get_department_layer_path(root_path, USD_Department.UV)))
+            self.assertFalse(is_sidecar_layer(root_path))
+            self.assertTrue(is_sidecar_layer(os.path.join(temp_dir, "shot.clip0003.usdc")))
+            self.assertTrue(is_sidecar_layer(os.path.join(temp_dir, "shot.manifest.usda")))
+            self.assertFalse(is_sidecar_layer(os.path.join(temp_dir, "shot.usdc")))
+
+class TestCompareUsdStages(unittest.TestCase):
+    def setUp(self):
+        self.generated = Usd.Stage.CreateInMemory()
+        self.target = Usd.Stage.CreateInMemory()
+        _author_example(StageWriter(self.generated))
+        _author_example(StageWriter(self.target))
+
+    def test_tolerance(self):
+        points = self.target.GetAttributeAtPath("/asset/geo_low.points")
+        points.Set(Vt.Vec3fArray([(0, 0, 0), (1, 0, 0), (0, 1.0001, 0)]))
+        self.assertIn("points", compare_usd_stages(self.generated, self.target)["attribute_differences"]["/asset/geo_low"])
+        self.assertEqual(compare_usd_stages(self.generated, self.target, tolerance=1e-3)["difference_count"], 0)
+
+    def test_bool_and_unsigned_values(self):
+        for stage in (self.generated, self.target):
+            prim = stage.GetPrimAtPath("/asset")
+            prim.CreateAttribute("flag", Sdf.ValueTypeNames.Bool).Set(stage is self.generated)
+            prim.CreateAttribute("ids", Sdf.ValueTypeNames.UIntArray).Set(Vt.UIntArray([1, 5] if stage is self.generated else [3, 5]))
+        differences = compare_usd_stages(self.generated, self.target)["attribute_differences"]["/asset"]
+        self.assertEqual(differences["flag"]["mismatches"], 1)
+        self.assertEqual(differences["ids"]["max_abs_difference"], 2.0)
+
+    def test_time_samples_and_variants(self):
+        self.target.GetAttributeAtPath("/asset.xformOp:scale").Set(Gf.Vec3f(3, 3, 3), 2.0)
+        self.target.GetPrimAtPath("/asset").GetVariantSet("modelVariant").SetVariantSelection("high")
+        diff = compare_usd_stages(self.generated, self.target)
+        self.assertEqual(diff["attribute_differences"]["/asset"]["xformOp:scale"]["time"], 2.0)
+        self.assertIn("modelVariant", diff["variant_differences"]["/asset"])
+        self.assertEqual(diff["prims_only_in_generated"], ["/asset/geo_low"])
+        self.assertEqual(diff["prims_only_in_target"], ["/asset/geo_high"])
+
+    def test_max_differences(self):
+        self.target.GetPrimAtPath("/asset").GetVariantSet("modelVariant").SetVariantSelection("high")
+        diff = compare_usd_stages(self.generated, self.target, max_differences=1)
+        self.assertTrue(diff["truncated"])
+        self.assertEqual(diff["difference_count"], 1)
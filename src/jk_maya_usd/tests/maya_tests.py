@@ -0,0 +1,80 @@
+""" Tests that need the Maya Python modules, run them with mayapy """
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from pxr import Gf, Sdf, Vt
+
+from jk_maya_usd.constants import PROTOTYPES_ROOT, PROTOTYPE_GEOMETRY_NAME
+from jk_maya_usd.importer import CustomUSDImporter
+from jk_maya_usd.mesh_cache import MeshCache
+from jk_maya_usd.prims.mesh import Mesh, MeshBuffers
+from jk_maya_usd.prims.xform import TRANSFORM_OP, add_xform_ops
+from jk_maya_usd.usd_utilities import LayerWriter, PrimData
+
+def test():
+    """Runs the unit tests that need Maya."""
+    unittest.main(verbosity=2, module="jk_maya_usd.tests.maya_tests", exit=False)
+
+
+def _author_instanced_meshes(layer, instance_matrices):
+    """Authors the prototype and instances the exporter writes for copies of one mesh."""
+    writer = LayerWriter(layer)
+    prototype_path = Sdf.Path(PROTOTYPES_ROOT).AppendChild("bolt_0")
+    writer.define_prim(Sdf.Path(PROTOTYPES_ROOT), PrimData("Scope", specifier=Sdf.SpecifierClass))
+    writer.define_prim(prototype_path, PrimData("Xform"))
+    mesh = PrimData("Mesh")
+    mesh.add_attribute("points", Sdf.ValueTypeNames.Point3fArray, Vt.Vec3fArray([(0, 0, 0), (1, 0, 0), (0, 1, 0)]))
+    mesh.add_attribute("faceVertexCounts", Sdf.ValueTypeNames.IntArray, Vt.IntArray([3]))
+    mesh.add_attribute("faceVertexIndices", Sdf.ValueTypeNames.IntArray, Vt.IntArray([0, 1, 2]))
+    writer.define_prim(prototype_path.AppendChild(PROTOTYPE_GEOMETRY_NAME), mesh)
+
+    writer.define_prim(Sdf.Path("/set"), PrimData("Xform"))
+    for name, matrix in instance_matrices.items():
+        instance = PrimData("Xform", references=[prototype_path], instanceable=True)
+        add_xform_ops(instance, {TRANSFORM_OP: matrix})
+        writer.define_prim(Sdf.Path("/set").AppendChild(name), instance)
+
+
+class TestInstancedImport(unittest.TestCase):
+    def test_round_trip_node_paths(self):
+        matrices = {"bolt": Gf.Matrix4d().SetTranslate(Gf.Vec3d(0, 1, 0)), "bolt1": Gf.Matrix4d().SetRotate(Gf.Rotation(Gf.Vec3d(0, 1, 0), 90))}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "set.usda")
+            layer = Sdf.Layer.CreateNew(file_path)
+            _author_instanced_meshes(layer, matrices)
+            layer.Save()
+
+            importer = CustomUSDImporter()
+            importer._open_stage(file_path)
+            importer._traverse_prim(importer.stage.GetPseudoRoot(), None)
+
+        # The transforms the import builds, as DAG paths, and the transform each mesh shape goes under
+        dag_paths, shape_parents = [], []
+        for node in importer.nodes:
+            parent_path = "" if node.parent is None else dag_paths[node.parent]
+            dag_paths.append(parent_path if node.in_parent else f"{parent_path}|{node.name}")
+            if isinstance(node.handler, Mesh):
+                shape_parents.append(dag_paths[-1])
+        self.assertEqual(sorted(set(dag_paths)), ["|set", "|set|bolt", "|set|bolt1"])
+        self.assertEqual(shape_parents, ["|set|bolt", "|set|bolt1"])
+
+        for name, matrix in matrices.items():
+            node = next(node for node in importer.nodes if node.usd_path == Sdf.Path(f"/set/{name}"))
+            self.assertTrue(Gf.IsClose(node.data, matrix, 1e-9))
+        meshes = [node for node in importer.nodes if isinstance(node.handler, Mesh)]
+        self.assertIsNone(meshes[0].data.matrix)
+        self.assertEqual(meshes[1].instance_of, importer.nodes.index(meshes[0]))
+
+
+class TestMeshCache(unittest.TestCase):
+    def test_overwrite_keeps_disk_size(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = MeshCache(temp_dir)
+            for point_count in (1_000, 10, 100):
+                points = np.zeros((point_count, 3), dtype=np.float32)
+                cache.put("mesh", MeshBuffers(points, np.array([3], dtype=np.int32), np.arange(3, dtype=np.int32)))
+            # Only the last write of the key is on disk
+            self.assertEqual(cache._disk_size, os.path.getsize(cache._file_path("mesh")))
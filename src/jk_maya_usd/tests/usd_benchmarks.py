@@ -0,0 +1,247 @@
+""" Benchmarks that only need usd-core and can run headless, outside of Maya. """
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from pxr import Gf, Sdf, Usd
+
+from jk_maya_usd.constants import USD_Format
+from jk_maya_usd.instrumentation import set_log_level
+from jk_maya_usd.tests.assets import ASSET_FAMILIES, QUICK_SIZES, build_asset
+from jk_maya_usd.tests.utilities import compare_usd_stages
+from jk_maya_usd.usd_utilities import package_usdz
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+SAMPLE_ASSETS = [
+    os.path.join(REPO_ROOT, "asset_example", "asset.usda"),
+    os.path.join(REPO_ROOT, "output", "output.usda"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def record_result(results: list[dict], result: dict) -> dict:
+    """Logs a benchmark result at INFO and appends it to results."""
+    logger.info("%s", result)
+    results.append(result)
+    return result
+
+
+def peak_rss_mb() -> float | None:
+    """Returns the peak resident memory of the process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results: dict[str, list[dict]], file_path: str) -> str:
+    """
+    Writes benchmark results as JSON, together with the commit and environment they were measured on,
+    so runs can be compared between commits.
+
+    Args:
+        results (dict[str, list[dict]]): Results of every benchmark, keyed by benchmark name.
+        file_path (str): The JSON file to write.
+
+    Returns:
+        str: The path that was written.
+    """
+    document = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "usd_version": ".".join(str(part) for part in Usd.GetVersion()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(file_path, "w") as file:
+        json.dump(document, file, indent=2, default=str)
+    return file_path
+
+
+def generate_assets(directory: str, sizes: dict[str, tuple] | None = None) -> list[dict]:
+    """
+    Writes every procedural asset into directory and times its authoring.
+
+    Args:
+        directory (str): Where to write the assets.
+        sizes (dict[str, tuple] | None, optional): Sizes per asset family. Defaults to the full sizes of ASSET_FAMILIES.
+
+    Returns:
+        list[dict]: One result per asset, including its path.
+    """
+    if sizes is None:
+        sizes = {family: family_sizes for family, (_, _, family_sizes) in ASSET_FAMILIES.items()}
+
+    results = []
+    for family, family_sizes in sizes.items():
+        for size in family_sizes:
+            file_path = os.path.join(directory, f"{family}_{size}.usdc")
+            start = time.perf_counter()
+            prim_count = build_asset(family, size, file_path)
+            result = {
+                "family": family,
+                "prim_class": ASSET_FAMILIES[family][1],
+                "size": size,
+                "prims": prim_count,
+                "author_ms": (time.perf_counter() - start) * 1e3,
+                "bytes": os.path.getsize(file_path),
+                "peak_rss_mb": peak_rss_mb(),
+                "path": file_path,
+            }
+            record_result(results, result)
+    return results
+
+
+def benchmark_diff(assets: list[dict]) -> list[dict]:
+    """
+    Times compare_usd_stages on every asset against itself, and against a copy with one moved point.
+
+    Args:
+        assets (list[dict]): Results of generate_assets.
+
+    Returns:
+        list[dict]: One result per asset with the cost per prim in microseconds.
+    """
+    results = []
+    for asset in assets:
+        generated = Usd.Stage.Open(asset["path"])
+        # An anonymous copy, so editing it leaves the generated stage alone
+        target = Usd.Stage.Open(Sdf.Layer.OpenAsAnonymous(asset["path"]))
+        prim_count = sum(1 for _ in generated.Traverse())
+
+        start = time.perf_counter()
+        identical = compare_usd_stages(generated, target)
+        identical_time = time.perf_counter() - start
+
+        points = next((prim.GetAttribute("points") for prim in target.Traverse() if prim.HasAttribute("points")), None)
+        if points:
+            values = points.Get()
+            values[len(values) // 2] += Gf.Vec3f(0.5, 0, 0)
+            points.Set(values)
+
+        start = time.perf_counter()
+        changed = compare_usd_stages(generated, target, tolerance=1e-4)
+        changed_time = time.perf_counter() - start
+
+        result = {
+            "family": asset["family"],
+            "size": asset["size"],
+            "prims": prim_count,
+            "identical_us_per_prim": identical_time / prim_count * 1e6,
+            "identical_differences": identical["difference_count"],
+            "changed_us_per_prim": changed_time / prim_count * 1e6,
+            "changed_differences": changed["difference_count"],
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        record_result(results, result)
+    return results
+
+
+def _write_layer(source: Sdf.Layer, file_path: str, file_format: USD_Format) -> None:
+    if file_format == USD_Format.USDZ:
+        crate_path = os.path.splitext(file_path)[0] + ".usdc"
+        source.Export(crate_path)
+        package_usdz(crate_path, file_path)
+    else:
+        source.Export(file_path)
+
+
+def benchmark_layer_formats(asset_paths: list[str] = SAMPLE_ASSETS, repeat: int = 5) -> list[dict]:
+    """
+    Measures write time, file size and Usd.Stage.Open time of each asset in every USD_Format.
+
+    Args:
+        asset_paths (list[str], optional): The layers to convert. Defaults to the sample assets in the repo.
+        repeat (int, optional): Number of runs to take the best time from. Defaults to 5.
+
+    Returns:
+        list[dict]: One result per asset and format.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for asset_path in asset_paths:
+            if not os.path.exists(asset_path):
+                continue
+            source = Usd.Stage.Open(asset_path).Flatten()
+            asset_name = os.path.splitext(os.path.basename(asset_path))[0]
+
+            for file_format in USD_Format:
+                file_path = os.path.join(temp_dir, f"{asset_name}.{file_format.value}")
+
+                write_time = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    _write_layer(source, file_path, file_format)
+                    write_time = min(write_time, time.perf_counter() - start)
+
+                open_time = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    stage = Usd.Stage.Open(file_path)
+                    open_time = min(open_time, time.perf_counter() - start)
+                    del stage
+
+                result = {
+                    "asset": asset_name,
+                    "format": file_format.value,
+                    "write_ms": write_time * 1e3,
+                    "bytes": os.path.getsize(file_path),
+                    "open_ms": open_time * 1e3,
+                }
+                record_result(results, result)
+    return results
+
+
+def run(output: str | None = None, quick: bool = False) -> dict[str, list[dict]]:
+    """
+    Runs every benchmark in this module on the sample assets and the procedural assets.
+
+    Args:
+        output (str | None, optional): Write the results to this JSON file. Defaults to None.
+        quick (bool, optional): Only use the small procedural assets. Defaults to False.
+
+    Returns:
+        dict[str, list[dict]]: Results of every benchmark, keyed by benchmark name.
+    """
+    set_log_level()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        assets = generate_assets(temp_dir, QUICK_SIZES if quick else None)
+        results = {
+            "authoring": assets,
+            "diff": benchmark_diff(assets),
+            "layer_formats": benchmark_layer_formats(SAMPLE_ASSETS + [asset["path"] for asset in assets], repeat=1 if quick else 5),
+        }
+    for asset in assets:
+        del asset["path"]
+    if output:
+        write_results(results, output)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--quick", action="store_true", help="Only use the small procedural assets")
+    arguments = parser.parse_args()
+    run(arguments.output, arguments.quick)
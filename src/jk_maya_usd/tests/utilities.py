@@ -1,54 +1,263 @@
+import numpy as np
 from pxr import Usd
 
-report = {
-    "prims_only_in_generated": [],
-    "prims_only_in_target": [],
-    "type_mismatches": {},
-    "attribute_differences": {}
+# Composition arcs and child/property lists show up as composed prims, properties and variants instead
+STRUCTURAL_METADATA = {
+    "typeName",
+    "default",
+    "timeSamples",
+    "references",
+    "payload",
+    "inheritPaths",
+    "specializes",
+    "variantSetNames",
+    "variantSelection",
+    "clips",
 }
 
 
-def compare_usd_stages(generated_stage_path: str, target_stage_path: str) -> dict:
-    """Compares two USD stages from file paths and returns a detailed diff report."""
-    
-    generated_stage = Usd.Stage.Open(generated_stage_path)
-    target_stage = Usd.Stage.Open(target_stage_path)
+class DifferenceLimitReached(Exception):
+    """ Raised internally once a diff has collected max_differences differences """
 
-    generated_prims = {prim.GetPath(): prim for prim in generated_stage.Traverse()}
-    target_prims = {prim.GetPath(): prim for prim in target_stage.Traverse()}
 
-    generated_paths = set(generated_prims.keys())
-    target_paths = set(target_prims.keys())
+def _new_report() -> dict:
+    return {
+        "prims_only_in_generated": [],
+        "prims_only_in_target": [],
+        "type_mismatches": {},
+        "attribute_differences": {},
+        "metadata_differences": {},
+        "variant_differences": {},
+        "difference_count": 0,
+        "truncated": False,
+    }
 
-    report["prims_only_in_generated"] = list(generated_paths - target_paths)
-    report["prims_only_in_target"] = list(target_paths - generated_paths)
 
-    common_prims = generated_paths & target_paths
+def _open_stage(stage):
+    return stage if isinstance(stage, Usd.Stage) else Usd.Stage.Open(stage)
 
-    for path in common_prims:
-        gen_prim = generated_prims[path]
-        tgt_prim = target_prims[path]
 
-        gen_type = gen_prim.GetTypeName()
-        tgt_type = tgt_prim.GetTypeName()
+def _summarize(value):
+    """Keeps scalars as they are and replaces arrays by their length, so a report never holds whole arrays."""
+    if value is not None and hasattr(value, "__len__") and not isinstance(value, str) and len(value) > 16:
+        return f"<{type(value).__name__} of {len(value)}>"
+    return value
 
-        if gen_type != tgt_type:
-            report["type_mismatches"][str(path)] = {"generated_type": gen_type, "target_type": tgt_type}
 
-        gen_attrs = {attr.GetName(): attr.Get() for attr in gen_prim.GetAttributes()}
-        tgt_attrs = {attr.GetName(): attr.Get() for attr in tgt_prim.GetAttributes()}
+def _compare_values(generated, target, tolerance: float):
+    """
+    Compares two attribute values, cheapest checks first.
 
-        attr_diffs = {}
+    Returns:
+        dict | None: None when the values match, otherwise a small description of the difference.
+    """
+    if generated is None or target is None:
+        if generated is target:
+            return None
+        return {"generated_value": _summarize(generated), "target_value": _summarize(target)}
 
-        for attr in set(gen_attrs.keys()).union(tgt_attrs.keys()):
-            if attr not in tgt_attrs:
-                attr_diffs[attr] = {"status": "missing_in_target", "generated_value": gen_attrs[attr]}
-            elif attr not in gen_attrs:
-                attr_diffs[attr] = {"status": "missing_in_generated", "target_value": tgt_attrs[attr]}
-            elif gen_attrs[attr] != tgt_attrs[attr]:
-                attr_diffs[attr] = {"status": "value_mismatch", "generated_value": gen_attrs[attr], "target_value": tgt_attrs[attr]}
+    if type(generated) is not type(target):
+        return {"generated_type": type(generated).__name__, "target_type": type(target).__name__}
 
-        if attr_diffs:
-            report["attribute_differences"][str(path)] = attr_diffs
+    generated_length = len(generated) if hasattr(generated, "__len__") and not isinstance(generated, str) else None
+    target_length = len(target) if hasattr(target, "__len__") and not isinstance(target, str) else None
+    if generated_length != target_length:
+        return {"generated_length": generated_length, "target_length": target_length}
 
-    return report
+    # Vt arrays and Gf types expose their buffers, so this does not copy
+    try:
+        generated_array = np.asarray(generated)
+        target_array = np.asarray(target)
+    except (TypeError, ValueError):
+        generated_array = target_array = None
+
+    if generated_array is not None and generated_array.dtype.kind in "biuf" and target_array.dtype.kind in "biuf":
+        if generated_array.shape != target_array.shape:
+            return {"generated_shape": generated_array.shape, "target_shape": target_array.shape}
+        if generated_array.dtype.kind == "b" or target_array.dtype.kind == "b":
+            # Booleans can not be subtracted, so count the values that differ
+            mismatches = int(np.count_nonzero(generated_array != target_array))
+            if not mismatches:
+                return None
+            difference = {"mismatches": mismatches}
+        else:
+            if tolerance:
+                if np.allclose(generated_array, target_array, rtol=0.0, atol=tolerance):
+                    return None
+            elif np.array_equal(generated_array, target_array):
+                return None
+            # Unsigned values wrap around when subtracted
+            delta = generated_array.astype(np.float64) - target_array.astype(np.float64)
+            difference = {"max_abs_difference": float(np.max(np.abs(delta)))}
+        if generated_length is not None:
+            difference["length"] = generated_length
+        else:
+            difference.update(generated_value=generated, target_value=target)
+        return difference
+
+    if generated == target:
+        return None
+    return {"generated_value": _summarize(generated), "target_value": _summarize(target)}
+
+
+class _StageDiff:
+    """ Walks two stages together and collects their differences into a fresh report """
+    def __init__(self, tolerance: float, max_differences: int | None, time_samples: bool, metadata: bool):
+        self.tolerance = tolerance
+        self.max_differences = max_differences
+        self.time_samples = time_samples
+        self.metadata = metadata
+        self.report = _new_report()
+
+    def _count(self) -> None:
+        self.report["difference_count"] += 1
+        if self.max_differences is not None and self.report["difference_count"] >= self.max_differences:
+            raise DifferenceLimitReached()
+
+    def _add(self, section: str, path, key=None, value=None) -> None:
+        if key is None:
+            self.report[section].append(str(path))
+        else:
+            self.report[section].setdefault(str(path), {})[key] = value
+        self._count()
+
+    def _compare_metadata(self, path, generated: dict, target: dict) -> None:
+        for key in sorted(set(generated) | set(target)):
+            if key in STRUCTURAL_METADATA or generated.get(key) == target.get(key):
+                continue
+            self._add("metadata_differences", path, key, {"generated": generated.get(key), "target": target.get(key)})
+
+    def _compare_variants(self, path, generated_prim: Usd.Prim, target_prim: Usd.Prim) -> None:
+        generated_sets = generated_prim.GetVariantSets()
+        target_sets = target_prim.GetVariantSets()
+        generated_names = generated_sets.GetNames()
+        target_names = target_sets.GetNames()
+        for name in sorted(set(generated_names) | set(target_names)):
+            generated = target = None
+            if name in generated_names:
+                variant_set = generated_sets.GetVariantSet(name)
+                generated = (variant_set.GetVariantNames(), variant_set.GetVariantSelection())
+            if name in target_names:
+                variant_set = target_sets.GetVariantSet(name)
+                target = (variant_set.GetVariantNames(), variant_set.GetVariantSelection())
+            if generated != target:
+                self._add("variant_differences", path, name, {"generated": generated, "target": target})
+
+    def _compare_attribute(self, generated_attr: Usd.Attribute, target_attr: Usd.Attribute) -> dict | None:
+        if generated_attr.GetTypeName() != target_attr.GetTypeName():
+            return {"status": "type_mismatch", "generated_type": str(generated_attr.GetTypeName()), "target_type": str(target_attr.GetTypeName())}
+
+        difference = _compare_values(generated_attr.Get(), target_attr.Get(), self.tolerance)
+        if difference:
+            return {"status": "value_mismatch", **difference}
+
+        if self.time_samples:
+            generated_times = generated_attr.GetTimeSamples()
+            target_times = target_attr.GetTimeSamples()
+            if generated_times != target_times:
+                return {"status": "time_samples_mismatch", "generated_samples": len(generated_times), "target_samples": len(target_times)}
+            for time_code in generated_times:
+                difference = _compare_values(generated_attr.Get(time_code), target_attr.Get(time_code), self.tolerance)
+                if difference:
+                    return {"status": "value_mismatch", "time": time_code, **difference}
+
+        if self.metadata:
+            generated_metadata = generated_attr.GetAllAuthoredMetadata()
+            target_metadata = target_attr.GetAllAuthoredMetadata()
+            keys = sorted(key for key in set(generated_metadata) | set(target_metadata) if key not in STRUCTURAL_METADATA)
+            changed = [key for key in keys if generated_metadata.get(key) != target_metadata.get(key)]
+            if changed:
+                return {"status": "metadata_mismatch", "keys": changed}
+        return None
+
+    def _compare_prim(self, generated_prim: Usd.Prim, target_prim: Usd.Prim) -> None:
+        path = generated_prim.GetPath()
+        generated_type = generated_prim.GetTypeName()
+        target_type = target_prim.GetTypeName()
+        if generated_type != target_type:
+            self._add("type_mismatches", path, "generated_type", generated_type)
+            self.report["type_mismatches"][str(path)]["target_type"] = target_type
+
+        generated_names = generated_prim.GetPropertyNames()
+        target_names = set(target_prim.GetPropertyNames())
+        for name in generated_names:
+            generated_attr = generated_prim.GetAttribute(name)
+            if not generated_attr:
+                continue
+            if name not in target_names:
+                self._add("attribute_differences", path, name, {"status": "missing_in_target"})
+                continue
+            target_attr = target_prim.GetAttribute(name)
+            if not target_attr:
+                continue
+            difference = self._compare_attribute(generated_attr, target_attr)
+            if difference:
+                self._add("attribute_differences", path, name, difference)
+
+        for name in target_names.difference(generated_names):
+            if target_prim.GetAttribute(name):
+                self._add("attribute_differences", path, name, {"status": "missing_in_generated"})
+
+        if self.metadata:
+            self._compare_metadata(path, generated_prim.GetAllAuthoredMetadata(), target_prim.GetAllAuthoredMetadata())
+        self._compare_variants(path, generated_prim, target_prim)
+
+    def run(self, generated_stage: Usd.Stage, target_stage: Usd.Stage) -> dict:
+        try:
+            if self.metadata:
+                self._compare_metadata(
+                    "/",
+                    generated_stage.GetPseudoRoot().GetAllAuthoredMetadata(),
+                    target_stage.GetPseudoRoot().GetAllAuthoredMetadata(),
+                )
+
+            prim_range = iter(Usd.PrimRange(generated_stage.GetPseudoRoot()))
+            for generated_prim in prim_range:
+                target_prim = target_stage.GetPrimAtPath(generated_prim.GetPath())
+                if not target_prim:
+                    # Report the root of a missing subtree once, without walking it
+                    self._add("prims_only_in_generated", generated_prim.GetPath())
+                    prim_range.PruneChildren()
+                    continue
+
+                generated_children = set(generated_prim.GetChildrenNames())
+                for child in target_prim.GetChildren():
+                    if child.GetName() not in generated_children:
+                        self._add("prims_only_in_target", child.GetPath())
+
+                if not generated_prim.IsPseudoRoot():
+                    self._compare_prim(generated_prim, target_prim)
+        except DifferenceLimitReached:
+            self.report["truncated"] = True
+        return self.report
+
+
+def compare_usd_stages(
+    generated_stage_path,
+    target_stage_path,
+    tolerance: float = 0.0,
+    max_differences: int | None = None,
+    time_samples: bool = True,
+    metadata: bool = True) -> dict:
+    """
+    Compares two USD stages and returns a new diff report.
+
+    Both stages are walked together with Usd.PrimRange, one prim at a time, so memory does not
+    grow with the size of the stages. Values are compared by type and length first, then with
+    NumPy on the Vt buffers, and only the differences are written into the report. Array
+    differences are reported by their length and largest absolute difference.
+
+    Args:
+        generated_stage_path (str | Usd.Stage): The generated stage, or its path.
+        target_stage_path (str | Usd.Stage): The expected stage, or its path.
+        tolerance (float, optional): Largest absolute difference at which numeric values still match. Defaults to 0.0.
+        max_differences (int | None, optional): Stop after this many differences and mark the report truncated.
+        time_samples (bool, optional): Also compare the time samples of every attribute. Defaults to True.
+        metadata (bool, optional): Also compare stage, prim and attribute metadata. Defaults to True.
+
+    Returns:
+        dict: The report. It is empty apart from 'difference_count' 0 and 'truncated' False when the stages match.
+    """
+    generated_stage = _open_stage(generated_stage_path)
+    target_stage = _open_stage(target_stage_path)
+    return _StageDiff(tolerance, max_differences, time_samples, metadata).run(generated_stage, target_stage)
@@ -5,12 +5,16 @@ from functools import partial
 
 import maya.OpenMayaUI as omui
 import maya.api.OpenMaya as om
+import logging
 import os
 from maya import cmds
 
-from jk_maya_usd.constants import DESTINATION
+from jk_maya_usd.constants import DESTINATION, SOURCE_FILE_ATTRIBUTE, USD_EXTENSIONS, USD_Format
 from jk_maya_usd.exporter import CustomUSDExporter
 from jk_maya_usd.importer import CustomUSDImporter
+from jk_maya_usd.instrumentation import set_log_level
+from jk_maya_usd.mesh_cache import MeshCache
+from jk_maya_usd.usd_utilities import is_sidecar_layer
 from jk_maya_usd.maya_utilities import create_scope, create_variant, create_variant_set, add_type_attribute
 
 def get_main_window():
@@ -36,7 +40,8 @@ class ComponentsUI(QtWidgets.QMainWindow):
         super().__init__(parent)
 
         self.exporter = CustomUSDExporter()
-        self.importer = CustomUSDImporter()
+        # Artists re-import the same published assets all day, keep their mesh buffers around
+        self.importer = CustomUSDImporter(mesh_cache=MeshCache())
 
         self.export_path = DESTINATION
 
@@ -77,6 +82,14 @@ class ComponentsUI(QtWidgets.QMainWindow):
         path_layout.addWidget(browse_button)
         layout.addLayout(path_layout)
 
+        format_layout = QtWidgets.QHBoxLayout()
+        format_layout.addWidget(QtWidgets.QLabel("Format"))
+        self.export_format_box = QtWidgets.QComboBox()
+        for usd_format in USD_Format:
+            self.export_format_box.addItem(usd_format.value, usd_format)
+        format_layout.addWidget(self.export_format_box)
+        layout.addLayout(format_layout)
+
         export_button = QtWidgets.QPushButton("Export Selected Nodes")
         export_button.clicked.connect(self._export_selected)
 
@@ -91,17 +104,47 @@ class ComponentsUI(QtWidgets.QMainWindow):
         self.import_list = QtWidgets.QListWidget()
         self._populate_import_list()
 
+        self.import_paths_edit = QtWidgets.QLineEdit()
+        self.import_paths_edit.setPlaceholderText("Prim paths to import, comma separated (all when empty)")
+        self.placeholders_box = QtWidgets.QCheckBox("Placeholders for branches that are not loaded")
+        self.update_box = QtWidgets.QCheckBox("Update previously imported nodes in place")
+
         import_button = QtWidgets.QPushButton("Import Selected USD")
         import_button.clicked.connect(self._import_selected)
 
+        expand_button = QtWidgets.QPushButton("Expand Selected Placeholders")
+        expand_button.clicked.connect(self._expand_selected)
+
         layout.addWidget(self.import_list)
+        layout.addWidget(self.import_paths_edit)
+        layout.addWidget(self.placeholders_box)
+        layout.addWidget(self.update_box)
         layout.addWidget(import_button)
+        layout.addWidget(expand_button)
 
         return group_box
 
     def testing_ui(self):
         group_box = QtWidgets.QGroupBox("TD Area")
         layout = QtWidgets.QVBoxLayout(group_box)
+
+        self.profile_box = QtWidgets.QCheckBox("Profile with cProfile")
+        self.verbose_box = QtWidgets.QCheckBox("Log every node")
+        self.verbose_box.toggled.connect(self._set_verbose)
+
+        self.report_view = QtWidgets.QPlainTextEdit()
+        self.report_view.setReadOnly(True)
+        self.report_view.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.report_view.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.report_view.setPlaceholderText("Report of the last export or import")
+
+        clear_cache_button = QtWidgets.QPushButton("Clear Mesh Cache")
+        clear_cache_button.clicked.connect(self.importer.mesh_cache.clear)
+
+        layout.addWidget(self.profile_box)
+        layout.addWidget(self.verbose_box)
+        layout.addWidget(clear_cache_button)
+        layout.addWidget(self.report_view)
         return group_box
 
 
@@ -125,10 +168,22 @@ class ComponentsUI(QtWidgets.QMainWindow):
         self._populate_import_list()
 
 
+    def _set_verbose(self, verbose):
+        set_log_level(logging.DEBUG if verbose else logging.INFO)
+
+    def _show_report(self, instrumentation):
+        self.report_view.setPlainText(instrumentation.report())
+
     def _export_selected(self):
-        print("Exporting...")
-        for node in cmds.ls(selection=True):
-            self.exporter.export_to_usd(f"{self.export_path}/{node}.usda")
+        usd_format = self.export_format_box.currentData()
+        exports = {
+            node: f"{self.export_path}/{node.split('|')[-1]}.{usd_format.value}"
+            for node in cmds.ls(selection=True, long=True)
+        }
+        if exports:
+            self.exporter.export_batch(exports, file_format=usd_format, profile=self.profile_box.isChecked())
+            self._show_report(self.exporter.instrumentation)
+        self._populate_import_list()
 
 
     def _import_selected(self):
@@ -136,16 +191,33 @@ class ComponentsUI(QtWidgets.QMainWindow):
         if not selected_items:
             return
 
+        prim_paths = [path.strip() for path in self.import_paths_edit.text().split(",") if path.strip()]
         for item in selected_items:
             file_path = os.path.join(self.export_path, item.text())
-            self.importer.import_from_usd(file_path)
+            self.importer.import_from_usd(
+                file_path,
+                prim_paths=prim_paths,
+                placeholders=self.placeholders_box.isChecked(),
+                update=self.update_box.isChecked(),
+                profile=self.profile_box.isChecked(),
+            )
+            self._show_report(self.importer.instrumentation)
+
+
+    def _expand_selected(self):
+        for node in cmds.ls(selection=True, long=True):
+            # Every imported node stores its prim path, only placeholders also store the file
+            if cmds.attributeQuery(SOURCE_FILE_ATTRIBUTE, node=node, exists=True):
+                self.importer.expand_placeholder(node)
+                self._show_report(self.importer.instrumentation)
 
 
     def _populate_import_list(self):
         self.import_list.clear()
         if os.path.exists(self.export_path):
             for file in os.listdir(self.export_path):
-                if file.endswith(".usda") or file.endswith(".usd"):
+                # Department layers, value clips and manifests are opened through their root layer
+                if file.lower().endswith(USD_EXTENSIONS) and not is_sidecar_layer(os.path.join(self.export_path, file)):
                     self.import_list.addItem(file)
 
 
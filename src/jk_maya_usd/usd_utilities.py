@@ -1 +1,620 @@
-""" Helper functions for working with USD """
\ No newline at end of file
+""" Helper functions for working with USD """
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from pxr import Sdf, Usd, UsdGeom, UsdUtils, Vt
+
+from jk_maya_usd.constants import USD_Department, USD_Format, HASH_SIDECAR_SUFFIX
+
+
+def resolve_layer_path(file_path: str, file_format: USD_Format | str | None = None) -> tuple[str, USD_Format]:
+    """
+    Returns the path to write a layer to and the format to write it in.
+
+    A '.usd' path keeps its extension and is written in the requested format,
+    any other path gets the extension of the requested format.
+
+    Args:
+        file_path (str): The requested output path.
+        file_format (USD_Format | str | None, optional): The output format. Defaults to the extension of file_path.
+
+    Returns:
+        tuple[str, USD_Format]: The output path and its format.
+    """
+    root, extension = os.path.splitext(file_path)
+    extension = extension.lstrip('.').lower()
+
+    if file_format is None:
+        file_format = extension if extension in {f.value for f in USD_Format} else USD_Format.USDA
+    file_format = USD_Format(file_format)
+
+    if extension == 'usd':
+        if file_format == USD_Format.USDZ:
+            raise ValueError(f"A .usd path cannot hold a usdz package: {file_path}")
+        return file_path, file_format
+    return f"{root}.{file_format.value}", file_format
+
+
+def create_layer(file_path: str, file_format: USD_Format) -> Sdf.Layer:
+    """
+    Creates a new, empty layer on disk in the given format, replacing any existing file.
+
+    Args:
+        file_path (str): Path of the layer. For usdz this is the crate layer that gets packaged.
+        file_format (USD_Format): Either USDA or USDC.
+
+    Returns:
+        Sdf.Layer: The new layer.
+    """
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    args = {'format': file_format.value} if file_path.lower().endswith('.usd') else {}
+    return Sdf.Layer.CreateNew(file_path, args=args)
+
+
+def package_usdz(layer_path: str, usdz_path: str) -> None:
+    """
+    Packages a layer and its dependencies into a usdz archive.
+
+    Args:
+        layer_path (str): The root layer of the package.
+        usdz_path (str): Path of the usdz file to write.
+    """
+    if os.path.exists(usdz_path):
+        os.remove(usdz_path)
+    if not UsdUtils.CreateNewUsdzPackage(Sdf.AssetPath(layer_path), usdz_path):
+        raise RuntimeError(f"Failed to package usdz: {usdz_path}")
+
+
+def values_equal(first: Any, second: Any) -> bool:
+    """Returns whether two attribute values (Gf, Vt or plain) hold exactly the same data."""
+    return np.array_equal(np.asarray(first), np.asarray(second))
+
+
+@dataclass
+class AttributeData:
+    """ A single attribute value to author on a prim """
+    type_name: Sdf.ValueTypeName
+    value: Any
+    variability: Sdf.Variability = Sdf.VariabilityVarying
+    metadata: dict[str, Any] = field(default_factory=dict)
+    time_samples: dict[float, Any] = field(default_factory=dict)
+
+
+@dataclass
+class PrimData:
+    """ Plain data describing a prim, extracted from Maya and ready to be authored """
+    type_name: str
+    attributes: dict[str, AttributeData] = field(default_factory=dict)
+    specifier: Sdf.Specifier = Sdf.SpecifierDef
+    references: list[Sdf.Path] = field(default_factory=list)
+    instanceable: bool | None = None
+    custom_data: dict[str, Any] = field(default_factory=dict)
+
+    def add_attribute(
+        self,
+        name: str,
+        type_name: Sdf.ValueTypeName,
+        value: Any,
+        variability: Sdf.Variability = Sdf.VariabilityVarying,
+        **metadata: Any) -> AttributeData:
+        """
+        Adds an attribute to be authored on the prim.
+
+        Args:
+            name (str): Attribute name, e.g. 'points' or 'primvars:st'.
+            type_name (Sdf.ValueTypeName): The attribute value type.
+            value (Any): The default value.
+            variability (Sdf.Variability, optional): Defaults to Sdf.VariabilityVarying.
+            **metadata: Extra attribute metadata, e.g. interpolation='vertex'.
+
+        Returns:
+            AttributeData: The added attribute.
+        """
+        attribute = AttributeData(type_name, value, variability, metadata)
+        self.attributes[name] = attribute
+        return attribute
+
+    def add_primvar(
+        self,
+        name: str,
+        type_name: Sdf.ValueTypeName,
+        value: Any,
+        interpolation: str,
+        indices: Vt.IntArray | None = None) -> AttributeData:
+        """
+        Adds a primvar, and its indices when given, to be authored on the prim.
+
+        Args:
+            name (str): Primvar name without the 'primvars:' namespace.
+            type_name (Sdf.ValueTypeName): The primvar value type.
+            value (Any): The primvar values.
+            interpolation (str): The primvar interpolation.
+            indices (Vt.IntArray | None, optional): Indices into value. Defaults to None.
+
+        Returns:
+            AttributeData: The added primvar attribute.
+        """
+        attribute = self.add_attribute(f"primvars:{name}", type_name, value, interpolation=interpolation)
+        if indices is not None:
+            self.add_attribute(f"primvars:{name}:indices", Sdf.ValueTypeNames.IntArray, indices)
+        return attribute
+
+    def set_time_samples(self, name: str, time_samples: dict[float, Any]) -> AttributeData:
+        """
+        Stores time samples on an attribute that was already added. When every sample
+        holds the same value, it is stored as the default value instead.
+
+        Args:
+            name (str): Attribute name.
+            time_samples (dict[float, Any]): Value per time code.
+
+        Returns:
+            AttributeData: The updated attribute.
+        """
+        attribute = self.attributes[name]
+        values = iter(time_samples.values())
+        first = next(values)
+        if all(values_equal(first, value) for value in values):
+            attribute.value = first
+            attribute.time_samples = {}
+        else:
+            attribute.time_samples = dict(time_samples)
+        return attribute
+
+
+class StageWriter:
+    """ Authors PrimData through the composed Usd.Stage API """
+    def __init__(self, stage: Usd.Stage):
+        self.stage = stage
+
+    def has_prim(self, path: Sdf.Path) -> bool:
+        return not path.IsAbsoluteRootPath() and self.stage.GetPrimAtPath(path).IsValid()
+
+    def define_prim(self, path: Sdf.Path, prim_data: PrimData) -> Usd.Prim:
+        if prim_data.specifier == Sdf.SpecifierClass:
+            prim = self.stage.CreateClassPrim(path)
+            prim.SetTypeName(prim_data.type_name)
+        else:
+            prim = self.stage.DefinePrim(path, prim_data.type_name)
+        for reference in prim_data.references:
+            prim.GetReferences().AddInternalReference(reference)
+        if prim_data.instanceable is not None:
+            prim.SetInstanceable(prim_data.instanceable)
+        for key, value in prim_data.custom_data.items():
+            prim.SetCustomDataByKey(key, value)
+        for name, attribute in prim_data.attributes.items():
+            attr = prim.CreateAttribute(name, attribute.type_name, False, attribute.variability)
+            attr.Set(attribute.value)
+            for time_code, value in attribute.time_samples.items():
+                attr.Set(value, time_code)
+            for key, value in attribute.metadata.items():
+                attr.SetMetadata(key, value)
+        return prim
+
+    def add_variant_set(self, path: Sdf.Path, variant_set_name: str) -> None:
+        self.stage.GetPrimAtPath(path).GetVariantSets().AddVariantSet(variant_set_name)
+
+    @contextmanager
+    def variant_context(self, path: Sdf.Path, variant_set_name: str, variant_name: str):
+        """Yields the parent path to author the contents of the variant under."""
+        variant_set = self.stage.GetPrimAtPath(path).GetVariantSets().AddVariantSet(variant_set_name)
+        variant_set.AddVariant(variant_name)
+        variant_set.SetVariantSelection(variant_name)
+        with variant_set.GetVariantEditContext():
+            yield path
+
+    def set_variant_selection(self, path: Sdf.Path, variant_set_name: str, variant_name: str) -> None:
+        self.stage.GetPrimAtPath(path).GetVariantSet(variant_set_name).SetVariantSelection(variant_name)
+
+
+class LayerWriter:
+    """
+    Authors PrimData as specs directly on an Sdf.Layer, skipping stage composition.
+
+    Wrap the writes in an Sdf.ChangeBlock so change notification is sent once.
+    The result matches what StageWriter authors on the same layer.
+    """
+    def __init__(self, layer: Sdf.Layer):
+        self.layer = layer
+
+    def _get_prim_spec(self, path: Sdf.Path) -> Sdf.PrimSpec | None:
+        if path.IsAbsoluteRootPath():
+            return None
+        return self.layer.GetPrimAtPath(path)
+
+    def has_prim(self, path: Sdf.Path) -> bool:
+        return self._get_prim_spec(path) is not None
+
+    def define_prim(self, path: Sdf.Path, prim_data: PrimData) -> Sdf.PrimSpec:
+        prim_spec = Sdf.CreatePrimInLayer(self.layer, path)
+        prim_spec.specifier = prim_data.specifier
+        prim_spec.typeName = prim_data.type_name
+        for reference in prim_data.references:
+            reference = Sdf.Reference(primPath=reference)
+            if reference not in prim_spec.referenceList.prependedItems:
+                prim_spec.referenceList.prependedItems.append(reference)
+        if prim_data.instanceable is not None:
+            prim_spec.instanceable = prim_data.instanceable
+        if prim_data.custom_data:
+            prim_spec.SetInfo("customData", dict(prim_data.custom_data))
+        elif prim_spec.HasInfo("customData"):
+            prim_spec.ClearInfo("customData")
+
+        # Re-authoring an existing prim must not leave attributes from the previous export behind
+        for attr_spec in list(prim_spec.attributes):
+            if attr_spec.name not in prim_data.attributes:
+                prim_spec.RemoveProperty(attr_spec)
+        for name, attribute in prim_data.attributes.items():
+            attr_spec = prim_spec.attributes.get(name)
+            if attr_spec is not None and attr_spec.typeName != attribute.type_name:
+                # The type of a spec can not be changed, e.g. a primvar that is now stored in half precision
+                prim_spec.RemoveProperty(attr_spec)
+                attr_spec = None
+            attr_spec = attr_spec or Sdf.AttributeSpec(prim_spec, name, attribute.type_name, attribute.variability)
+            attr_spec.default = attribute.value
+            if attr_spec.HasInfo("timeSamples"):
+                attr_spec.ClearInfo("timeSamples")
+            for time_code, value in attribute.time_samples.items():
+                self.layer.SetTimeSample(attr_spec.path, time_code, value)
+            for key, value in attribute.metadata.items():
+                attr_spec.SetInfo(key, value)
+        return prim_spec
+
+    def _get_variant_set_spec(self, path: Sdf.Path, variant_set_name: str) -> Sdf.VariantSetSpec:
+        prim_spec = self.layer.GetPrimAtPath(path)
+        if variant_set_name not in prim_spec.variantSetNameList.prependedItems:
+            prim_spec.variantSetNameList.prependedItems.append(variant_set_name)
+        return prim_spec.variantSets.get(variant_set_name) or Sdf.VariantSetSpec(prim_spec, variant_set_name)
+
+    def add_variant_set(self, path: Sdf.Path, variant_set_name: str) -> None:
+        self._get_variant_set_spec(path, variant_set_name)
+
+    @contextmanager
+    def variant_context(self, path: Sdf.Path, variant_set_name: str, variant_name: str):
+        """Yields the parent path to author the contents of the variant under."""
+        variant_set_spec = self._get_variant_set_spec(path, variant_set_name)
+        if variant_name not in variant_set_spec.variants:
+            Sdf.VariantSpec(variant_set_spec, variant_name)
+        yield path.AppendVariantSelection(variant_set_name, variant_name)
+
+    def set_variant_selection(self, path: Sdf.Path, variant_set_name: str, variant_name: str) -> None:
+        prim_spec = self.layer.GetPrimAtPath(path)
+        prim_spec.variantSelections[variant_set_name] = variant_name
+
+
+def _update_digest(digest, value: Any) -> None:
+    try:
+        digest.update(memoryview(value))
+    except TypeError:
+        digest.update(repr(value).encode())
+
+
+def hash_prim_data(prim_data: PrimData) -> str:
+    """
+    Returns a content hash of the prim type, attribute types, values, time samples and metadata.
+
+    Args:
+        prim_data (PrimData): The extracted prim.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    digest = hashlib.blake2b(prim_data.type_name.encode(), digest_size=16)
+    digest.update(f"{prim_data.specifier}:{prim_data.references}:{prim_data.instanceable}".encode())
+    for name, attribute in prim_data.attributes.items():
+        digest.update(f"{name}:{attribute.type_name}:{attribute.variability}:{sorted(attribute.metadata.items())}".encode())
+        _update_digest(digest, attribute.value)
+        for time_code, value in attribute.time_samples.items():
+            digest.update(repr(time_code).encode())
+            _update_digest(digest, value)
+    if prim_data.custom_data:
+        digest.update(repr(sorted(prim_data.custom_data.items())).encode())
+    return digest.hexdigest()
+
+
+def load_prim_hashes(layer_path: str) -> dict[str, str]:
+    """Returns the prim content hashes stored next to a layer by a previous export."""
+    sidecar_path = layer_path + HASH_SIDECAR_SUFFIX
+    if not os.path.exists(sidecar_path):
+        return {}
+    with open(sidecar_path) as sidecar:
+        return json.load(sidecar)
+
+
+def save_prim_hashes(layer_path: str, prim_hashes: dict[str, str]) -> None:
+    """Stores the prim content hashes of an export next to its layer."""
+    with open(layer_path + HASH_SIDECAR_SUFFIX, "w") as sidecar:
+        json.dump(prim_hashes, sidecar, indent=0, sort_keys=True)
+
+
+class IncrementalWriter:
+    """
+    Wraps a LayerWriter that edits an existing layer and only re-authors the
+    prims whose content hash changed since the previous export.
+    """
+    def __init__(self, writer: LayerWriter, previous_hashes: dict[str, str]):
+        self.writer = writer
+        self.previous_hashes = previous_hashes
+        self.hashes: dict[str, str] = {}
+        self.authored: list[str] = []
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def define_prim(self, path: Sdf.Path, prim_data: PrimData) -> Sdf.PrimSpec:
+        key = str(path)
+        self.hashes[key] = hash_prim_data(prim_data)
+        if self.previous_hashes.get(key) == self.hashes[key] and self.writer.has_prim(path):
+            return self.writer.layer.GetPrimAtPath(path)
+
+        self.authored.append(key)
+        return self.writer.define_prim(path, prim_data)
+
+    def remove_stale_prims(self) -> list[str]:
+        """
+        Removes every prim spec in the layer that was not defined during this export, then every
+        variant left empty by that, and every variant set, with its selection, left without variants.
+
+        Returns:
+            list[str]: The removed prim paths.
+        """
+        layer = self.writer.layer
+        stale_paths = []
+
+        def _collect(path):
+            if path.IsPrimPath() and str(path) not in self.hashes:
+                stale_paths.append(path)
+
+        layer.Traverse(Sdf.Path.absoluteRootPath, _collect)
+
+        removed = []
+        for path in sorted(stale_paths, key=lambda p: p.pathElementCount, reverse=True):
+            prim_spec = layer.GetPrimAtPath(path)
+            if prim_spec is None:
+                continue
+            del prim_spec.nameParent.nameChildren[prim_spec.name]
+            removed.append(str(path))
+        if removed:
+            self._remove_empty_variants()
+        return removed
+
+    def _remove_empty_variants(self) -> None:
+        layer = self.writer.layer
+        variant_paths = []
+
+        def _collect(path):
+            if path.IsPrimVariantSelectionPath() and path.GetVariantSelection()[1]:
+                variant_paths.append(path)
+
+        layer.Traverse(Sdf.Path.absoluteRootPath, _collect)
+
+        # Deepest first, so a variant that only held emptied nested variant sets is removed too
+        for path in sorted(variant_paths, key=lambda p: p.pathElementCount, reverse=True):
+            variant_spec = layer.GetObjectAtPath(path)
+            contents = variant_spec.primSpec
+            if contents.nameChildren or contents.properties or contents.variantSets:
+                continue
+            variant_set_spec = variant_spec.owner
+            prim_spec = layer.GetPrimAtPath(path.GetParentPath())
+            variant_set_spec.RemoveVariant(variant_spec)
+            if prim_spec.variantSelections.get(variant_set_spec.name) == path.GetVariantSelection()[1]:
+                del prim_spec.variantSelections[variant_set_spec.name]
+            if variant_set_spec.variants:
+                continue
+            variant_set_name = variant_set_spec.name
+            del prim_spec.variantSets[variant_set_name]
+            if variant_set_name in prim_spec.variantSetNameList.prependedItems:
+                prim_spec.variantSetNameList.prependedItems.remove(variant_set_name)
+
+
+class RecordingWriter:
+    """
+    Records authoring calls so the Maya extraction can run on the main thread
+    while the USD authoring is replayed onto a layer somewhere else.
+    """
+    def __init__(self):
+        self.operations: list[tuple] = []
+        self._paths: set[Sdf.Path] = set()
+
+    def has_prim(self, path: Sdf.Path) -> bool:
+        return path in self._paths
+
+    def define_prim(self, path: Sdf.Path, prim_data: PrimData) -> PrimData:
+        self.operations.append(("define_prim", path, prim_data))
+        self._paths.add(path)
+        return prim_data
+
+    def add_variant_set(self, path: Sdf.Path, variant_set_name: str) -> None:
+        self.operations.append(("add_variant_set", path, variant_set_name))
+
+    @contextmanager
+    def variant_context(self, path: Sdf.Path, variant_set_name: str, variant_name: str):
+        """Yields the parent path to author the contents of the variant under."""
+        self.operations.append(("add_variant", path, variant_set_name, variant_name))
+        variant_path = path.AppendVariantSelection(variant_set_name, variant_name)
+        self._paths.add(variant_path)
+        yield variant_path
+
+    def set_variant_selection(self, path: Sdf.Path, variant_set_name: str, variant_name: str) -> None:
+        self.operations.append(("set_variant_selection", path, variant_set_name, variant_name))
+
+    def replay(self, writer: LayerWriter) -> None:
+        """Authors the recorded calls, in order, through a LayerWriter."""
+        for operation, *args in self.operations:
+            if operation == "add_variant":
+                with writer.variant_context(*args):
+                    pass
+            else:
+                getattr(writer, operation)(*args)
+
+
+def get_department(attribute_name: str) -> USD_Department:
+    """
+    Returns:
+        USD_Department: The department layer an attribute is authored in. Primvars go to UV,
+            xform ops to TRANSFORM and everything else, such as topology and points, to MODEL.
+    """
+    if attribute_name.startswith("primvars:"):
+        return USD_Department.UV
+    if attribute_name.startswith("xformOp") or attribute_name == UsdGeom.Tokens.xformOpOrder:
+        return USD_Department.TRANSFORM
+    return USD_Department.MODEL
+
+
+def get_department_layer_path(file_path: str, department: USD_Department) -> str:
+    """
+    Returns:
+        str: The path of a department layer, next to the root layer at file_path, e.g. asset_MDL.usda.
+    """
+    root, extension = os.path.splitext(file_path)
+    return f"{root}_{department.value}{extension}"
+
+
+def is_sidecar_layer(file_path: str) -> bool:
+    """
+    Returns:
+        bool: The file is a layer an export writes next to its root layer rather than one to open on
+            its own: a value clip or clip manifest of ClipStreamer, or a department layer whose root
+            layer exists.
+    """
+    root, extension = os.path.splitext(file_path)
+    if re.search(r"\.(clip\d{4}|manifest)$", root):
+        return True
+    for department in USD_Department:
+        suffix = f"_{department.value}"
+        if root.endswith(suffix) and os.path.exists(root[:-len(suffix)] + extension):
+            return True
+    return False
+
+
+def write_department_root(
+    file_path: str,
+    file_format: USD_Format,
+    written: list[USD_Department],
+    layer_metadata: dict[str, Any]) -> list[str]:
+    """
+    Writes the root layer of a department export, sublayering the departments just written and
+    those already on disk, so it never points at a missing layer. A root that already lists
+    exactly those layers is kept as it is.
+
+    Args:
+        file_path (str): Path of the root layer.
+        file_format (USD_Format): usda or usdc.
+        written (list[USD_Department]): The departments this export writes.
+        layer_metadata (dict[str, Any]): Layer metadata such as upAxis and metersPerUnit.
+
+    Returns:
+        list[str]: The sublayer paths of the root, relative to it.
+    """
+    sublayers = [
+        os.path.basename(get_department_layer_path(file_path, department))
+        for department in USD_Department
+        if department in written or os.path.exists(get_department_layer_path(file_path, department))
+    ]
+    if os.path.exists(file_path):
+        existing = Sdf.Layer.OpenAsAnonymous(file_path)
+        if existing is not None and list(existing.subLayerPaths) == sublayers:
+            return sublayers
+
+    root_layer = create_layer(file_path, file_format)
+    for key, value in layer_metadata.items():
+        root_layer.pseudoRoot.SetInfo(key, value)
+    root_layer.subLayerPaths = sublayers
+    root_layer.Save()
+    return sublayers
+
+
+class DepartmentWriter:
+    """
+    Splits an export into one RecordingWriter per department. The STRUCTURE recording defines
+    every prim with its type, composition arcs and variant sets, the other recordings only hold
+    overs with the attributes get_department routes to them.
+    """
+    def __init__(self):
+        self.recordings = {department: RecordingWriter() for department in USD_Department}
+        self._structure = self.recordings[USD_Department.STRUCTURE]
+
+    def has_prim(self, path: Sdf.Path) -> bool:
+        return self._structure.has_prim(path)
+
+    def define_prim(self, path: Sdf.Path, prim_data: PrimData) -> PrimData:
+        self._structure.define_prim(path, PrimData(
+            prim_data.type_name,
+            specifier=prim_data.specifier,
+            references=prim_data.references,
+            instanceable=prim_data.instanceable,
+            custom_data=prim_data.custom_data,
+        ))
+        attributes = {}
+        for name, attribute in prim_data.attributes.items():
+            attributes.setdefault(get_department(name), {})[name] = attribute
+        for department, department_attributes in attributes.items():
+            self.recordings[department].define_prim(path, PrimData("", department_attributes, Sdf.SpecifierOver))
+        return prim_data
+
+    def add_variant_set(self, path: Sdf.Path, variant_set_name: str) -> None:
+        self._structure.add_variant_set(path, variant_set_name)
+
+    @contextmanager
+    def variant_context(self, path: Sdf.Path, variant_set_name: str, variant_name: str):
+        """Yields the parent path to author the contents of the variant under, in every department."""
+        with ExitStack() as stack:
+            for recording in self.recordings.values():
+                # A variant is authored on a prim spec, which a department may not have yet
+                if recording is not self._structure and not recording.has_prim(path) and not path.IsAbsoluteRootPath():
+                    recording.define_prim(path, PrimData("", specifier=Sdf.SpecifierOver))
+                variant_path = stack.enter_context(recording.variant_context(path, variant_set_name, variant_name))
+            yield variant_path
+
+    def set_variant_selection(self, path: Sdf.Path, variant_set_name: str, variant_name: str) -> None:
+        self._structure.set_variant_selection(path, variant_set_name, variant_name)
+
+
+def write_layer(
+    recording: RecordingWriter,
+    file_path: str,
+    file_format: USD_Format,
+    layer_metadata: dict[str, Any]) -> dict[str, float]:
+    """
+    Authors a recorded export onto a new layer and saves it. Only touches USD, so it is safe to run off the main thread.
+
+    Args:
+        recording (RecordingWriter): The recorded export.
+        file_path (str): Output path, already resolved for file_format.
+        file_format (USD_Format): usda, usdc or usdz.
+        layer_metadata (dict[str, Any]): Layer metadata such as upAxis and metersPerUnit.
+
+    Returns:
+        dict[str, float]: Seconds spent authoring and saving.
+    """
+    start = time.perf_counter()
+    package_dir = tempfile.TemporaryDirectory() if file_format == USD_Format.USDZ else None
+    if package_dir:
+        layer_name = os.path.splitext(os.path.basename(file_path))[0]
+        layer = create_layer(os.path.join(package_dir.name, f"{layer_name}.usdc"), USD_Format.USDC)
+    else:
+        layer = create_layer(file_path, file_format)
+
+    with Sdf.ChangeBlock():
+        for key, value in layer_metadata.items():
+            layer.pseudoRoot.SetInfo(key, value)
+        recording.replay(LayerWriter(layer))
+    authored = time.perf_counter()
+
+    layer.Save()
+    if package_dir:
+        package_usdz(layer.realPath, file_path)
+        package_dir.cleanup()
+    saved = time.perf_counter()
+
+    return {"author_s": authored - start, "save_s": saved - authored}